@@ -0,0 +1,537 @@
+import asyncio                      # Boucle d'événements : permet de lancer beaucoup de téléchargements en même temps
+import contextvars                  # La catégorie des mesures suit les appels exécutés dans les threads
+import functools                    # Appel du transport avec des arguments nommés dans un thread
+import argparse                     # Lecture des options passées en ligne de commande
+import time                         # Mesure du temps total du crawl
+from concurrent.futures import ThreadPoolExecutor  # Threads dans lesquels tournent les appels bloquants (requests)
+from urllib.parse import urlsplit   # Pour retrouver le nom d'hôte d'une URL
+
+import requests                     # Types d'erreurs réseau (une URL en échec n'arrête pas le crawl)
+from bs4 import BeautifulSoup       # Analyse du HTML
+
+import Scrapper_http                # Transport HTTP partagé (appelé dans des threads pour ne pas bloquer la boucle)
+import Scrapper_parsers             # Choix du backend d'analyse des fiches produit
+import Scrapper_snapshot            # Instantané du run précédent (mode incrémental)
+import Scrapper_journal             # Journal de crawl : reprise après une interruption
+import Scrapper_images              # Étape "images" : pool de téléchargement séparé
+import Scrapper_metrics             # Temps par étape (--metrics ou SCRAPPER_METRICS=1)
+import Scrapper_ratelimit           # Limiteur par hôte : seau à jetons + concurrence adaptative (AIMD)
+import Scrapper_retry               # Réessais avec backoff et URLs en échec (dead letters)
+import Scrapper_cache               # Cache HTTP sur disque (--cache)
+import Scrapper_warc                # Archive WARC des réponses (--warc)
+import Scrapper_http2               # Requêtes multiplexées en HTTP/2 (--http2)
+import Scrapper_parsepool           # Analyse des fiches produit dans un pool de processus (--processus)
+import Scrapper_dataset             # Export Parquet / Arrow en plus des CSV (--dataset)
+import Scrapper_sqlite              # Base SQLite à la place des CSV (--db)
+import Scrapper_urls                # URLs déjà vues pendant le run (frontière)
+import Scrapper_phase4 as phase4    # On réutilise l'extraction et l'écriture CSV de la phase 4
+
+# -------------------------------
+# CONFIGURATION DE BASE
+# -------------------------------
+MAX_CONCURRENCY = 32                # Nombre maximum de requêtes en vol (tous hôtes confondus)
+PER_HOST = 16                       # Nombre maximum de requêtes en vol vers un même hôte (plafond de l'AIMD)
+RATE = None                         # Requêtes par seconde au plus vers un même hôte (None = pas de plafond)
+IMAGES_DIR = "V4_images"            # Même dossier d'images que la phase 4
+IMAGE_WORKERS = Scrapper_images.WORKERS     # Téléchargements d'images en parallèle
+PARSE_WORKERS = 0                   # Processus d'analyse des fiches (0 = analyse dans la boucle asyncio)
+CATALOGUE_PAGE = "catalogue/page-1.html"    # Première page du catalogue global (tous les livres, 20 par page)
+
+
+# -------------------------------
+# Moteur de crawl asynchrone
+# -------------------------------
+class AsyncCrawler:
+    """
+    Version concurrente de Scrapper_phase4 :
+    les pages de listing et les fiches produit sont téléchargées en parallèle,
+    dans la limite d'un nombre global de requêtes et d'un limiteur par hôte : la concurrence vers un hôte
+    s'adapte (AIMD) et recule sur 429 / 5xx / latence en hausse (voir Scrapper_ratelimit.py).
+    Les images partent dans un pool séparé (Scrapper_images.ImagePipeline) : l'extraction ne les attend pas.
+    Avec parse_workers > 0, les fiches produit sont analysées par un pool de processus (Scrapper_parsepool.ParsePool),
+    relié aux téléchargements par une file bornée de parse_queue pages.
+    Une page ou une fiche toujours en échec après les réessais est notée dans dead_letters et le crawl continue.
+    Avec catalogue=True, les livres sont lus sur le catalogue global (catalogue/page-N.html) au lieu des pages
+    de chaque catégorie, puis rangés par catégorie (celle du fil d'Ariane de la fiche produit).
+    Les CSV (csv/V4_<catégorie>.csv) et le dossier V4_images/ sont identiques à la phase 4.
+    """
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, per_host=PER_HOST, images_dir=IMAGES_DIR, transport=None,
+                 listing_only=False, details=False, incremental=False, journal=None, image_workers=IMAGE_WORKERS,
+                 rate=RATE, dead_letters=None, parse_workers=PARSE_WORKERS, parse_queue=None, dataset=None,
+                 store=None, catalogue=False, image_store=None):
+        if catalogue and listing_only and not details:
+            raise ValueError("Le mode catalogue lit la catégorie sur la fiche produit : il ne marche pas en mode listing seul")
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self.rate = rate
+        self.images_dir = images_dir
+        self.listing_only = listing_only    # Lire les livres sur les pages de catégorie (20 par requête)
+        self.details = details              # En mode listing : compléter chaque livre avec sa fiche produit
+        self.incremental = incremental      # Ne télécharger que les livres nouveaux ou modifiés depuis le run précédent
+        self.catalogue = catalogue          # Parcourir le catalogue global plutôt que chaque catégorie
+        self.snapshot = Scrapper_snapshot.Snapshot()    # Livres du run précédent (chargés par scrape_site)
+        self.changes = []                   # Lignes du fichier de changements
+        self.seen_urls = set()              # Fiches vues sur le site pendant ce run
+        self.frontier = Scrapper_urls.Frontier()    # Pages et fiches déjà prises en charge : jamais demandées deux fois
+        self.books = {}                     # url de fiche -> livre ou tâche (réutilisé par les autres catégories)
+        self._listed = {}                   # catégorie -> fiches déjà prises dans cette catégorie
+        self.journal = journal or Scrapper_journal.NullJournal()    # Ce qui est déjà fait (reprise)
+        self.transport = transport or Scrapper_http.get_transport()     # Pool de connexions partagé
+        self.retry = self.transport.retry                   # Même politique de réessai que le transport
+        self.dead_letters = dead_letters if dead_letters is not None else Scrapper_retry.DeadLetters(None)
+        self.images = Scrapper_images.ImagePipeline(image_workers, self.transport, self.dead_letters, image_store)
+        self.parse_pool = Scrapper_parsepool.ParsePool(parse_workers, parse_queue) if parse_workers else None
+        self.dataset = dataset              # Export Parquet / Arrow qui reçoit aussi chaque livre écrit en CSV
+        self.store = store                  # Base SQLite (Scrapper_sqlite.BookStore) à la place des CSV
+        self._global = asyncio.Semaphore(max_concurrency)   # Limite globale
+        self._hosts = {}                                    # hôte -> HostLimiter (limite par hôte)
+        # requests est bloquant : chaque requête tourne dans un thread de ce pool
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    def _host_limit(self, url):
+        """Retourne (et crée si besoin) le limiteur de l'hôte de l'URL."""
+        host = urlsplit(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = Scrapper_ratelimit.HostLimiter(self.per_host, self.rate, name=host)
+        return self._hosts[host]
+
+    async def _run(self, func, *args):
+        """Exécute une fonction bloquante dans le pool de threads."""
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()    # run_in_executor ne transmet pas la catégorie courante
+        return await loop.run_in_executor(self._executor, context.run, func, *args)
+
+    async def fetch(self, url):
+        """
+        Télécharge une URL en respectant la limite globale et le limiteur de l'hôte.
+        Les échecs passagers sont réessayés ici (et pas dans le transport) pour que le limiteur voie chaque réponse :
+        backoff avec gigue, ou la pause Retry-After déjà appliquée par le limiteur.
+        """
+        limiter = self._host_limit(url)
+        get = functools.partial(self.transport.get, url, retry=False)
+        attempt = 0
+        while True:
+            attempt += 1
+            async with self._global:
+                await limiter.acquire()
+                response = error = status = retry_after = None
+                start = time.perf_counter()
+                try:
+                    response = await self._run(get)
+                    status, retry_after = response.status_code, response.headers.get("Retry-After")
+                except requests.RequestException as e:
+                    error = e
+                finally:
+                    limiter.release(status, time.perf_counter() - start, retry_after)
+            kind = Scrapper_retry.classify(error, status)
+            if not self.retry.should_retry(kind, attempt):
+                break
+            if not retry_after:                             # Avec Retry-After, le limiteur met déjà l'hôte en pause
+                await asyncio.sleep(self.retry.delay(attempt))
+        if error is not None:
+            raise error
+        response.raise_for_status()                         # Même comportement que get_soup : erreur HTTP => exception
+        return response
+
+    async def get_soup(self, url):
+        """Équivalent asynchrone de phase4.get_soup."""
+        response = await self.fetch(url)
+        with Scrapper_metrics.timer("parse"):
+            return BeautifulSoup(response.text, "html.parser")
+
+    async def extract_book_data(self, book_url, category_name):
+        """
+        Télécharge une fiche produit et en extrait les champs; son image part dans le pool d'images.
+        category_name None (mode catalogue) : l'image est rangée dans la catégorie lue sur la fiche.
+        """
+        book_data = self.journal.book(book_url)
+        if book_data is None and self.parse_pool is not None:
+            async with self.parse_pool.slot():      # File pleine : le téléchargement attend que l'analyse rattrape
+                response = await self.fetch(book_url)
+                book_data = await self.parse_pool.parse(response, book_url)
+            self.journal.record_book(book_url, book_data)
+        elif book_data is None:
+            response = await self.fetch(book_url)
+            book_data = phase4.parse_book_page(response.text, book_url)
+            self.journal.record_book(book_url, book_data)
+        image_filename = phase4.image_path(self.images_dir, category_name or book_data["category"],
+                                           book_data["universal_product_code (upc)"])
+        self.images.submit(book_data["image_url"], image_filename, book_data["title"], self.journal.record_image)
+        return book_data
+
+    async def complete_book(self, record, category_name):
+        """
+        Complète un enregistrement de listing (UPC, description, stock...) avec sa fiche produit et son image.
+        None si la fiche est toujours en échec après les réessais, ou illisible (notée dans dead_letters).
+        """
+        try:
+            with Scrapper_metrics.timer("book"):    # Attente des limites de concurrence comprise
+                return await self.extract_book_data(record["product_page_url"], category_name)
+        except Exception as e:              # Réseau (après les réessais) ou fiche illisible : le crawl continue
+            self.dead_letters.add("book", record["product_page_url"], e, category=category_name)
+            return None
+
+    async def refresh_book(self, listing_record, previous, category_name):
+        """Mode incrémental : re-télécharge un livre nouveau ou modifié et note le changement."""
+        record = await self.complete_book(listing_record, category_name or previous and previous["category"])
+        if record is None:
+            return previous                 # Fiche en échec : on garde l'ancienne version (retentée au run suivant)
+        # Un livre "nouveau" peut être un ancien livre dont l'URL a changé : on le retrouve par son UPC
+        previous = previous or self.snapshot.get(upc=record["universal_product_code (upc)"])
+        change = Scrapper_snapshot.compare(previous, record)
+        if change:
+            self.changes.append(change)
+        return record
+
+    def incremental_book(self, listing_record, category_name):
+        """Ancien enregistrement si le listing ne montre aucun changement, sinon une tâche de mise à jour."""
+        self.seen_urls.add(listing_record["product_page_url"])
+        previous = self.snapshot.get(listing_record["product_page_url"])
+        if previous and not Scrapper_snapshot.listing_changed(previous, listing_record):
+            return previous
+        return asyncio.create_task(self.refresh_book(listing_record, previous, category_name))
+
+    async def read_listing(self, page_url, category_name):
+        """
+        (livres de la page, URL de la page suivante, nombre de pages du pager ou None),
+        depuis le journal ou en téléchargeant la page.
+        """
+        if not self.frontier.add(page_url):
+            return [], None, None           # Page déjà lue pendant ce run (pagination qui boucle)
+        entry = self.journal.listing(page_url)
+        if entry:
+            return entry["books"], entry["next"], entry.get("pages")
+        try:
+            soup = await self.get_soup(page_url)
+        except requests.RequestException as e:
+            self.dead_letters.add("listing", page_url, e, category=category_name)
+            return [], None, None           # Page en échec : ses livres (et la suite sans pager) manquent
+        records, next_url = phase4.listing_page(soup, page_url, category_name)
+        pages = phase4.page_count(soup)
+        self.journal.record_listing(page_url, next_url, records, pages)
+        return records, next_url, pages
+
+    def start_books(self, records, category_name):
+        """
+        Un dictionnaire ou une tâche par livre de la page (les fiches partent tout de suite en parallèle).
+        Un livre déjà lancé dans une autre catégorie n'est pas re-téléchargé : il est écrit aussi dans celle-ci.
+        """
+        books = []
+        listed = self._listed.setdefault(category_name, set())
+        for record in records:
+            url = record["product_page_url"]
+            if url in listed:
+                continue                    # Livre déjà pris dans cette catégorie (listing décalé, doublon)
+            listed.add(url)
+            if self.listing_only and not self.details and not self.incremental:
+                books.append(record)        # Enregistrement lu sur la page : rien à télécharger
+                continue
+            if not self.frontier.add(url) and url in self.books:
+                books.append(self.reuse_book(self.books[url], category_name))
+                continue
+            if self.incremental:
+                book = self.incremental_book(record, category_name)
+            else:
+                book = asyncio.create_task(self.complete_book(record, category_name))
+            self.books[url] = book
+            books.append(book)
+        return books
+
+    def reuse_book(self, book, category_name):
+        """Livre lancé par une autre catégorie : même enregistrement, et son image rangée aussi dans celle-ci."""
+        if not isinstance(book, asyncio.Task):
+            return book                     # Mode incrémental : livre inchangé, aucune image à ranger
+
+        async def with_image():
+            record = await book
+            if record is not None and category_name is not None:
+                image_filename = phase4.image_path(self.images_dir, category_name,
+                                                   record["universal_product_code (upc)"])
+                self.images.submit(record["image_url"], image_filename, record["title"], self.journal.record_image)
+            return record
+
+        return asyncio.create_task(with_image())
+
+    async def page_books(self, page_url, category_name):
+        """Télécharge une page de listing et lance aussitôt ses livres."""
+        records, next_url, pages = await self.read_listing(page_url, category_name)
+        return self.start_books(records, category_name)
+
+    async def scrape_category(self, category_name, category_url):
+        """Parcourt les pages d'une catégorie; les livres de chaque page partent en parallèle."""
+        if self.journal.category_done(category_name):
+            print(f"⏭️  {category_name} : déjà terminée lors du run précédent")
+            return 0
+        Scrapper_metrics.set_category(category_name)   # Chaque catégorie tourne dans sa propre tâche asyncio
+        records, page_url, pages = await self.read_listing(category_url, category_name)
+        books = self.start_books(records, category_name)   # Un dictionnaire ou une tâche par livre, dans l'ordre du site
+        if pages and pages > 1:
+            # "Page 1 of N" : les pages 2 à N sont toutes demandées en même temps
+            other_pages = await asyncio.gather(*[self.page_books(url, category_name)
+                                                 for url in phase4.page_urls(category_url, pages)])
+            for page in other_pages:
+                books.extend(page)
+        else:
+            # Pas de pager : on suit les liens "next" une page après l'autre
+            while page_url:
+                records, page_url, pages = await self.read_listing(page_url, category_name)
+                books.extend(self.start_books(records, category_name))
+
+        return await self.write_category(category_name, books)
+
+    async def write_category(self, category_name, books):
+        """
+        Écrit le CSV d'une catégorie : les livres dans l'ordre du site, chacun dès que sa tâche est terminée.
+        Retourne le nombre de livres écrits.
+        """
+        with phase4.open_csv(category_name, self.listing_only and not self.details, self.dataset, self.store) as sink:
+            for book in books:
+                book = await book if isinstance(book, asyncio.Task) else book
+                if book is not None:        # None : fiche en échec
+                    sink.write(book)
+        # Échec sans catégorie (mode catalogue : page du catalogue ou fiche illisible) : aucune catégorie n'est sûre
+        if {category_name, None} & self.dead_letters.categories():
+            print(f"⚠️ {sink.count} livres sauvegardés dans {sink.path}, des pages sont en échec")
+            return sink.count
+        self.journal.record_category(category_name)
+        print(f"✅ {sink.count} livres sauvegardés dans {sink.path}")
+        return sink.count
+
+    async def scrape_site(self, base_url=None):
+        """Scrape toutes les catégories en parallèle."""
+        base_url = base_url or phase4.BASE_URL
+        if self.incremental:
+            # Avec une base SQLite, l'instantané est le dernier état connu de chaque livre dans la base
+            self.snapshot = self.store.load_snapshot() if self.store else Scrapper_snapshot.load_snapshot()
+            print(f"🔁 Mode incrémental : {len(self.snapshot)} livres dans l'instantané précédent")
+        if self.journal.categories is None:
+            homepage = await self.get_soup(base_url)
+            self.journal.record_categories(phase4.list_categories(homepage, base_url))
+        categories = self.journal.categories
+        if self.catalogue:
+            total = await self.scrape_catalogue(base_url)
+        else:
+            total = sum(await asyncio.gather(*[self.scrape_category(name, url) for name, url in categories]))
+        if self.incremental:
+            self.save_changes({name for name, url in categories})
+        return total
+
+    async def scrape_catalogue(self, base_url):
+        """
+        Parcourt le catalogue global (catalogue/page-1.html ... page-N.html, toutes les pages en même temps)
+        au lieu des pages de chaque catégorie : une page de listing par tranche de 20 livres du site,
+        quelle que soit leur catégorie. Chaque livre est ensuite rangé dans le CSV de la catégorie
+        lue sur sa fiche produit (fil d'Ariane), dans l'ordre du catalogue.
+        """
+        Scrapper_metrics.set_category("catalogue")     # La catégorie d'un livre n'est connue qu'après sa fiche
+        first_url = Scrapper_urls.resolve(base_url, CATALOGUE_PAGE)
+        records, page_url, pages = await self.read_listing(first_url, None)
+        books = self.start_books(records, None)
+        if pages and pages > 1:
+            other_pages = await asyncio.gather(*[self.page_books(url, None)
+                                                 for url in phase4.page_urls(first_url, pages)])
+            for page in other_pages:
+                books.extend(page)
+        else:
+            while page_url:
+                records, page_url, pages = await self.read_listing(page_url, None)
+                books.extend(self.start_books(records, None))
+
+        # Routage par catégorie : toutes les catégories de la page d'accueil ont leur CSV (même vide)
+        by_category = {name: [] for name, url in self.journal.categories}
+        for book in books:
+            book = await book if isinstance(book, asyncio.Task) else book
+            if book is not None:
+                by_category.setdefault(book["category"], []).append(book)
+        total = 0
+        for category_name, category_books in by_category.items():
+            if self.journal.category_done(category_name):
+                print(f"⏭️  {category_name} : déjà terminée lors du run précédent")
+                continue
+            Scrapper_metrics.set_category(category_name)
+            total += await self.write_category(category_name, category_books)
+        return total
+
+    def save_changes(self, categories):
+        """
+        Ajoute les livres disparus puis écrit le fichier de changements. Une catégorie avec des pages en échec
+        n'a pas été lue en entier : ses livres non vus ne sont pas comptés comme supprimés (aucune catégorie
+        après un échec sans catégorie, en mode catalogue).
+        """
+        failed = self.dead_letters.categories()
+        if failed:
+            excluded = categories if None in failed else categories & failed
+            categories = categories - excluded
+            if excluded:
+                print(f"⚠️ Pages en échec : livres disparus non recherchés dans {', '.join(sorted(excluded))}")
+        self.changes.extend(Scrapper_snapshot.removed(self.snapshot, self.seen_urls, categories))
+        self.changes.sort(key=lambda row: (row["category"], row["product_page_url"]))
+        path = Scrapper_snapshot.write_changes(self.changes)
+        print(f"🔁 {len(self.changes)} changements (prix / stock) enregistrés dans {path}")
+
+    def close(self):
+        """Attend les dernières images et libère les pools de threads (et de processus)."""
+        self._executor.shutdown(wait=True)
+        self.images.close()
+        if self.parse_pool is not None:
+            self.parse_pool.close()
+
+    def report(self):
+        """Une ligne par hôte : concurrence sur laquelle le limiteur s'est stabilisé."""
+        return "\n".join(limiter.report() for limiter in self._hosts.values())
+
+
+def crawl(max_concurrency=MAX_CONCURRENCY, per_host=PER_HOST, images_dir=IMAGES_DIR, base_url=None, pool_size=None,
+          listing_only=False, details=False, incremental=False, resume=True, image_workers=IMAGE_WORKERS, rate=RATE,
+          cache=None, archive=None, parse_workers=PARSE_WORKERS, parse_queue=None, dataset=None,
+          store=None, catalogue=False, image_store=None, http2=None):
+    """
+    Lance un crawl complet et retourne le nombre de livres sauvegardés.
+    Un run interrompu reprend là où il s'était arrêté (journal crawl_journal_V4.jsonl), sauf si resume=False.
+    Les URLs en échec après les réessais sont notées dans dead_letters_V4.jsonl : le journal est alors gardé
+    et le run suivant ne retente que ces URLs.
+    cache : Scrapper_cache.HttpCache (None = variable d'environnement SCRAPPER_CACHE, False = pas de cache).
+    archive : Scrapper_warc.WarcWriter qui garde toutes les réponses (None = variable SCRAPPER_WARC, False = aucune).
+    dataset : Scrapper_dataset.DatasetWriter, export Parquet / Arrow (None = variable SCRAPPER_DATASET, False = aucun).
+    store : Scrapper_sqlite.BookStore, base SQLite à la place des CSV (None = variable SCRAPPER_DB, False = CSV).
+    catalogue : livres lus sur le catalogue global (catalogue/page-N.html) puis rangés par catégorie.
+    image_store : Scrapper_images.ImageStore, images gardées une fois (None = variable SCRAPPER_IMAGE_STORE, False = aucun).
+    http2 : Scrapper_http2.HTTP2Adapter, requêtes multiplexées en HTTP/2 (None = variable SCRAPPER_HTTP2, False = HTTP/1.1).
+    """
+    # Le pool doit pouvoir garder autant de connexions que de requêtes simultanées vers un hôte (pages + images)
+    transport = Scrapper_http.configure(pool_size=pool_size or per_host + image_workers, cache=cache,
+                                        archive=archive, http2=http2)
+    mode = "incremental" if incremental else "listing+details" if listing_only and details else \
+           "listing" if listing_only else "full"
+    if catalogue:
+        mode = "catalogue-" + mode          # Les pages lues ne sont pas les mêmes : journal propre à ce mode
+    journal = Scrapper_journal.CrawlJournal(phase4.JOURNAL_FILE, mode, resume)
+    if journal.resumed:
+        print(f"♻️  Reprise du run interrompu : {len(journal.done)} catégories et {len(journal.books)} livres déjà faits")
+    dead_letters = Scrapper_retry.DeadLetters(phase4.DEAD_LETTERS_FILE)
+    dataset = Scrapper_dataset.from_env() if dataset is None else dataset or None
+    store = Scrapper_sqlite.from_env("async") if store is None else store or None
+
+    async def _main():
+        crawler = AsyncCrawler(max_concurrency, per_host, images_dir, transport, listing_only, details, incremental,
+                               journal, image_workers, rate, dead_letters, parse_workers, parse_queue, dataset, store,
+                               catalogue, image_store)
+        for entry in dead_letters.previous_of("image"):     # Images en échec au run précédent
+            crawler.images.submit(entry["url"], entry["path"], entry.get("title", ""), journal.record_image)
+        try:
+            return await crawler.scrape_site(base_url)
+        finally:
+            # Après une erreur, les fiches encore en cours sont annulées avant de fermer les pools
+            pending = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            crawler.close()
+            print(f"🚦 {crawler.report()}")
+            print(f"🔗 Frontière : {crawler.frontier.report()}")
+            if crawler.images.downloaded or crawler.images.skipped or crawler.images.errors:
+                print(f"🖼️  Images : {crawler.images.report()}")
+    try:
+        total = asyncio.run(_main())
+    except BaseException:
+        journal.close()                     # Le journal est gardé pour la reprise
+        dead_letters.close(completed=False)
+        raise
+    finally:
+        if dataset is not None:
+            dataset.close()                 # Dernier lot écrit même après une erreur
+        if store is not None:
+            store.close()
+    if dataset is not None:
+        print(f"📊 Export en colonnes : {dataset.count} livres dans {dataset.path}")
+    if store is not None:
+        print(f"🗄️  Base SQLite : {store.count} livres dans {store.path} (crawl {store.crawl_id})")
+    dead_letters.close()
+    if dead_letters:
+        journal.close()                     # Gardé : le prochain run ne retente que les échecs
+        print(f"⚠️ {len(dead_letters)} URLs en échec (voir {phase4.DEAD_LETTERS_FILE}) : relancez le script pour les retenter")
+    else:
+        journal.finish()
+    return total
+
+
+# -------------------------------
+# Programme principal
+# -------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Scraping concurrent de books.toscrape.com (sorties identiques à la phase 4)")
+    parser.add_argument("--concurrence", type=int, default=MAX_CONCURRENCY, help="requêtes simultanées au total")
+    parser.add_argument("--par-hote", type=int, default=PER_HOST,
+                        help="requêtes simultanées au plus vers un même hôte (la concurrence s'adapte en dessous)")
+    parser.add_argument("--debit", type=float, default=RATE, help="requêtes par seconde au plus vers un même hôte")
+    parser.add_argument("--images", type=int, default=IMAGE_WORKERS, help="téléchargements d'images en parallèle")
+    parser.add_argument("--pool", type=int, default=None,
+                        help="connexions keep-alive gardées par hôte (défaut : --par-hote + --images)")
+    parser.add_argument("--parser", default=Scrapper_parsers.BACKEND,
+                        choices=["auto"] + list(Scrapper_parsers.BACKENDS), help="backend d'analyse des fiches produit")
+    parser.add_argument("--processus", type=int, default=PARSE_WORKERS,
+                        help="processus d'analyse des fiches produit (0 = dans la boucle; conseillé : nombre de cœurs)")
+    parser.add_argument("--file-analyse", type=int, default=None,
+                        help=f"pages téléchargées en attente d'analyse au plus (défaut : {Scrapper_parsepool.QUEUE_PER_WORKER} "
+                             "par processus)")
+    parser.add_argument("--listing-only", action="store_true",
+                        help="lire les livres sur les pages de catégorie uniquement (pas de fiche produit ni d'image)")
+    parser.add_argument("--details", action="store_true",
+                        help="avec --listing-only : compléter UPC, description et stock depuis les fiches produit")
+    parser.add_argument("--incremental", action="store_true",
+                        help="ne re-télécharger que les livres nouveaux ou dont le prix / la disponibilité a changé")
+    parser.add_argument("--catalogue", action="store_true",
+                        help="lire les livres sur le catalogue global (catalogue/page-N.html) plutôt que par catégorie")
+    parser.add_argument("--recommencer", action="store_true",
+                        help="ignorer le journal d'un run interrompu et repartir de zéro")
+    parser.add_argument("--cache", metavar="DOSSIER", default=Scrapper_cache.CACHE_DIR or None,
+                        help="cache HTTP sur disque : les pages et images déjà vues sont revalidées (304)")
+    parser.add_argument("--cache-max-mo", type=int, default=Scrapper_cache.MAX_BYTES // (1024 * 1024),
+                        help="taille maximum du cache (Mo), au-delà les entrées les moins récentes sont supprimées")
+    parser.add_argument("--cache-max-age", type=float, default=Scrapper_cache.MAX_AGE,
+                        help="secondes pendant lesquelles une entrée est servie sans requête (défaut : toujours revalider)")
+    parser.add_argument("--warc", metavar="FICHIER", default=Scrapper_warc.WARC_FILE or None,
+                        help="enregistrer toutes les réponses dans une archive .warc.gz (relecture : Scrapper_replay.py)")
+    parser.add_argument("--depot-images", metavar="DOSSIER", default=Scrapper_images.STORE_DIR or None,
+                        help="images gardées une seule fois (par URL et par contenu), liens physiques dans V4_images")
+    parser.add_argument("--dataset", metavar="CHEMIN", default=Scrapper_dataset.DATASET_PATH or None,
+                        help="export typé en plus des CSV : fichier .arrow, sinon dossier Parquet par catégorie (pyarrow)")
+    parser.add_argument("--db", metavar="FICHIER", default=Scrapper_sqlite.DB_PATH or None,
+                        help="livres écrits dans une base SQLite (UPC, historique des prix) à la place des CSV")
+    parser.add_argument("--http2", choices=sorted(Scrapper_http2.MODES), default=Scrapper_http2.MODE or None,
+                        help="HTTP/2 (httpx) : 1 ou alpn = si le site le propose (sinon HTTP/1.1), h2c = HTTP/2 en clair")
+    parser.add_argument("--flux-http2", type=int, default=Scrapper_http2.MAX_STREAMS,
+                        help="requêtes en vol au plus sur la connexion HTTP/2 d'un hôte")
+    parser.add_argument("--metrics", action="store_true",
+                        help="mesurer le temps de chaque étape (metrics/async.json et metrics/async.prom)")
+    args = parser.parse_args()
+    if args.catalogue and args.listing_only and not args.details:
+        parser.error("--catalogue lit la catégorie sur la fiche produit : ajoutez --details avec --listing-only")
+    Scrapper_parsers.set_backend(args.parser)
+    if args.metrics:
+        Scrapper_metrics.enable()
+    cache = Scrapper_cache.HttpCache(args.cache, args.cache_max_mo * 1024 * 1024, args.cache_max_age) if args.cache else False
+    archive = Scrapper_warc.WarcWriter(args.warc) if args.warc else False
+    dataset = Scrapper_dataset.DatasetWriter(args.dataset) if args.dataset else False
+    store = Scrapper_sqlite.BookStore(args.db, "async") if args.db else False
+    image_store = Scrapper_images.ImageStore(args.depot_images) if args.depot_images else False
+    http2 = Scrapper_http2.HTTP2Adapter(args.flux_http2, Scrapper_http2.MODES[args.http2]) if args.http2 else False
+
+    print("🚀 Lancement du scraping concurrent du site...")
+    start = time.perf_counter()
+    total = crawl(args.concurrence, args.par_hote, pool_size=args.pool,
+                  listing_only=args.listing_only, details=args.details, incremental=args.incremental,
+                  resume=not args.recommencer, image_workers=args.images, rate=args.debit, cache=cache,
+                  archive=archive, parse_workers=args.processus, parse_queue=args.file_analyse,
+                  dataset=dataset, store=store, catalogue=args.catalogue,
+                  image_store=image_store, http2=http2)
+    print(f"\n🎉 {total} livres scrapés en {time.perf_counter() - start:.1f} s")
+    print(f"🌐 Réseau : {Scrapper_http.format_stats()}")
+    if Scrapper_metrics.ENABLED:
+        print(f"⏱️  Temps par étape :\n{Scrapper_metrics.format_summary()}")
+        print("⏱️  Mesures détaillées : {} et {}".format(*Scrapper_metrics.dump("async")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,655 @@
+import argparse                     # Lecture des options passées en ligne de commande
+import contextlib                   # Redirection de la sortie des scripts mesurés
+import email.message                # En-têtes d'une requête HTTP/2 lus comme ceux de BaseHTTPRequestHandler
+import hashlib                      # Contenu déterministe des images générées
+import http.server                  # Serveur HTTP local qui remplace books.toscrape.com
+import json                         # Résultats sauvegardés en JSON (comparables d'un run à l'autre)
+import multiprocessing              # Chaque pipeline tourne dans son propre processus (mémoire max mesurée à part)
+import os                           # Dossiers de travail et fichiers du site sauvegardé
+import platform                     # Version de Python notée dans les résultats
+import queue                        # Attente du résultat d'un pipeline (avec délai)
+import subprocess                   # Commit git courant noté dans les résultats
+import tempfile                     # Dossier de travail jetable pour chaque pipeline
+import threading                    # Le serveur tourne dans un thread
+import time                         # Mesures de temps
+from datetime import datetime       # Nom du fichier de résultats
+from html import escape             # Titres échappés dans le HTML généré
+from urllib.parse import urljoin, urlsplit  # Chemins des pages du site sauvegardé
+
+try:
+    import resource                 # Mémoire max du processus (absent sous Windows)
+except ImportError:
+    resource = None
+
+# -------------------------------
+# CONFIGURATION DE BASE
+# -------------------------------
+PIPELINES = ["phase2", "phase3", "phase4", "async", "async-processus", "async-catalogue", "async-http2"]  # Scripts mesurés
+# async-processus : Scrapper_async avec l'analyse des fiches dans un pool de processus (un par cœur)
+# async-catalogue : Scrapper_async qui lit le catalogue global (catalogue/page-N.html) au lieu de chaque catégorie
+# async-http2 : Scrapper_async dont les requêtes sont multiplexées en HTTP/2 (h2c, httpx nécessaire)
+CATEGORIES = 8                      # Site généré : nombre de catégories
+BOOKS_PER_CATEGORY = 40             # Site généré : livres par catégorie (20 par page de listing)
+IMAGE_SIZE = 16 * 1024              # Site généré : taille d'une image (octets)
+LATENCY_MS = 0                      # Latence ajoutée à chaque réponse
+ERROR_RATE = 0.0                    # Proportion de réponses 503 injectées
+SEED = 1                            # Graine du tirage des erreurs (mêmes erreurs d'un run à l'autre)
+CAPACITY = None                     # Requêtes simultanées acceptées (au-delà : 429 + Retry-After), None = illimité
+RESULTS_DIR = "bench"               # Dossier des fichiers de résultats
+PIPELINE_TIMEOUT = 1800             # Durée max d'un pipeline (s) : au-delà, son processus est arrêté
+RATINGS = ["One", "Two", "Three", "Four", "Five"]
+H2_PREFACE = b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"     # Début d'une connexion HTTP/2 en clair (h2c)
+
+
+# -------------------------------
+# Site généré (même HTML que books.toscrape.com)
+# -------------------------------
+def generate_site(categories=CATEGORIES, books_per_category=BOOKS_PER_CATEGORY, image_size=IMAGE_SIZE):
+    """
+    Construit un faux books.toscrape.com en mémoire : {chemin: octets}.
+    Le balisage reprend celui du vrai site (barre latérale, product_pod, pager, fiche produit),
+    les scripts le lisent donc exactement comme le site en ligne.
+    """
+    books = []
+    book_id = 1000
+    for c in range(categories):
+        name = f"Category {c}"
+        slug = f"category-{c}_{c + 2}"
+        for b in range(books_per_category):
+            title = f"Book {c}-{b}: a story & more"
+            book_slug = f"book-{c}-{b}_{book_id}"
+            digest = hashlib.md5(book_slug.encode()).hexdigest()
+            books.append({
+                "title": title, "slug": book_slug, "category": name, "category_slug": slug,
+                "upc": hashlib.sha1(book_slug.encode()).hexdigest()[:16],
+                "price": f"{10 + book_id % 50}.{book_id % 100:02d}",
+                "stock": book_id % 23,
+                "rating": RATINGS[book_id % 5],
+                "image": f"media/cache/{digest[:2]}/{digest[2:4]}/{digest}.jpg",
+            })
+            book_id += 1
+
+    site = {}
+    by_category = {}
+    for book in books:
+        by_category.setdefault((book["category"], book["category_slug"]), []).append(book)
+        site[f"catalogue/{book['slug']}/index.html"] = _product_page(book).encode("utf-8")
+        site[book["image"]] = (hashlib.sha256(book["image"].encode()).digest() * (image_size // 32 + 1))[:image_size]
+
+    side = "".join(f'<li>\n<a href="catalogue/category/books/{slug}/index.html">\n    {name}\n</a>\n</li>'
+                   for name, slug in by_category)
+    pods = "".join(_pod(book, "catalogue/", "") for book in books[:20])
+    site["index.html"] = (f'<html><head><title>All products | Books to Scrape</title></head><body>'
+                          f'<div class="side_categories"><ul class="nav nav-list"><li>'
+                          f'<a href="catalogue/category/books_1/index.html">Books</a><ul>{side}</ul></li></ul></div>'
+                          f'<ol class="row">{pods}</ol></body></html>').encode("utf-8")
+    for (name, slug), category_books in by_category.items():
+        pages = -(-len(category_books) // 20)
+        for page in range(1, pages + 1):
+            path = f"catalogue/category/books/{slug}/" + ("index.html" if page == 1 else f"page-{page}.html")
+            pods = "".join(_pod(book, "../../../", "../../../../") for book in category_books[(page - 1) * 20:page * 20])
+            site[path] = (f'<html><head><title>{name} | Books to Scrape</title></head><body>'
+                          f'<ol class="row">{pods}</ol>{_pager(page, pages)}</body></html>').encode("utf-8")
+    # Catalogue global : tous les livres, 20 par page (catalogue/page-1.html ... page-N.html)
+    pages = -(-len(books) // 20)
+    for page in range(1, pages + 1):
+        pods = "".join(_pod(book, "", "../") for book in books[(page - 1) * 20:page * 20])
+        site[f"catalogue/page-{page}.html"] = (f'<html><head><title>All products | Books to Scrape</title></head>'
+                                               f'<body><ol class="row">{pods}</ol>{_pager(page, pages)}</body></html>'
+                                               ).encode("utf-8")
+    return site
+
+def _availability(book):
+    return f"In stock ({book['stock']} available)" if book["stock"] else "Out of stock"
+
+def _pod(book, link_prefix, image_prefix):
+    """Un livre sur une page de listing."""
+    title = escape(book["title"])
+    return (f'<li class="col-xs-6"><article class="product_pod">'
+            f'<div class="image_container"><a href="{link_prefix}{book["slug"]}/index.html">'
+            f'<img src="{image_prefix}{book["image"]}" alt="{title}" class="thumbnail"></a></div>'
+            f'<p class="star-rating {book["rating"]}"><i class="icon-star"></i></p>'
+            f'<h3><a href="{link_prefix}{book["slug"]}/index.html" title="{title}">{title[:20]}...</a></h3>'
+            f'<div class="product_price"><p class="price_color">£{book["price"]}</p>'
+            f'<p class="instock availability"><i class="icon-ok"></i>\n    '
+            f'{"In stock" if book["stock"] else "Out of stock"}\n</p></div></article></li>')
+
+def _pager(page, pages):
+    if pages == 1:
+        return ""
+    pager = f'<ul class="pager"><li class="current">\n    Page {page} of {pages}\n</li>'
+    if page < pages:
+        pager += f'<li class="next"><a href="page-{page + 1}.html">next</a></li>'
+    return pager + "</ul>"
+
+def _product_page(book):
+    title = escape(book["title"])
+    return f'''<html><head><title>{title} | Books to Scrape</title></head><body>
+<ul class="breadcrumb"><li><a href="../../index.html">Home</a></li><li><a href="../category/books_1/index.html">Books</a></li>
+<li><a href="../category/books/{book["category_slug"]}/index.html">{book["category"]}</a></li><li class="active">{title}</li></ul>
+<article class="product_page"><div class="row"><div class="col-sm-6"><div id="product_gallery" class="carousel">
+<div class="thumbnail"><div class="carousel-inner"><div class="item active"><img src="../../{book["image"]}" alt="{title}" /></div></div></div></div></div>
+<div class="col-sm-6 product_main"><h1>{title}</h1><p class="price_color">£{book["price"]}</p>
+<p class="instock availability"><i class="icon-ok"></i> {_availability(book)}</p>
+<p class="star-rating {book["rating"]}"><i class="icon-star"></i></p></div></div>
+<div id="product_description" class="sub-header"><h2>Product Description</h2></div>
+<p>Description of {title}. Une histoire à lire — vraiment.</p>
+<div class="sub-header"><h2>Product Information</h2></div>
+<table class="table table-striped">
+<tr><th>UPC</th><td>{book["upc"]}</td></tr><tr><th>Product Type</th><td>Books</td></tr>
+<tr><th>Price (excl. tax)</th><td>£{book["price"]}</td></tr><tr><th>Price (incl. tax)</th><td>£{book["price"]}</td></tr>
+<tr><th>Tax</th><td>£0.00</td></tr><tr><th>Availability</th><td>{_availability(book)}</td></tr>
+<tr><th>Number of reviews</th><td>0</td></tr></table></article></body></html>'''
+
+
+# -------------------------------
+# Site sauvegardé (copie locale du vrai site)
+# -------------------------------
+class SavedSite:
+    """Pages et images enregistrées par mirror() dans un dossier (un fichier par chemin d'URL)."""
+
+    def __init__(self, folder):
+        self.folder = folder
+
+    def get(self, path):
+        file = os.path.join(self.folder, *path.split("/"))
+        if not os.path.isfile(file):
+            return None
+        with open(file, "rb") as f:
+            return f.read()
+
+    def __len__(self):
+        return sum(len(files) for _, _, files in os.walk(self.folder))
+
+def mirror(folder, base_url="https://books.toscrape.com/", max_categories=None):
+    """
+    Télécharge le vrai site (accueil, pages de catégorie, fiches produit, images) dans folder.
+    À lancer une fois avec une connexion : le benchmark peut ensuite tourner hors ligne avec --site folder.
+    """
+    import Scrapper_http
+    from bs4 import BeautifulSoup
+
+    def save(url):
+        response = Scrapper_http.get(url)
+        response.raise_for_status()
+        path = urlsplit(url).path.lstrip("/") or "index.html"
+        file = os.path.join(folder, *path.split("/"))
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        with open(file, "wb") as f:
+            f.write(response.content)
+        return BeautifulSoup(response.content, "html.parser") if path.endswith(".html") else None
+
+    homepage = save(base_url)
+    categories = [urljoin(base_url, a["href"]) for a in homepage.select("div.side_categories ul li ul li a")]
+    for category_url in categories[:max_categories]:
+        page_url = category_url
+        while page_url:
+            print(f"[INFO] Sauvegarde de {page_url}")
+            soup = save(page_url)
+            for a in soup.select("h3 a"):
+                book_url = urljoin(page_url, a["href"])
+                book = save(book_url)
+                save(urljoin(book_url, book.find("div", class_="item active").img["src"]))
+            next_button = soup.find("li", class_="next")
+            page_url = urljoin(page_url, next_button.a["href"]) if next_button else None
+    # Catalogue global (pipeline async-catalogue) : seulement les pages de listing, les fiches sont déjà là
+    page_url = urljoin(base_url, "catalogue/page-1.html")
+    while page_url:
+        print(f"[INFO] Sauvegarde de {page_url}")
+        soup = save(page_url)
+        next_button = soup.find("li", class_="next")
+        page_url = urljoin(page_url, next_button.a["href"]) if next_button else None
+
+
+# -------------------------------
+# Serveur local
+# -------------------------------
+class StandInServer:
+    """
+    Sert un site (généré ou sauvegardé) sur 127.0.0.1, en keep-alive comme le vrai site.
+    latency_ms est ajoutée à chaque réponse, error_rate est la proportion de réponses 503.
+    Le tirage d'une erreur dépend seulement de (graine, chemin, n° de la demande de ce chemin) :
+    les mêmes requêtes échouent d'un run à l'autre, quel que soit l'ordre des requêtes.
+    capacity simule un site qui sature : au-delà de capacity requêtes simultanées, il répond 429 + Retry-After.
+    Chaque réponse porte un ETag; une requête If-None-Match au même ETag reçoit 304 sans corps (cache HTTP).
+    Une connexion qui commence par la préface HTTP/2 est servie en h2c sur le même port (paquet h2) :
+    ses requêtes passent par le même handle() que celles en HTTP/1.1.
+    Compte les connexions ouvertes, pages HTML, images, octets, erreurs et 304 servis.
+    """
+
+    def __init__(self, site, latency_ms=LATENCY_MS, error_rate=ERROR_RATE, seed=SEED, capacity=CAPACITY):
+        self.site = site
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self.seed = seed
+        self.capacity = capacity
+        self._in_flight = 0
+        self._attempts = {}                 # chemin -> nombre de demandes reçues
+        self._lock = threading.Lock()
+        self.reset()
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"               # Connexions réutilisées (keep-alive)
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def handle(self):
+                server._count("connections", 0)
+                preface = self.rfile.peek(len(H2_PREFACE))[:len(H2_PREFACE)]
+                if preface and H2_PREFACE.startswith(preface):
+                    _H2Session(server, self.connection, self.rfile).serve()
+                else:
+                    super().handle()
+
+            def do_GET(self):
+                server.handle(self)
+
+        self._httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_port}/"
+
+    def handle(self, request):
+        with self._lock:
+            self._in_flight += 1
+            overloaded = self.capacity is not None and self._in_flight > self.capacity
+        try:
+            if overloaded:
+                self._count("throttled", 0)
+                request.send_response(429)
+                request.send_header("Retry-After", "1")
+                request.send_header("Content-Length", "0")
+                request.end_headers()
+                return
+            self._serve(request)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _serve(self, request):
+        if self.latency:
+            time.sleep(self.latency)
+        path = urlsplit(request.path).path.lstrip("/") or "index.html"
+        failed = self.error_rate and self._draw(path) < self.error_rate
+        body = None if failed else self.site.get(path)
+        if failed or body is None:
+            status = 503 if failed else 404
+            self._count("errors", 0)
+            request.send_response(status)
+            request.send_header("Content-Length", "0")
+            request.end_headers()
+            return
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        if request.headers.get("If-None-Match") == etag:
+            self._count("not_modified", 0)
+            request.send_response(304)
+            request.send_header("ETag", etag)
+            request.send_header("Content-Length", "0")
+            request.end_headers()
+            return
+        is_html = path.endswith(".html")
+        self._count("pages" if is_html else "images", len(body))
+        request.send_response(200)
+        request.send_header("ETag", etag)
+        # Comme books.toscrape.com : text/html sans charset
+        request.send_header("Content-Type", "text/html" if is_html else "image/jpeg")
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    def _draw(self, path):
+        """Nombre entre 0 et 1, le même pour la n-ième demande d'un chemin à chaque run."""
+        with self._lock:
+            attempt = self._attempts[path] = self._attempts.get(path, 0) + 1
+        digest = hashlib.sha1(f"{self.seed}:{path}:{attempt}".encode()).digest()
+        return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+    def _count(self, kind, size):
+        with self._lock:
+            self.counters[kind] += 1
+            self.counters["bytes"] += size
+
+    def reset(self):
+        with self._lock:
+            self.counters = {"connections": 0, "pages": 0, "images": 0, "errors": 0, "throttled": 0,
+                             "not_modified": 0, "bytes": 0}
+            self._attempts = {}
+
+    def start(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class _H2Session:
+    """
+    Connexion HTTP/2 en clair (h2c) du serveur local : chaque flux (requête) est servi dans son propre thread,
+    plusieurs requêtes sont donc en cours en même temps sur la même connexion (multiplexage).
+    """
+
+    def __init__(self, server, sock, rfile):
+        import h2.config
+        import h2.connection
+        self.server = server
+        self.sock = sock
+        self.rfile = rfile
+        self.conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False, header_encoding="utf-8"))
+        self.cond = threading.Condition()   # Protège self.conn; réveille les flux qui attendent la fenêtre d'envoi
+        self.closed = False
+
+    def serve(self):
+        import h2.events
+        import h2.exceptions
+        with self.cond:
+            self.conn.initiate_connection()
+            self.flush()
+        try:
+            while not self.closed:
+                data = self.rfile.read1(65536)
+                if not data:
+                    break
+                with self.cond:
+                    for event in self.conn.receive_data(data):
+                        if isinstance(event, h2.events.RequestReceived):
+                            request = _H2Request(self, event.stream_id, event.headers)
+                            threading.Thread(target=self.respond, args=(request,), daemon=True).start()
+                        elif isinstance(event, h2.events.ConnectionTerminated):
+                            self.closed = True
+                    self.flush()
+                    self.cond.notify_all()      # Fenêtre d'envoi peut-être agrandie (WindowUpdated, réglages)
+        except (OSError, h2.exceptions.ProtocolError):
+            pass                                # Client parti, ou trame invalide : la connexion est fermée
+        finally:
+            with self.cond:
+                self.closed = True
+                self.cond.notify_all()
+
+    def respond(self, request):
+        try:
+            self.server.handle(request)
+            request.finish()
+        except OSError:
+            pass
+
+    def flush(self):
+        """Envoie les trames en attente (appelé avec self.cond)."""
+        data = self.conn.data_to_send()
+        if data:
+            self.sock.sendall(data)
+
+    def send(self, stream_id, headers, body):
+        """Envoie une réponse, en morceaux qui respectent la fenêtre de contrôle de flux du client."""
+        import h2.exceptions
+        with self.cond:
+            try:
+                self.conn.send_headers(stream_id, headers, end_stream=not body)
+                self.flush()
+                while body and not self.closed:
+                    size = min(self.conn.local_flow_control_window(stream_id), self.conn.max_outbound_frame_size)
+                    if size <= 0:
+                        self.cond.wait(1)
+                        continue
+                    self.conn.send_data(stream_id, body[:size], end_stream=len(body) <= size)
+                    self.flush()
+                    body = body[size:]
+            except h2.exceptions.ProtocolError:
+                pass                            # Flux annulé par le client, ou connexion déjà fermée
+
+
+class _H2Request:
+    """Flux HTTP/2 présenté comme la requête de BaseHTTPRequestHandler attendue par StandInServer.handle()."""
+
+    def __init__(self, session, stream_id, headers):
+        self.session = session
+        self.stream_id = stream_id
+        self.headers = email.message.Message()
+        for name, value in headers:
+            if name == ":path":
+                self.path = value
+            elif not name.startswith(":"):
+                self.headers[name] = value
+        self.wfile = self
+        self._response = []
+        self._body = []
+
+    def send_response(self, status):
+        self._response = [(":status", str(status))]
+
+    def send_header(self, name, value):
+        self._response.append((name.lower(), value))
+
+    def end_headers(self):
+        pass
+
+    def write(self, data):
+        self._body.append(data)
+
+    def finish(self):
+        self.session.send(self.stream_id, self._response, b"".join(self._body))
+
+
+# -------------------------------
+# Exécution d'un pipeline (dans un processus séparé)
+# -------------------------------
+class ParseTimer:
+    """Enveloppe une fonction d'analyse HTML pour cumuler son temps d'exécution (les threads peuvent l'appeler)."""
+
+    def __init__(self, func):
+        self.func = func
+        self.calls = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.calls += 1
+                self.seconds += elapsed
+
+def peak_rss_mb():
+    """Mémoire max du processus en Mo (None si le module resource est absent)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if platform.system() == "Darwin" else 1024), 1)   # octets sous macOS, Ko ailleurs
+
+def run_pipeline(name, site_url, category_url, workdir, results):
+    """Lance un pipeline contre le serveur local, depuis workdir, et envoie ses mesures dans la queue results."""
+    import Scrapper_phase2, Scrapper_phase3, Scrapper_phase4, Scrapper_async, Scrapper_parsepool, Scrapper_http2
+
+    Scrapper_phase2.BASE_URL = category_url
+    Scrapper_phase3.BASE_SITE = site_url
+    Scrapper_phase4.BASE_URL = site_url
+
+    # Temps d'analyse HTML : on chronomètre les appels de parsing de chaque script
+    timers = []
+    for module, attribute in [(Scrapper_phase2, "BeautifulSoup"), (Scrapper_phase3, "BeautifulSoup"),
+                              (Scrapper_phase4, "BeautifulSoup"), (Scrapper_phase4, "parse_book_page"),
+                              (Scrapper_async, "BeautifulSoup")]:
+        timer = ParseTimer(getattr(module, attribute))
+        setattr(module, attribute, timer)
+        timers.append(timer)
+
+    run = {
+        "phase2": Scrapper_phase2.main,
+        "phase3": lambda: Scrapper_phase3.main(resume=False),
+        "phase4": lambda: Scrapper_phase4.main(resume=False),
+        "async": lambda: Scrapper_async.crawl(base_url=site_url, resume=False),
+        "async-processus": lambda: Scrapper_async.crawl(base_url=site_url, resume=False,
+                                                        parse_workers=Scrapper_parsepool.WORKERS),
+        "async-catalogue": lambda: Scrapper_async.crawl(base_url=site_url, resume=False, catalogue=True),
+        "async-http2": lambda: Scrapper_async.crawl(base_url=site_url, resume=False,
+                                                    http2=Scrapper_http2.HTTP2Adapter(prior_knowledge=True)),
+    }[name]
+
+    os.chdir(workdir)
+    error = None
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        try:
+            run()
+        except Exception as e:          # Erreur injectée non rattrapée par le script : on garde les mesures
+            error = f"{type(e).__name__}: {e}"
+    wall = time.perf_counter() - start
+    parse_calls = sum(timer.calls for timer in timers)
+    parse_seconds = sum(timer.seconds for timer in timers)
+    results.put({
+        "wall_seconds": round(wall, 3),
+        "parse_calls": parse_calls,
+        "parse_ms_per_page": round(parse_seconds * 1000 / parse_calls, 3) if parse_calls else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "error": error,
+    })
+
+def wait_result(process, results, timeout):
+    """
+    Mesures envoyées par le processus du pipeline, ou None s'il s'est arrêté sans les envoyer
+    (erreur d'import, mémoire, plantage d'une extension C) ou s'il dépasse timeout secondes.
+    """
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            return results.get(timeout=1)
+        except queue.Empty:
+            if not process.is_alive():
+                try:
+                    return results.get(timeout=1)       # Envoyées juste avant la fin du processus
+                except queue.Empty:
+                    return None
+    return None
+
+def measure(name, server, category_url, timeout=PIPELINE_TIMEOUT):
+    """
+    Mesure un pipeline : processus neuf, dossier de travail vide, compteurs du serveur remis à zéro.
+    Un pipeline dont le processus meurt (ou dépasse timeout secondes) est noté en erreur, sans bloquer les suivants.
+    """
+    server.reset()
+    results = multiprocessing.get_context("spawn").Queue()
+    with tempfile.TemporaryDirectory(prefix=f"bench_{name}_") as workdir:
+        process = multiprocessing.get_context("spawn").Process(
+            target=run_pipeline, args=(name, server.url, category_url, workdir, results))
+        start = time.perf_counter()
+        process.start()
+        result = wait_result(process, results, timeout)
+        if result is None and process.is_alive():
+            process.terminate()             # Délai dépassé
+        process.join()
+        if result is None:
+            result = {"wall_seconds": round(time.perf_counter() - start, 3), "parse_calls": 0,
+                      "parse_ms_per_page": None, "peak_rss_mb": None, "error": f"exit code {process.exitcode}"}
+    served = dict(server.counters)
+    result.update({
+        "connections": served["connections"],
+        "pages": served["pages"],
+        "images": served["images"],
+        "errors": served["errors"],
+        "throttled": served["throttled"],
+        "not_modified": served["not_modified"],
+        "bytes": served["bytes"],
+        "pages_per_second": round(served["pages"] / result["wall_seconds"], 1) if result["wall_seconds"] else None,
+    })
+    return result
+
+
+# -------------------------------
+# Résultats
+# -------------------------------
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(previous, current):
+    """Tableau pages/s et ms d'analyse par page : run précédent -> run courant."""
+    lines = []
+    for name, result in current["results"].items():
+        before = previous["results"].get(name)
+        if not before or not before["pages_per_second"] or not result["pages_per_second"]:
+            continue
+        ratio = result["pages_per_second"] / before["pages_per_second"]
+        lines.append(f"{name:8} {before['pages_per_second']:>8} -> {result['pages_per_second']:>8} pages/s "
+                     f"(x{ratio:.2f}), analyse {before['parse_ms_per_page']} -> {result['parse_ms_per_page']} ms/page")
+    return "\n".join(lines)
+
+
+# -------------------------------
+# Programme principal
+# -------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hors ligne des scripts contre un books.toscrape.com local")
+    parser.add_argument("--pipelines", nargs="+", default=PIPELINES, choices=PIPELINES, help="scripts à mesurer")
+    parser.add_argument("--site", help="dossier d'un site sauvegardé avec --sauvegarder (défaut : site généré)")
+    parser.add_argument("--categories", type=int, default=CATEGORIES, help="site généré : nombre de catégories")
+    parser.add_argument("--livres", type=int, default=BOOKS_PER_CATEGORY, help="site généré : livres par catégorie")
+    parser.add_argument("--latence", type=float, default=LATENCY_MS, help="latence ajoutée à chaque réponse (ms)")
+    parser.add_argument("--erreurs", type=float, default=ERROR_RATE, help="proportion de réponses 503 (0 à 1)")
+    parser.add_argument("--capacite", type=int, default=CAPACITY,
+                        help="requêtes simultanées acceptées par le site (au-delà : 429 + Retry-After)")
+    parser.add_argument("--graine", type=int, default=SEED, help="graine du tirage des erreurs")
+    parser.add_argument("--delai", type=float, default=PIPELINE_TIMEOUT,
+                        help="durée max d'un pipeline (s) : au-delà, il est arrêté et noté en erreur")
+    parser.add_argument("--sortie", help="fichier JSON des résultats (défaut : bench/bench_<date>.json)")
+    parser.add_argument("--comparer", help="fichier JSON d'un run précédent à comparer")
+    parser.add_argument("--sauvegarder", metavar="DOSSIER",
+                        help="télécharger le vrai site dans DOSSIER (connexion nécessaire) puis quitter")
+    args = parser.parse_args()
+
+    if args.sauvegarder:
+        mirror(args.sauvegarder)
+        return
+
+    site = SavedSite(args.site) if args.site else generate_site(args.categories, args.livres)
+    server = StandInServer(site, args.latence, args.erreurs, args.graine, args.capacite).start()
+    print(f"[INFO] Site local : {server.url} ({len(site)} fichiers, {args.site or 'généré'})")
+
+    # Phase 2 scrape une seule catégorie : la première de la barre latérale
+    from bs4 import BeautifulSoup
+    homepage = BeautifulSoup(site.get("index.html"), "html.parser")
+    category_url = urljoin(server.url, homepage.select_one("div.side_categories ul li ul li a")["href"])
+    category_url = category_url.rsplit("/", 1)[0] + "/"
+
+    report = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "config": {"site": args.site or "generated", "files": len(site), "latency_ms": args.latence,
+                   "error_rate": args.erreurs, "seed": args.graine, "capacity": args.capacite},
+        "results": {},
+    }
+    import Scrapper_http2
+    for name in args.pipelines:
+        if name == "async-http2" and not Scrapper_http2.is_available():
+            print(f'[INFO] {name} ignoré : pip install "httpx[http2]" pour le transport HTTP/2')
+            continue
+        print(f"[INFO] Mesure de {name}...")
+        result = measure(name, server, category_url, args.delai)
+        report["results"][name] = result
+        status = f" ⚠️ {result['error']}" if result["error"] else ""
+        print(f"   └── {result['pages']} pages en {result['wall_seconds']} s : {result['pages_per_second']} pages/s, "
+              f"{result['connections']} connexions, analyse {result['parse_ms_per_page']} ms/page, mémoire max {result['peak_rss_mb']} Mo{status}")
+    server.stop()
+
+    output = args.sortie or os.path.join(RESULTS_DIR, f"bench_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"[✅] Résultats sauvegardés dans {output}")
+
+    if args.comparer:
+        with open(args.comparer, encoding="utf-8") as f:
+            print(compare(json.load(f), report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import collections                  # Index LRU (ordre d'utilisation des entrées)
+import datetime                     # Durée nulle des réponses servies depuis le disque
+import hashlib                      # Nom de fichier d'une URL
+import json                         # Métadonnées d'une entrée (en-têtes, date)
+import os                           # Fichiers du cache
+import threading                    # Le cache est partagé entre les threads du transport
+import time                         # Âge des entrées
+import zlib                         # Corps compressés sur le disque
+
+import requests                     # Réponse reconstruite depuis le disque
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# -------------------------------
+# CONFIGURATION DE BASE
+# -------------------------------
+CACHE_DIR = os.environ.get("SCRAPPER_CACHE", "")    # Dossier du cache ("" = pas de cache)
+MAX_BYTES = 500 * 1024 * 1024       # Taille maximum du cache sur le disque (500 Mo), au-delà : LRU
+# Secondes pendant lesquelles une entrée est servie sans revalidation (None = toujours revalider)
+MAX_AGE = float(os.environ["SCRAPPER_CACHE_MAX_AGE"]) if os.environ.get("SCRAPPER_CACHE_MAX_AGE") else None
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")   # En-têtes gardés avec le corps
+
+
+def from_env():
+    """Cache configuré par les variables d'environnement SCRAPPER_CACHE (dossier) et SCRAPPER_CACHE_MAX_AGE (s)."""
+    return HttpCache(CACHE_DIR) if CACHE_DIR else None
+
+
+# -------------------------------
+# Cache HTTP sur disque
+# -------------------------------
+class HttpCache:
+    """
+    Cache des réponses 200 par URL, sous le transport HTTP (pages et images).
+    Chaque entrée = <clé>.json (URL, en-têtes, date) + <clé>.body (corps compressé avec zlib s'il y gagne).
+    Une entrée est revalidée avec If-None-Match / If-Modified-Since : une réponse 304 est servie depuis le disque,
+    seul un contenu modifié est re-téléchargé. max_age : entrées servies sans revalidation pendant max_age secondes.
+    Au-delà de max_bytes, les entrées les moins récemment utilisées sont supprimées.
+    """
+
+    def __init__(self, folder, max_bytes=MAX_BYTES, max_age=MAX_AGE):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._index = collections.OrderedDict()     # clé -> octets sur le disque, du moins au plus récemment utilisé
+        self.size = 0
+        self.hits = 0                       # Servies sans requête (max_age)
+        self.revalidated = 0                # 304 : servies depuis le disque après revalidation
+        self.misses = 0                     # Absentes ou modifiées : téléchargées
+        self.saved_bytes = 0                # Octets de corps non re-téléchargés
+        os.makedirs(folder, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """Relit les entrées présentes, dans l'ordre de leur dernière utilisation (date de modification du .json)."""
+        entries = []
+        for name in os.listdir(self.folder):
+            if name.endswith(".part"):
+                os.remove(os.path.join(self.folder, name))     # Écriture interrompue par un arrêt
+            elif name.endswith(".json"):
+                key = name[:-5]
+                try:
+                    used = os.path.getmtime(self._path(key, "json"))
+                    size = os.path.getsize(self._path(key, "json")) + os.path.getsize(self._path(key, "body"))
+                except OSError:
+                    continue                # Entrée incomplète (arrêt pendant l'écriture)
+                entries.append((used, key, size))
+        for used, key, size in sorted(entries):
+            self._index[key] = size
+            self.size += size
+
+    @staticmethod
+    def key(url):
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _path(self, key, kind):
+        return os.path.join(self.folder, f"{key}.{kind}")
+
+    def _tmp_path(self, key, kind):
+        # Une même URL peut être enregistrée par deux threads (image partagée) : un fichier temporaire chacun
+        return f"{self._path(key, kind)}.{os.getpid()}-{threading.get_ident()}.part"
+
+    # ------------------ Lecture ------------------
+    def lookup(self, url):
+        """Métadonnées de l'entrée de l'URL (dict) ou None."""
+        key = self.key(url)
+        with self._lock:
+            if key not in self._index:
+                return None
+        try:
+            with open(self._path(key, "json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, entry):
+        """Entrée assez récente pour être servie sans revalidation (max_age)."""
+        return self.max_age is not None and time.time() - entry["stored"] < self.max_age
+
+    def conditional_headers(self, entry):
+        """En-têtes de revalidation de l'entrée (vide si le site n'a donné ni ETag ni Last-Modified)."""
+        headers = {}
+        if entry["headers"].get("ETag"):
+            headers["If-None-Match"] = entry["headers"]["ETag"]
+        if entry["headers"].get("Last-Modified"):
+            headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+        return headers
+
+    def response(self, url, entry, revalidated=False, not_modified=None):
+        """
+        Réponse requests reconstruite depuis le disque (même .text que la réponse d'origine).
+        not_modified : réponse 304 du site (ses nouveaux ETag / Last-Modified sont enregistrés).
+        """
+        key = self.key(url)
+        try:
+            with open(self._path(key, "body"), "rb") as f:
+                body = f.read()
+        except OSError:
+            return None
+        body = zlib.decompress(body) if entry.get("compressed") else body
+        if not_modified is not None:
+            for name in ("ETag", "Last-Modified"):
+                if not_modified.headers.get(name):
+                    entry["headers"][name] = not_modified.headers[name]
+            entry["stored"] = time.time()
+            self._write_meta(key, entry)
+        else:
+            os.utime(self._path(key, "json"))       # Dernière utilisation (ordre LRU après redémarrage)
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+            if revalidated:
+                self.revalidated += 1
+            else:
+                self.hits += 1
+            self.saved_bytes += len(body)
+
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.url = url
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)    # Comme requests : text/html sans charset => latin-1
+        response._content = body
+        response._content_consumed = True
+        response.elapsed = datetime.timedelta(0)
+        response.from_cache = True
+        return response
+
+    # ------------------ Écriture ------------------
+    def store(self, url, response):
+        """Enregistre une réponse 200 (corps déjà lu)."""
+        with self._lock:
+            self.misses += 1
+        if response.status_code != 200:
+            return
+        key = self.key(url)
+        body = response.content
+        packed = zlib.compress(body, 6)
+        compressed = len(packed) < len(body)        # Les images JPEG ne gagnent rien : gardées telles quelles
+        entry = {
+            "url": url,
+            "stored": time.time(),
+            "compressed": compressed,
+            "headers": {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers},
+        }
+        tmp_path = self._tmp_path(key, "body")
+        with open(tmp_path, "wb") as f:
+            f.write(packed if compressed else body)
+        os.replace(tmp_path, self._path(key, "body"))
+        self._write_meta(key, entry)
+        size = os.path.getsize(self._path(key, "body")) + os.path.getsize(self._path(key, "json"))
+        with self._lock:
+            self.size += size - self._index.pop(key, 0)
+            self._index[key] = size
+            self._evict()
+
+    def _write_meta(self, key, entry):
+        tmp_path = self._tmp_path(key, "json")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, self._path(key, "json"))
+
+    def _evict(self):
+        """Supprime les entrées les moins récemment utilisées jusqu'à repasser sous max_bytes (verrou pris)."""
+        while self.size > self.max_bytes and len(self._index) > 1:
+            key, size = self._index.popitem(last=False)
+            self.size -= size
+            for kind in ("json", "body"):
+                try:
+                    os.remove(self._path(key, kind))
+                except OSError:
+                    pass
+
+    # ------------------ Statistiques ------------------
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._index),
+                "size": self.size,
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+                "saved_bytes": self.saved_bytes,
+            }
+
+    def format_stats(self):
+        s = self.stats()
+        return (f"{s['hits']} servies sans requête, {s['revalidated']} revalidées (304), {s['misses']} téléchargées, "
+                f"{s['saved_bytes'] / 1024:.0f} Ko économisés; {s['entries']} entrées, {s['size'] / 1024 / 1024:.1f} Mo")
@@ -0,0 +1,217 @@
+import os                           # Dossiers du jeu de données Parquet
+import sys                          # Arguments de la ligne de commande
+import threading                    # Les catégories du crawl asynchrone écrivent en même temps
+from urllib.parse import quote      # Nom de catégorie dans un nom de dossier (category=Science%20Fiction)
+
+from Scrapper_record import Book    # Livres typés (prix en pence, stock en entier)
+
+# -------------------------------
+# CONFIGURATION DE BASE
+# -------------------------------
+DATASET_PATH = os.environ.get("SCRAPPER_DATASET", "")   # Export colonnes ("" = CSV seulement)
+BATCH_SIZE = 1000                   # Livres gardés en mémoire avant d'écrire un lot
+PRICE_PRECISION = 10                # decimal128(10, 2) : jusqu'à 99 999 999.99
+DICTIONARY_COLUMNS = ("currency", "product_description", "category")    # Colonnes encodées en dictionnaire
+
+
+def _pyarrow():
+    """Import de pyarrow (dépendance optionnelle : pip install pyarrow)."""
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("L'export Parquet / Arrow demande pyarrow : pip install pyarrow") from None
+    return pyarrow
+
+def schema():
+    """Colonnes de l'export : mêmes noms que le CSV, plus "currency" (symbole des prix, qui sont des décimaux)."""
+    pa = _pyarrow()
+    price = pa.decimal128(PRICE_PRECISION, 2)
+    return pa.schema([
+        ("product_page_url", pa.string()),
+        ("universal_product_code (upc)", pa.string()),
+        ("title", pa.string()),
+        ("price_including_tax", price),
+        ("price_excluding_tax", price),
+        ("currency", pa.dictionary(pa.int32(), pa.string())),
+        ("number_available", pa.int32()),
+        ("product_description", pa.dictionary(pa.int32(), pa.string())),
+        ("category", pa.dictionary(pa.int32(), pa.string())),
+        ("review_rating", pa.int8()),
+        ("image_url", pa.string()),
+    ])
+
+def is_arrow_file(path):
+    """Un seul fichier Arrow IPC (.arrow / .feather), sinon un dossier Parquet partitionné par catégorie."""
+    return path.endswith((".arrow", ".feather"))
+
+def from_env():
+    """Export configuré par la variable d'environnement SCRAPPER_DATASET (chemin .arrow ou dossier Parquet)."""
+    return DatasetWriter(DATASET_PATH) if DATASET_PATH else None
+
+
+# -------------------------------
+# Écriture par lots
+# -------------------------------
+class DatasetWriter:
+    """
+    Export typé et en colonnes de tous les livres, à côté des CSV :
+    - path en .arrow / .feather : un seul fichier Arrow IPC (lu ensuite en mémoire mappée, sans copie);
+    - sinon : dossier Parquet partitionné par catégorie (<path>/category=<nom>/part-0.parquet).
+    Prix en décimaux, stock et note en entiers, catégorie et description encodées en dictionnaire.
+    Les livres arrivent un par un (add) et sont écrits par lots de batch_size; close() écrit le dernier lot.
+    """
+
+    def __init__(self, path, batch_size=BATCH_SIZE):
+        self.pa = _pyarrow()
+        self.path = path
+        self.batch_size = batch_size
+        self.schema = schema()
+        self.count = 0
+        self._rows = []
+        self._lock = threading.Lock()
+        # Dictionnaires communs à tous les lots : chaque lot ne fait qu'ajouter des valeurs (deltas Arrow IPC)
+        self._dictionaries = {column: {} for column in DICTIONARY_COLUMNS}
+        if is_arrow_file(path):
+            folder = os.path.dirname(path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            options = self.pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+            self._file_writer = self.pa.ipc.new_file(path, self.schema, options=options)
+        else:
+            os.makedirs(path, exist_ok=True)
+            self._file_writer = None
+            self._parquet_writers = {}      # catégorie -> ParquetWriter
+
+    def add(self, record):
+        """Ajoute un livre (Book ou dictionnaire aux colonnes du CSV); écrit un lot quand il est plein."""
+        book = record if isinstance(record, Book) else Book.from_row(record)
+        with self._lock:
+            self._rows.append(book)
+            if len(self._rows) >= self.batch_size:
+                self._flush()
+
+    def _flush(self):
+        """Écrit les livres en attente (verrou pris)."""
+        if not self._rows:
+            return
+        rows, self._rows = self._rows, []
+        self.count += len(rows)
+        if self._file_writer is not None:
+            self._file_writer.write_batch(self._batch(rows))
+            return
+        by_category = {}
+        for book in rows:
+            by_category.setdefault(book.category, []).append(book)
+        for category, books in by_category.items():
+            table = self.pa.Table.from_batches([self._batch(books)])
+            table = table.remove_column(table.schema.get_field_index("category"))     # Déjà dans le nom du dossier
+            self._parquet_writer(category, table.schema).write_table(table)
+
+    def _parquet_writer(self, category, table_schema):
+        writer = self._parquet_writers.get(category)
+        if writer is None:
+            import pyarrow.parquet as pq
+            folder = os.path.join(self.path, "category=" + quote(category or "", safe=""))
+            os.makedirs(folder, exist_ok=True)
+            writer = self._parquet_writers[category] = pq.ParquetWriter(os.path.join(folder, "part-0.parquet"),
+                                                                        table_schema)
+        return writer
+
+    def _batch(self, books):
+        """RecordBatch des livres, dans le schéma de l'export."""
+        pa = self.pa
+        columns = {
+            "product_page_url": [book.url for book in books],
+            "universal_product_code (upc)": [book.upc or None for book in books],
+            "title": [book.title for book in books],
+            "price_including_tax": [_decimal(book.price_incl) for book in books],
+            "price_excluding_tax": [_decimal(book.price_excl) for book in books],
+            "currency": [book.currency for book in books],
+            "number_available": [book.available for book in books],
+            "product_description": [book.description for book in books],
+            "category": [book.category for book in books],
+            "review_rating": [book.rating for book in books],
+            "image_url": [book.image_url for book in books],
+        }
+        arrays = []
+        for field in self.schema:
+            if field.name in DICTIONARY_COLUMNS:
+                arrays.append(self._dictionary_array(field, columns[field.name]))
+            else:
+                arrays.append(pa.array(columns[field.name], type=field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+    def _dictionary_array(self, field, values):
+        """
+        Colonne encodée en dictionnaire. Fichier Arrow : dictionnaire commun à tous les lots, complété par les
+        nouvelles valeurs (le format fichier n'accepte que des ajouts). Parquet : dictionnaire propre au lot.
+        """
+        pa = self.pa
+        if self._file_writer is None:
+            return pa.array(values, type=field.type.value_type).dictionary_encode()
+        dictionary = self._dictionaries[field.name]
+        indices = [None if value is None else dictionary.setdefault(value, len(dictionary)) for value in values]
+        return pa.DictionaryArray.from_arrays(pa.array(indices, type=field.type.index_type),
+                                              pa.array(list(dictionary), type=field.type.value_type))
+
+    def close(self):
+        """Écrit le dernier lot et ferme les fichiers."""
+        with self._lock:
+            self._flush()
+            if self._file_writer is not None:
+                self._file_writer.close()
+            else:
+                for writer in self._parquet_writers.values():
+                    writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _decimal(pence):
+    """Pence => Decimal (None si le prix est inconnu ou illisible)."""
+    return Book.pounds(pence) if isinstance(pence, int) else None
+
+
+# -------------------------------
+# Lecture et requêtes
+# -------------------------------
+def load(path):
+    """
+    Table pyarrow de tout le catalogue. Le fichier Arrow est lu en mémoire mappée (aucune copie);
+    le dossier Parquet est lu comme un jeu de données partitionné (colonne category reconstituée).
+    """
+    pa = _pyarrow()
+    if is_arrow_file(path):
+        with pa.memory_map(path) as source:
+            return pa.ipc.open_file(source).read_all()
+    import pyarrow.dataset as ds
+    partitioning = ds.HivePartitioning.discover(infer_dictionary=True)
+    return ds.dataset(path, format="parquet", partitioning=partitioning).to_table()
+
+def summary(table):
+    """Par catégorie : nombre de livres, prix TTC moyen, stock total (calcul en colonnes, sans boucle Python)."""
+    pa = _pyarrow()
+    prices = table["price_including_tax"].cast(pa.float64())
+    table = pa.table({"category": table["category"].cast(pa.string()), "price": prices,
+                      "stock": table["number_available"]})
+    return (table.group_by("category")
+                 .aggregate([("price", "count"), ("price", "mean"), ("stock", "sum")])
+                 .sort_by("category"))
+
+def main():
+    """python Scrapper_dataset.py catalogue.arrow : résumé du catalogue exporté."""
+    if len(sys.argv) != 2:
+        print("Usage : python Scrapper_dataset.py <catalogue.arrow | dossier parquet>")
+        return
+    table = load(sys.argv[1])
+    print(f"📊 {table.num_rows} livres, {table.nbytes / 1024:.0f} Ko en mémoire")
+    for row in summary(table).to_pylist():
+        print(f"   {row['category']:30} {row['price_count']:5} livres, prix moyen {row['price_mean']:7.2f}, "
+              f"stock {row['stock_sum']}")
+
+
+if __name__ == "__main__":
+    main()
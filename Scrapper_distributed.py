@@ -0,0 +1,264 @@
+import argparse                     # Lecture des options passées en ligne de commande
+import multiprocessing              # Workers locaux (commande run)
+import os                           # Chemins des images et des fichiers de sortie
+import shutil                       # Copie des images écrites par des workers dans un autre dossier
+import socket                       # Nom de la machine dans l'identifiant du worker
+import time                         # Pause quand toutes les tâches restantes sont en cours ailleurs
+
+import requests                     # Types d'erreurs réseau (une URL en échec n'arrête pas le worker)
+
+import Scrapper_phase4 as phase4    # Lecture des pages, extraction des fiches et écriture CSV de la phase 4
+import Scrapper_images              # Téléchargement des images (streaming, fichier .part puis renommage)
+import Scrapper_retry               # URLs en échec (dead letters), au même format que la phase 4
+import Scrapper_dataset             # Export Parquet / Arrow en plus des CSV (variable d'environnement SCRAPPER_DATASET)
+import Scrapper_sqlite              # Base SQLite à la place des CSV (variable d'environnement SCRAPPER_DB)
+from Scrapper_record import Book, as_dict   # Livres stockés en JSON dans la file
+from Scrapper_workqueue import WorkQueue    # File de tâches partagée avec baux
+
+# -------------------------------
+# CONFIGURATION DE BASE
+# -------------------------------
+QUEUE_FILE = "crawl_queue_V4.db"    # File partagée (SQLite, mode WAL) : sur un disque local, jamais sur NFS / SMB
+IMAGES_DIR = "V4_images"            # Même dossier d'images que la phase 4
+WORKERS = 4                         # Workers lancés par la commande run
+IDLE_WAIT = 0.2                     # Pause (s) quand il ne reste que des tâches en cours chez d'autres workers
+PRIORITY = {"listing": 0, "book": 1, "image": 2}    # Les listings d'abord : ils font découvrir le reste du travail
+
+
+def task(kind, url, **payload):
+    """Tâche (kind, clé, payload, priorité) pour WorkQueue.put; une image est identifiée par son fichier."""
+    payload["url"] = url
+    return kind, f"{kind}:{payload.get('path', url)}", payload, PRIORITY[kind]
+
+
+# -------------------------------
+# Coordinateur : catégories => file de tâches
+# -------------------------------
+def init(queue, base_url=None):
+    """Lit la page d'accueil et met dans la file une tâche "listing" par catégorie (première page)."""
+    base_url = base_url or phase4.BASE_URL
+    categories = phase4.list_categories(phase4.get_soup(base_url), base_url)
+    queue.set_meta("base_url", base_url)
+    queue.set_meta("categories", categories)
+    queue.put([task("listing", url, category=name, category_index=index, page=1)
+               for index, (name, url) in enumerate(categories)])
+    print(f"[INFO] {len(categories)} catégories ajoutées à la file {queue.path}")
+
+
+# -------------------------------
+# Worker : une tâche à la fois
+# -------------------------------
+def do_listing(payload, output):
+    """
+    Page de catégorie => une tâche "book" par livre, et les pages suivantes de la catégorie.
+    Une fiche n'est qu'une tâche (clé book:<url>), même listée dans plusieurs catégories : le résultat garde
+    les URLs de la page, pour que la fusion écrive le livre dans chaque catégorie qui le liste.
+    """
+    url, category, page = payload["url"], payload["category"], payload["page"]
+    soup = phase4.get_soup(url)
+    records, next_url = phase4.listing_page(soup, url, category)
+    children = [task("book", record["product_page_url"], category=category,
+                     order=[payload["category_index"], page, position])
+                for position, record in enumerate(records)]
+    pages = phase4.page_count(soup) if page == 1 else None
+    if pages:
+        # "Page 1 of N" : les pages 2 à N sont mises dans la file tout de suite (elles partent en parallèle)
+        children += [task("listing", page_url, category=category, category_index=payload["category_index"],
+                          page=number)
+                     for number, page_url in enumerate(phase4.page_urls(url, pages), start=2)]
+    elif next_url:
+        children.append(task("listing", next_url, category=category, category_index=payload["category_index"],
+                             page=page + 1))
+    return {"books": len(records), "urls": [record["product_page_url"] for record in records]}, children
+
+def do_book(payload, output):
+    """Fiche produit => le livre (résultat) et une tâche "image"."""
+    book = phase4.parse_book_page(phase4.get_html(payload["url"]), payload["url"])
+    path = phase4.image_path(IMAGES_DIR, payload["category"], book["universal_product_code (upc)"])
+    return as_dict(book), [task("image", book["image_url"], path=path, title=book["title"])]
+
+def do_image(payload, output):
+    """
+    Image écrite dans le dossier de sortie du worker; le chemin complet est gardé pour la fusion.
+    Avec SCRAPPER_IMAGE_STORE, c'est un lien vers le dépôt d'images dédupliquées.
+    """
+    file = os.path.join(output, payload["path"])
+    if not Scrapper_images.is_present(file):
+        store = Scrapper_images.store_from_env()
+        if store is not None:
+            store.fetch(payload["url"], file)
+        else:
+            Scrapper_images.download_image(payload["url"], file)
+    return {"file": os.path.abspath(file)}, []
+
+HANDLERS = {"listing": do_listing, "book": do_book, "image": do_image}
+
+def run_worker(queue_path=QUEUE_FILE, worker_id=None, output="."):
+    """
+    Prend des tâches dans la file jusqu'à ce qu'il n'y en ait plus (ni en attente, ni en cours ailleurs).
+    Le bail d'une tâche est renouvelé pendant son traitement; un worker arrêté (processus tué) laisse
+    son bail expirer et sa tâche est reprise par un autre. Une tâche en erreur est notée en échec.
+    Retourne le nombre de tâches terminées par ce worker.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    done = 0
+    with WorkQueue(queue_path) as queue:
+        while True:
+            item = queue.lease(worker_id)
+            if item is None:
+                if queue.finished():
+                    break
+                time.sleep(IDLE_WAIT)       # Tâches en cours ailleurs : leur bail peut encore expirer
+                continue
+            try:
+                with queue.keep_lease(item):
+                    result, children = HANDLERS[item.kind](item.payload, output)
+            except (requests.RequestException, OSError) as e:  # Réseau (après les réessais) ou disque
+                queue.fail(item, f"{type(e).__name__}: {e}")
+                print(f"⚠️ Échec définitif ({item.kind}) : {item.payload['url']} — {type(e).__name__}: {e}")
+                continue
+            except Exception as e:          # Page illisible (erreur d'analyse) : la redonner ne changerait rien
+                queue.fail(item, f"{type(e).__name__}: {e}")
+                print(f"⚠️ Page illisible ({item.kind}) : {item.payload['url']} — {type(e).__name__}: {e}")
+                continue
+            if queue.complete(item, result, children):
+                done += 1
+    print(f"[INFO] Worker {worker_id} : {done} tâches terminées")
+    return done
+
+
+# -------------------------------
+# Fusion : résultats de la file => CSV et images de la phase 4
+# -------------------------------
+def merge(queue_path=QUEUE_FILE):
+    """
+    Écrit csv/V4_<catégorie>.csv (livres dans l'ordre du site) et rassemble les images dans V4_images/.
+    Un livre listé dans plusieurs catégories est écrit dans chacune (une fois), son image rangée dans chacune.
+    Les tâches en échec sont notées dans dead_letters_V4.jsonl (même format que la phase 4).
+    Retourne le nombre de livres écrits.
+    """
+    with WorkQueue(queue_path) as queue:
+        if not queue.finished():
+            print(f"⚠️ Le crawl n'est pas terminé ({queue.counts()}) : les livres manquants ne seront pas dans les CSV")
+        books = {payload["url"]: (payload, Book.from_row(record)) for payload, record in queue.results("book")}
+        listings = {name: [] for name, url in queue.meta("categories", [])}    # Catégorie => [(ordre, URL), ...]
+        for payload, result in queue.results("listing"):
+            listings.setdefault(payload["category"], []).extend(
+                ([payload["category_index"], payload["page"], position], url)
+                for position, url in enumerate(result.get("urls", ())))
+        for url, (payload, book) in books.items():
+            # Catégorie de la tâche : déjà dans ses listings (sauf file d'une version sans "urls")
+            listings.setdefault(payload["category"], []).append((payload["order"], url))
+        by_category, extra_images = {}, []
+        for category_name, entries in listings.items():
+            listed = set()                  # Un livre listé deux fois dans une catégorie n'y est écrit qu'une fois
+            by_category[category_name] = []
+            for order, url in sorted(entries):
+                if url in books and url not in listed:
+                    listed.add(url)
+                    payload, book = books[url]
+                    by_category[category_name].append((order, book))
+                    if category_name != payload["category"]:
+                        extra_images.append((payload["category"], category_name, book.upc))
+
+        dataset = Scrapper_dataset.from_env()
+        store = Scrapper_sqlite.from_env("distributed")
+        total = 0
+        for category_name, books in by_category.items():
+            with phase4.open_csv(category_name, dataset=dataset, store=store) as sink:
+                sink.write_all(book for order, book in books)
+            total += sink.count
+            print(f"✅ {sink.count} livres sauvegardés dans {sink.path}")
+        if dataset is not None:
+            dataset.close()
+        if store is not None:
+            store.close()
+
+        # Images écrites par des workers lancés dans un autre dossier (--sortie)
+        copied = 0
+        for payload, result in queue.results("image"):
+            if not Scrapper_images.is_present(payload["path"]) and os.path.exists(result["file"]):
+                _copy(result["file"], payload["path"])
+                copied += 1
+        # Livres listés dans plusieurs catégories : l'image téléchargée une fois est rangée dans chacune
+        for source, category_name, upc in extra_images:
+            source = phase4.image_path(IMAGES_DIR, source, upc)
+            path = phase4.image_path(IMAGES_DIR, category_name, upc)
+            if not Scrapper_images.is_present(path) and Scrapper_images.is_present(source):
+                _copy(source, path)
+                copied += 1
+
+        dead_letters = Scrapper_retry.DeadLetters(phase4.DEAD_LETTERS_FILE)
+        for kind, payload, error in queue.failures():
+            context = {"path": payload["path"], "title": payload["title"]} if kind == "image" \
+                else {"category": payload["category"]}
+            dead_letters.add(kind, payload["url"], error, **context)
+        dead_letters.close()
+    print(f"[INFO] {copied} images copiées dans {IMAGES_DIR}")
+    if dead_letters:
+        print(f"⚠️ {len(dead_letters)} URLs en échec (voir {phase4.DEAD_LETTERS_FILE})")
+    return total
+
+
+def _copy(source, path):
+    """Copie source en path via un fichier .part (le fichier apparaît complet d'un coup)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    shutil.copyfile(source, path + ".part")
+    os.replace(path + ".part", path)
+
+
+# -------------------------------
+# Programme principal
+# -------------------------------
+def status(queue_path=QUEUE_FILE):
+    with WorkQueue(queue_path) as queue:
+        print(f"[INFO] {queue.path} : {queue.counts()}")
+
+def run(workers=WORKERS, queue_path=QUEUE_FILE, base_url=None, fresh=False):
+    """Crawl complet sur cette machine : file créée si besoin, workers lancés en processus, puis fusion."""
+    if fresh and os.path.exists(queue_path):
+        os.remove(queue_path)
+    with WorkQueue(queue_path) as queue:
+        if queue.meta("base_url") is None:
+            init(queue, base_url)
+        else:
+            print(f"♻️  Reprise de la file {queue_path} : {queue.counts()}")
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=run_worker, args=(queue_path, f"{socket.gethostname()}-local{number}"))
+                 for number in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return merge(queue_path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl de la phase 4 réparti sur plusieurs workers (file SQLite)")
+    parser.add_argument("commande", choices=["init", "worker", "merge", "status", "run"],
+                        help="init : remplit la file; worker : traite des tâches; merge : écrit CSV et images; "
+                             "run : init + N workers locaux + merge")
+    parser.add_argument("--file", default=QUEUE_FILE, help="fichier SQLite de la file de tâches")
+    parser.add_argument("--base-url", default=None, help="adresse du site (init, run)")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="workers lancés par run")
+    parser.add_argument("--id", default=None, help="identifiant du worker (par défaut : machine-pid)")
+    parser.add_argument("--sortie", default=".", help="dossier où le worker écrit les images")
+    parser.add_argument("--recommencer", action="store_true", help="run : supprime la file existante")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.commande == "init":
+        with WorkQueue(args.file) as queue:
+            init(queue, args.base_url)
+    elif args.commande == "worker":
+        run_worker(args.file, args.id, args.sortie)
+    elif args.commande == "merge":
+        merge(args.file)
+    elif args.commande == "status":
+        status(args.file)
+    else:
+        total = run(args.workers, args.file, args.base_url, args.recommencer)
+        print(f"\n🎉 {total} livres scrapés par {args.workers} workers en {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
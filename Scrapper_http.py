@@ -0,0 +1,221 @@
+import threading                    # Verrou pour les compteurs (le transport est partagé entre threads)
+import time                         # Attente entre deux essais
+
+import requests                     # Bibliothèque HTTP
+import Scrapper_metrics             # Temps de réponse par étape (si l'instrumentation est activée)
+import Scrapper_retry               # Réessais avec backoff (connexion, lecture, 429 / 5xx)
+import Scrapper_cache               # Cache des réponses sur disque (revalidation 304)
+import Scrapper_warc                # Archive WARC des réponses (relecture sans réseau)
+import Scrapper_http2               # Adaptateur HTTP/2 optionnel (variable d'environnement SCRAPPER_HTTP2)
+from requests.adapters import HTTPAdapter   # Adaptateur qui gère le pool de connexions (keep-alive)
+
+# -------------------------------
+# CONFIGURATION DE BASE
+# -------------------------------
+POOL_SIZE = 16                                      # Connexions gardées ouvertes par hôte
+USER_AGENT = "Scrapper-books/1.0 (books.toscrape.com)"   # User-Agent unique pour toutes les requêtes
+ACCEPT_ENCODING = "gzip, deflate"                   # On demande des réponses compressées
+TIMEOUT = (10, 30)                                  # Délais max de connexion et de lecture (s) : un site muet devient une erreur réessayable
+
+
+# -------------------------------
+# Transport HTTP partagé
+# -------------------------------
+class Transport:
+    """
+    Une seule session requests pour tous les téléchargements (pages et images) :
+    les connexions TCP/TLS sont réutilisées (keep-alive) au lieu d'être rouvertes à chaque appel.
+    Les échecs passagers (connexion, lecture, 408 / 429 / 5xx) sont réessayés avec backoff (Scrapper_retry).
+    cache : Scrapper_cache.HttpCache (None = variable d'environnement SCRAPPER_CACHE, False = pas de cache).
+    archive : Scrapper_warc.WarcWriter où chaque réponse est enregistrée (None = variable SCRAPPER_WARC, False = aucune).
+    http2 : Scrapper_http2.HTTP2Adapter qui multiplexe les requêtes (None = variable SCRAPPER_HTTP2, False = HTTP/1.1).
+    Garde aussi des statistiques : connexions ouvertes / réutilisées, réessais et octets reçus.
+    """
+
+    def __init__(self, pool_size=POOL_SIZE, user_agent=USER_AGENT, retry=None, cache=None, archive=None, http2=None):
+        self.pool_size = pool_size
+        self.retry = retry or Scrapper_retry.DEFAULT_POLICY
+        self.cache = Scrapper_cache.from_env() if cache is None else cache or None
+        self.archive = Scrapper_warc.from_env() if archive is None else archive or None
+        self.http2 = Scrapper_http2.from_env() if http2 is None else http2 or None
+        self.session = requests.Session()
+        # pool_connections = nombre d'hôtes gardés en cache, pool_maxsize = connexions par hôte
+        adapter = self.http2 or HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"User-Agent": user_agent, "Accept-Encoding": ACCEPT_ENCODING})
+        self._adapter = adapter
+        self._lock = threading.Lock()
+        self._requests = 0              # Nombre de requêtes envoyées
+        self._retries = 0               # Nombre de réessais après un échec passager
+        self._bytes_wire = 0            # Octets reçus sur le réseau (compressés)
+        self._bytes_body = 0            # Octets après décompression
+
+    def get(self, url, retry=True, **kwargs):
+        """
+        Équivalent de requests.get, mais via la session partagée.
+        retry=True : les échecs passagers sont réessayés; après le dernier essai, l'exception est levée
+        ou la réponse en erreur est retournée (raise_for_status reste à la charge de l'appelant).
+        """
+        kwargs.setdefault("timeout", TIMEOUT)
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = self._get(url, **kwargs)
+            except requests.RequestException as e:
+                if not retry or not self.retry.should_retry(Scrapper_retry.classify(error=e), attempt):
+                    raise
+                self._wait_retry(attempt)
+                continue
+            if retry and self.retry.should_retry(Scrapper_retry.classify(status=response.status_code), attempt):
+                response.close()
+                self._wait_retry(attempt, response.headers.get("Retry-After"))
+                continue
+            return response
+
+    def _wait_retry(self, attempt, retry_after=None):
+        with self._lock:
+            self._retries += 1
+        time.sleep(self.retry.delay(attempt, retry_after))
+
+    def _get(self, url, **kwargs):
+        """Une seule requête (sans réessai), via le cache et enregistrée dans l'archive s'il y en a."""
+        if self.cache is None and self.archive is None:
+            return self._fetch(url, **kwargs)
+        kwargs.pop("stream", None)          # Le corps est lu en entier pour être mis en cache / archivé
+        response = self._get_cached(url, **kwargs) if self.cache is not None else self._fetch(url, **kwargs)
+        if self.archive is not None:
+            self.archive.write_response(url, response)
+        if not hasattr(response, "from_cache"):
+            response.from_cache = False     # Déjà comptée : count_stream ne la recompte pas
+        return response
+
+    def _get_cached(self, url, **kwargs):
+        entry = self.cache.lookup(url)
+        if entry is not None:
+            if self.cache.is_fresh(entry):
+                response = self.cache.response(url, entry)
+                if response is not None:
+                    return response
+            kwargs["headers"] = self.cache.conditional_headers(entry)     # If-None-Match / If-Modified-Since
+        response = self._fetch(url, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            cached = self.cache.response(url, entry, revalidated=True, not_modified=response)
+            if cached is not None:
+                return cached
+            kwargs.pop("headers")           # Corps disparu du disque : on le re-télécharge
+            response = self._fetch(url, **kwargs)
+        self.cache.store(url, response)
+        return response
+
+    def _fetch(self, url, **kwargs):
+        """Une seule requête réseau (sans réessai), comptée dans les statistiques."""
+        if kwargs.get("stream"):
+            return self.session.get(url, **kwargs)      # Compté par count_stream une fois le corps lu
+        with Scrapper_metrics.timer("download") as timer:
+            response = self.session.get(url, **kwargs)
+            timer.size = self._count(response)
+        if Scrapper_metrics.ENABLED:
+            Scrapper_metrics.observe("ttfb", response.elapsed.total_seconds())
+        return response
+
+    def _count(self, response):
+        """Met à jour les compteurs d'octets après lecture du corps."""
+        return self.count_stream(response, len(response.content))
+
+    def count_stream(self, response, body):
+        """
+        Compte une réponse dont le corps (body octets) a été lu en streaming (stream=True).
+        Retourne le nombre d'octets reçus sur le réseau.
+        """
+        if hasattr(response, "from_cache"):     # Passée par le cache : déjà comptée, ou servie depuis le disque
+            return 0 if response.from_cache else len(response.content)
+        try:
+            wire = response.raw.tell()  # Octets lus sur la socket, avant décompression
+        except Exception:
+            wire = body
+        with self._lock:
+            self._requests += 1
+            self._bytes_wire += wire or body
+            self._bytes_body += body
+        return wire or body
+
+    def _connections_opened(self):
+        """Nombre total de connexions ouvertes par les pools urllib3 de l'adaptateur."""
+        if self.http2 is not None:
+            return self.http2.connections_opened
+        pools = self._adapter.poolmanager.pools
+        with pools.lock:
+            return sum(pool.num_connections for pool in pools._container.values())
+
+    def stats(self):
+        """Retourne un dictionnaire de statistiques du transport."""
+        opened = self._connections_opened()
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "retries": self._retries,
+                "connections_opened": opened,
+                "connections_reused": max(self._requests - opened, 0),
+                "bytes_wire": self._bytes_wire,
+                "bytes_decoded": self._bytes_body,
+            }
+
+    def format_stats(self):
+        """Résumé lisible des statistiques pour l'affichage en fin de script."""
+        s = self.stats()
+        summary = (f"{s['requests']} requêtes ({s['retries']} réessais), {s['connections_opened']} connexions ouvertes, "
+                   f"{s['connections_reused']} réutilisées, {s['bytes_wire'] / 1024:.0f} Ko reçus "
+                   f"({s['bytes_decoded'] / 1024:.0f} Ko décompressés)")
+        if self.cache is not None:
+            summary += f"\n💾 Cache : {self.cache.format_stats()}"
+        if self.http2 is not None:
+            summary += f"\n⚡ HTTP/2 : {self.http2.report()}"
+        return summary
+
+    def close(self):
+        """Ferme toutes les connexions du pool (et l'archive)."""
+        self.session.close()
+        if self.archive is not None:
+            self.archive.close()
+
+
+# -------------------------------
+# Transport par défaut (utilisé par tous les scripts)
+# -------------------------------
+_default = None
+_default_lock = threading.Lock()
+
+def get_transport():
+    """Retourne le transport partagé (créé au premier appel)."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Transport()
+        return _default
+
+def configure(pool_size=POOL_SIZE, user_agent=USER_AGENT, cache=None, archive=None, http2=None):
+    """Remplace le transport partagé (par exemple pour changer la taille du pool, le cache, l'archive ou HTTP/2)."""
+    return set_transport(Transport(pool_size, user_agent, cache=cache, archive=archive, http2=http2))
+
+def set_transport(transport):
+    """Remplace le transport partagé par un transport déjà construit (Scrapper_replay.ReplayTransport...)."""
+    global _default
+    with _default_lock:
+        if _default is not None:
+            _default.close()
+        _default = transport
+        return _default
+
+def get(url, **kwargs):
+    """Télécharge une URL avec le transport partagé (remplace requests.get)."""
+    return get_transport().get(url, **kwargs)
+
+def stats():
+    """Statistiques du transport partagé."""
+    return get_transport().stats()
+
+def format_stats():
+    """Résumé lisible des statistiques pour l'affichage en fin de script."""
+    return get_transport().format_stats()
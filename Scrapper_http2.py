@@ -0,0 +1,186 @@
+import asyncio                      # Client httpx asynchrone : une boucle dans un thread dédié
+import os                           # Variables d'environnement SCRAPPER_HTTP2 / SCRAPPER_HTTP2_STREAMS
+import threading                    # Thread de la boucle, appelé par tous les threads du transport
+from urllib.parse import urlsplit   # Hôte d'une URL (une limite de flux par hôte)
+
+import requests                     # Réponses et erreurs au format requests (le reste du code ne change pas)
+from requests.adapters import BaseAdapter   # Adaptateur branché sur la session du transport partagé
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# -------------------------------
+# CONFIGURATION DE BASE
+# -------------------------------
+MODE = os.environ.get("SCRAPPER_HTTP2", "")     # "" = HTTP/1.1 (requests), "1" = HTTP/2 si le site le propose, "h2c" = HTTP/2 en clair
+MAX_STREAMS = int(os.environ.get("SCRAPPER_HTTP2_STREAMS", "64"))    # Requêtes en vol par hôte (flux de sa connexion)
+KEEPALIVE = 16                      # Connexions gardées ouvertes (repli HTTP/1.1 : une par requête en vol)
+# En-têtes propres à une connexion HTTP/1.1 (interdits en HTTP/2) : requests ajoute "Connection: keep-alive"
+HOP_BY_HOP = {"connection", "keep-alive", "proxy-connection", "transfer-encoding", "upgrade"}
+MODES = {"1": False, "alpn": False, "h2c": True}    # Valeur de SCRAPPER_HTTP2 => HTTP/2 sans négociation (h2c)
+
+
+def _httpx():
+    """Import de httpx (dépendance optionnelle : pip install "httpx[http2]")."""
+    try:
+        import httpx
+        import h2                   # noqa: F401 (httpx n'active HTTP/2 qu'avec h2)
+    except ImportError:
+        raise ImportError('Le transport HTTP/2 demande httpx et h2 : pip install "httpx[http2]"') from None
+    return httpx
+
+def is_available():
+    """Vrai si httpx et h2 sont installés."""
+    try:
+        _httpx()
+        return True
+    except ImportError:
+        return False
+
+def from_env():
+    """
+    Adaptateur configuré par la variable d'environnement SCRAPPER_HTTP2 (None : HTTP/1.1 avec requests).
+    Sans httpx, le transport reste en HTTP/1.1 (un message le signale).
+    """
+    if not MODE:
+        return None
+    if MODE not in MODES:
+        raise ValueError(f"SCRAPPER_HTTP2={MODE} : valeurs possibles 1 (ou alpn) et h2c")
+    if not is_available():
+        print('⚠️ SCRAPPER_HTTP2 ignoré : pip install "httpx[http2]" pour le transport HTTP/2 (HTTP/1.1 utilisé)')
+        return None
+    return HTTP2Adapter(prior_knowledge=MODES[MODE])
+
+
+# -------------------------------
+# Adaptateur requests => httpx (HTTP/2)
+# -------------------------------
+class HTTP2Adapter(BaseAdapter):
+    """
+    Se branche à la place de HTTPAdapter sur la session du transport (Scrapper_http.Transport) :
+    les pages et images passent par un client httpx qui multiplexe les requêtes vers un hôte sur une seule
+    connexion HTTP/2 (au plus max_streams en vol, les suivantes attendent), au lieu d'une socket par requête.
+    Le protocole est négocié avec le site (ALPN, en HTTPS) : un site sans HTTP/2 est servi en HTTP/1.1.
+    prior_knowledge=True : HTTP/2 directement, sans négociation, y compris en http:// (h2c; serveur local
+    du benchmark). Les réponses et les erreurs restent celles de requests (cache, WARC et réessais inchangés).
+
+    Le client httpx synchrone n'est pas sûr en HTTP/2 quand plusieurs threads partagent une connexion
+    (numéros de flux envoyés dans le désordre) : les requêtes des threads sont donc confiées à un client
+    asynchrone qui tourne dans une boucle asyncio dédiée. Le corps est lu en entier par cette boucle.
+    """
+
+    def __init__(self, max_streams=MAX_STREAMS, prior_knowledge=False, keepalive=KEEPALIVE):
+        super().__init__()
+        httpx = _httpx()
+        self.max_streams = max_streams
+        self.prior_knowledge = prior_knowledge
+        # Les redirections sont suivies par requests (comme avec HTTPAdapter)
+        self.client = httpx.AsyncClient(http1=not prior_knowledge, http2=True, follow_redirects=False,
+                                        limits=httpx.Limits(max_connections=None, max_keepalive_connections=keepalive))
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="http2", daemon=True)
+        self._thread.start()
+        self._slots = {}                    # hôte -> asyncio.Semaphore de max_streams requêtes en vol
+        self.connections_opened = 0         # Connexions TCP ouvertes (toutes versions)
+        self.by_version = {}                # "HTTP/2" / "HTTP/1.1" -> nombre de réponses
+
+    async def _trace(self, event, info):
+        """Événements httpcore : compte les connexions ouvertes (le pool httpx ne les expose pas)."""
+        if event == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+
+    async def _send(self, httpx, request, headers, timeout):
+        """Exécuté dans la boucle : une seule tâche à la fois touche l'état HTTP/2, sans verrou."""
+        host = urlsplit(request.url).netloc
+        slots = self._slots.get(host)
+        if slots is None:
+            slots = self._slots[host] = asyncio.Semaphore(self.max_streams)
+        async with slots:
+            response = await self.client.send(
+                self.client.build_request(request.method, request.url, headers=headers, content=request.body,
+                                          timeout=timeout, extensions={"trace": self._trace}),
+                stream=True)
+            try:
+                await response.aread()
+            finally:
+                await response.aclose()
+        self.by_version[response.http_version] = self.by_version.get(response.http_version, 0) + 1
+        return response
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        """Envoie une requête préparée par requests (depuis n'importe quel thread) et retourne une requests.Response."""
+        httpx = _httpx()
+        headers = [(name, value) for name, value in request.headers.items() if name.lower() not in HOP_BY_HOP]
+        future = asyncio.run_coroutine_threadsafe(self._send(httpx, request, headers, _timeout(httpx, timeout)),
+                                                  self._loop)
+        try:
+            response = future.result()
+        except httpx.HTTPError as e:
+            raise _requests_error(httpx, e, request) from e
+        return self._build_response(request, response)
+
+    def _build_response(self, request, response):
+        result = requests.Response()
+        result.status_code = response.status_code
+        result.reason = response.reason_phrase
+        result.headers = CaseInsensitiveDict(response.headers)     # En-têtes répétés joints par ", " (comme urllib3)
+        result.encoding = get_encoding_from_headers(result.headers)
+        result.raw = _RawResponse(response)
+        result.url = request.url
+        result.request = request
+        result.connection = self
+        return result
+
+    def report(self):
+        """Versions du protocole réellement utilisées, pour le résumé du transport."""
+        versions = ", ".join(f"{version} : {count}" for version, count in sorted(self.by_version.items()))
+        return f"{versions or 'aucune réponse'} ({self.max_streams} flux max par connexion)"
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self.client.aclose(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+class _RawResponse:
+    """
+    Corps d'une réponse httpx (déjà lu) présenté comme response.raw de urllib3 à requests (iter_content, content).
+    Le corps est déjà décompressé par httpx; tell() donne les octets reçus sur le réseau.
+    """
+
+    def __init__(self, response):
+        self._response = response
+
+    def stream(self, amt=None, decode_content=True):
+        yield from self._response.iter_bytes(amt)
+
+    def read(self, amt=None, decode_content=True):
+        return self._response.content
+
+    def tell(self):
+        return self._response.num_bytes_downloaded
+
+    def close(self):
+        pass
+
+    release_conn = close
+
+
+def _timeout(httpx, timeout):
+    """Délais requests ((connexion, lecture) ou un seul nombre) => httpx.Timeout."""
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+def _requests_error(httpx, error, request):
+    """Erreur httpx => l'exception requests équivalente (pour Scrapper_retry.classify)."""
+    if isinstance(error, httpx.ConnectTimeout):
+        return requests.exceptions.ConnectTimeout(error, request=request)
+    if isinstance(error, (httpx.ReadTimeout, httpx.WriteTimeout, httpx.PoolTimeout)):
+        return requests.exceptions.ReadTimeout(error, request=request)
+    if isinstance(error, (httpx.NetworkError, httpx.RemoteProtocolError)):
+        return requests.exceptions.ConnectionError(error, request=request)
+    return requests.RequestException(error, request=request)
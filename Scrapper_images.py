@@ -0,0 +1,307 @@
+import contextvars                  # La catégorie des mesures suit l'image dans le thread de téléchargement
+import hashlib                      # Adresse des images dans le dépôt (empreinte de l'URL et du contenu)
+import os                           # Dossiers, fichiers temporaires et renommage atomique
+import shutil                       # Copie quand le système de fichiers refuse les liens physiques
+import threading                    # Verrou des compteurs (plusieurs threads téléchargent en même temps)
+import time                         # Mesure du débit (images/s)
+from concurrent.futures import Future, ThreadPoolExecutor  # Pool de threads dédié aux images
+
+import requests                     # Erreur de lecture (image incomplète) : réessayée par la politique du transport
+
+import Scrapper_http                # Transport HTTP partagé
+import Scrapper_metrics             # Temps de téléchargement des images (si l'instrumentation est activée)
+import Scrapper_urls                # Images déjà planifiées pendant le run (frontière)
+
+# -------------------------------
+# CONFIGURATION DE BASE
+# -------------------------------
+WORKERS = 8                         # Nombre de téléchargements d'images en parallèle
+CHUNK_SIZE = 64 * 1024              # Taille des morceaux écrits sur le disque (64 Ko)
+STORE_DIR = os.environ.get("SCRAPPER_IMAGE_STORE", "")  # Dépôt d'images dédupliquées ("" = pas de dépôt)
+
+
+# -------------------------------
+# Téléchargement d'une image
+# -------------------------------
+def is_present(path):
+    """
+    Image déjà sur le disque et non vide. download_image écrit dans un fichier temporaire et ne le renomme
+    qu'une fois tous les octets annoncés (Content-Length) reçus : un fichier qu'il a écrit est donc complet.
+    Limite : seule la taille sur le disque est regardée, pas le contenu; un fichier tronqué par autre chose
+    (copie interrompue à la main, disque plein d'une ancienne version) passe pour présent : l'effacer pour
+    le re-télécharger.
+    """
+    try:
+        return os.path.getsize(path) > 0
+    except OSError:
+        return False
+
+def download_image(image_url, path, transport=None, chunk_size=CHUNK_SIZE):
+    """
+    Télécharge une image par morceaux vers <path>.part puis la renomme en <path>.
+    Le corps n'est jamais entièrement en mémoire. Une coupure pendant la lecture, ou un corps plus court que
+    son Content-Length, relance le téléchargement (politique de réessai du transport) : rien n'est renommé.
+    Retourne le nombre d'octets écrits (lève une exception en cas d'erreur).
+    """
+    transport = transport or Scrapper_http.get_transport()
+    return transport.retry.call(_download_once, image_url, path, transport, chunk_size)
+
+def _download_once(image_url, path, transport, chunk_size):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".part"
+    written = 0
+    with Scrapper_metrics.timer("image") as timer, transport.get(image_url, stream=True) as response:
+        response.raise_for_status()
+        try:
+            with open(tmp_path, "wb") as handler:
+                for chunk in response.iter_content(chunk_size):
+                    handler.write(chunk)
+                    written += len(chunk)
+            expected = expected_size(response)
+            if expected is not None and written != expected:
+                raise requests.exceptions.ChunkedEncodingError(
+                    f"Image incomplète : {written} octets reçus sur {expected} annoncés")
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)             # Pas de fichier à moitié écrit
+            raise
+        timer.size = transport.count_stream(response, written)
+    os.replace(tmp_path, path)                  # Renommage atomique : l'image apparaît complète d'un coup
+    return written
+
+
+def expected_size(response):
+    """
+    Taille annoncée du corps (Content-Length), None si elle est inconnue ou si le corps est compressé
+    (Content-Length compte alors les octets compressés, pas ceux écrits sur le disque).
+    """
+    if response.headers.get("Content-Encoding", "identity").lower() != "identity":
+        return None
+    try:
+        return int(response.headers["Content-Length"])
+    except (KeyError, ValueError):
+        return None
+
+
+# -------------------------------
+# Dépôt d'images par contenu (déduplication)
+# -------------------------------
+class ImageStore:
+    """
+    Chaque image n'est gardée qu'une fois dans root :
+    - objects/<sha256 du contenu>.jpg : le fichier, un seul exemplaire par contenu ;
+    - urls/<sha1 de l'URL>.jpg : lien physique vers l'objet, une URL déjà là n'est jamais re-téléchargée.
+    Les chemins habituels (V4_images/<catégorie>/<upc>.jpg) sont des liens physiques vers l'objet :
+    mêmes octets, mais l'espace disque et le réseau suivent le nombre d'images différentes, pas de livres.
+    root doit être sur le même disque que le dossier des images (sinon les fichiers sont copiés).
+    """
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self.fetched = 0                    # URLs téléchargées
+        self.linked = 0                     # Images servies par le dépôt sans téléchargement
+        self.duplicates = 0                 # URLs différentes, même contenu (un seul objet gardé)
+        self._lock = threading.Lock()
+        self._url_locks = {}                # URL en cours -> [verrou, utilisateurs] : même couverture => un seul téléchargement
+
+    @staticmethod
+    def _sharded(folder, digest, suffix=".jpg"):
+        return os.path.join(folder, digest[:2], digest + suffix)
+
+    def url_path(self, image_url):
+        return self._sharded(os.path.join(self.root, "urls"), hashlib.sha1(image_url.encode("utf-8")).hexdigest())
+
+    def fetch(self, image_url, path, transport=None):
+        """
+        Met l'image à path (lien vers le dépôt), en la téléchargeant seulement si son URL n'est pas encore dans le dépôt.
+        Retourne le nombre d'octets téléchargés (0 si l'image venait du dépôt).
+        """
+        url_file = self.url_path(image_url)
+        with self._lock:
+            entry = self._url_locks.setdefault(image_url, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                written = 0
+                if not is_present(url_file):
+                    written = self._download(image_url, url_file, transport)
+                else:
+                    with self._lock:
+                        self.linked += 1
+                _link(url_file, path)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._url_locks[image_url]  # Plus personne n'attend : l'URL est dans le dépôt (ou a échoué)
+        return written
+
+    def _download(self, image_url, url_file, transport):
+        """Télécharge une URL inconnue, range son contenu dans objects/ (une seule fois) et relie l'URL à l'objet."""
+        tmp_path = os.path.join(self.root, "tmp", f"{os.getpid()}-{threading.get_ident()}.jpg")
+        written = download_image(image_url, tmp_path, transport)
+        digest = hashlib.sha256()
+        with open(tmp_path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        object_path = self._sharded(os.path.join(self.root, "objects"), digest.hexdigest())
+        with self._lock:                    # Deux URLs au même contenu : un seul objet placé, l'autre compté en doublon
+            self.fetched += 1
+            if is_present(object_path):
+                self.duplicates += 1
+                os.remove(tmp_path)         # Contenu déjà connu sous une autre URL
+            else:
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                os.replace(tmp_path, object_path)
+        _link(object_path, url_file)
+        return written
+
+    def usage(self):
+        """(images différentes, octets sur le disque) du dépôt."""
+        count = size = 0
+        for folder, _, files in os.walk(os.path.join(self.root, "objects")):
+            for name in files:
+                count += 1
+                size += os.path.getsize(os.path.join(folder, name))
+        return count, size
+
+    def report(self):
+        count, size = self.usage()
+        return (f"{self.fetched} téléchargées, {self.linked} reprises du dépôt, {self.duplicates} doublons de contenu; "
+                f"dépôt : {count} images, {size / 1024:.0f} Ko")
+
+def _link(source, path):
+    """path devient un lien physique vers source (copie si le système de fichiers ne le permet pas), de façon atomique."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.part"
+    try:
+        os.link(source, tmp_path)
+    except OSError:                         # Autre disque, système sans liens physiques...
+        shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, path)
+
+_done = Future()                    # "Téléchargement" d'une image déjà sur le disque
+_done.set_result(True)
+
+def store_from_env():
+    """Dépôt configuré par la variable d'environnement SCRAPPER_IMAGE_STORE (None sans dépôt)."""
+    return ImageStore(STORE_DIR) if STORE_DIR else None
+
+
+# -------------------------------
+# Étape "images" : pool de threads séparé de l'extraction
+# -------------------------------
+class ImagePipeline:
+    """
+    Les images sont envoyées (submit) à un pool de threads dédié : l'extraction des fiches produit
+    n'attend pas l'écriture des images. Les images déjà présentes, ou déjà planifiées pendant ce run
+    (même fichier demandé deux fois), sont ignorées; une URL déjà téléchargée (ou déjà sur le disque)
+    pour un autre fichier n'est pas re-téléchargée : le fichier devient un lien vers le premier, avec
+    ou sans dépôt. Le dépôt ajoute la déduplication d'un run à l'autre et par contenu.
+    Une image toujours en échec après les réessais est notée dans dead_letters (Scrapper_retry.DeadLetters).
+    store : ImageStore qui garde chaque image une seule fois (None = variable SCRAPPER_IMAGE_STORE, False = aucun).
+    Appeler close() à la fin pour attendre les derniers téléchargements et report() pour le débit.
+    """
+
+    def __init__(self, workers=WORKERS, transport=None, dead_letters=None, store=None):
+        self.workers = workers
+        self.transport = transport or Scrapper_http.get_transport()
+        self.dead_letters = dead_letters
+        self.store = store_from_env() if store is None else store or None
+        self.planned = Scrapper_urls.Frontier()     # Fichiers déjà planifiés (un fichier n'est téléchargé qu'une fois)
+        self._first = {}                    # URL -> (premier fichier, Future) : une URL n'est téléchargée qu'une fois
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._lock = threading.Lock()
+        self.downloaded = 0
+        self.linked = 0                     # Fichiers liés à une image déjà téléchargée pour un autre livre
+        self.skipped = 0
+        self.errors = 0
+        self.bytes = 0
+        self._start = time.perf_counter()
+        self._elapsed = None
+
+    def submit(self, image_url, path, title="", on_done=None):
+        """
+        Planifie le téléchargement d'une image. on_done(path) est appelé (dans un thread du pool)
+        quand l'image est écrite. Retourne un Future, ou None si l'image est déjà présente.
+        """
+        if is_present(path) or not self.planned.add(path):
+            with self._lock:
+                self.skipped += 1
+                if image_url not in self._first and is_present(path):
+                    self._first[image_url] = (path, _done)      # Fichier d'un run précédent : source des liens
+            return None
+        context = contextvars.copy_context()    # Catégorie courante (mesures)
+        with self._lock:
+            first = self._first.get(image_url)
+            if first is None:
+                future = self._executor.submit(context.run, self._download, image_url, path, title, on_done)
+                self._first[image_url] = (path, future)
+                return future
+        # Le premier téléchargement a été planifié avant : il passe avant dans le pool (pas d'attente circulaire)
+        return self._executor.submit(context.run, self._copy, first, image_url, path, title, on_done)
+
+    def _copy(self, first, image_url, path, title, on_done):
+        """Lien vers le fichier déjà téléchargé pour la même URL (téléchargement normal si celui-ci a échoué)."""
+        first_path, future = first
+        if not future.result():
+            return self._download(image_url, path, title, on_done)
+        try:
+            _link(first_path, path)
+        except OSError:                     # Premier fichier effacé entre-temps
+            return self._download(image_url, path, title, on_done)
+        with self._lock:
+            self.linked += 1
+        if on_done:
+            on_done(path)
+        return True
+
+    def _download(self, image_url, path, title, on_done):
+        try:
+            if self.store is not None:
+                size = self.store.fetch(image_url, path, self.transport)
+            else:
+                size = download_image(image_url, path, self.transport)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            if self.dead_letters is not None:
+                self.dead_letters.add("image", image_url, e, path=path, title=title)
+            else:
+                print(f"⚠️ Erreur lors du téléchargement de l'image pour {title}: {e}")
+            return False
+        with self._lock:
+            self.downloaded += 1
+            self.bytes += size
+        if on_done:
+            on_done(path)
+        return True
+
+    def close(self):
+        """Attend la fin de tous les téléchargements en cours."""
+        self._executor.shutdown(wait=True)
+        self._elapsed = time.perf_counter() - self._start
+
+    def stats(self):
+        elapsed = self._elapsed if self._elapsed is not None else time.perf_counter() - self._start
+        with self._lock:
+            return {
+                "downloaded": self.downloaded,
+                "linked": self.linked,
+                "skipped": self.skipped,
+                "errors": self.errors,
+                "bytes": self.bytes,
+                "seconds": elapsed,
+                "images_per_second": self.downloaded / elapsed if elapsed > 0 else 0.0,
+            }
+
+    def report(self):
+        """Résumé lisible pour la fin du script."""
+        s = self.stats()
+        report = (f"{s['downloaded']} images téléchargées ({s['skipped']} déjà présentes, {s['errors']} erreurs) "
+                  f"en {s['seconds']:.1f} s, soit {s['images_per_second']:.1f} images/s")
+        if s["linked"]:
+            report += f"\n   {s['linked']} images reprises d'un autre livre (même URL, pas de nouveau téléchargement)"
+        if self.store is not None:
+            report += f"\n   Dépôt d'images {self.store.root} : {self.store.report()}"
+        return report
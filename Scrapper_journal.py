@@ -0,0 +1,143 @@
+import json                         # Une ligne JSON par événement du crawl
+import os                           # Existence / suppression du fichier journal
+import threading                    # Les images peuvent être notées depuis les threads de téléchargement
+
+from Scrapper_record import Book, as_dict     # Livres typés, écrits en JSON sous forme de dictionnaire
+
+# -------------------------------
+# CONFIGURATION DE BASE
+# -------------------------------
+JOURNAL_FILE = "crawl_journal.jsonl"    # Nom par défaut (chaque script passe le sien)
+
+
+# -------------------------------
+# Journal de crawl (reprise après interruption)
+# -------------------------------
+class CrawlJournal:
+    """
+    Journal append-only de ce qui est déjà fait : liste des catégories, pages de listing,
+    fiches produit, images et catégories terminées (CSV écrit).
+    Chaque événement est écrit et vidé sur le disque immédiatement : si le script s'arrête
+    (erreur HTTP, Ctrl+C...), le run suivant relit le journal et ne re-télécharge rien de ce qui est déjà fait.
+    Le journal est supprimé à la fin d'un run complet (finish), le run suivant repart donc de zéro.
+    """
+
+    def __init__(self, path=JOURNAL_FILE, mode="full", resume=True):
+        self.path = path
+        self.mode = mode                    # Un journal écrit dans un autre mode (listing, incrémental...) n'est pas repris
+        self.categories = None              # [(nom, url), ...] lus sur la page d'accueil
+        # Ce qui a été fait lors du run interrompu (seuls les événements relus sont gardés en mémoire :
+        # ceux du run en cours sont seulement écrits, la mémoire ne grossit pas avec le crawl)
+        self.listings = {}                  # url de page de listing -> {"next": ..., "books": [...]}
+        self.books = {}                     # url de fiche produit -> dictionnaire du livre
+        self.images = set()                 # fichiers image déjà écrits
+        self.done = set()                   # catégories dont le CSV est écrit
+        self.resumed = False
+        self._lock = threading.Lock()
+
+        if resume and os.path.exists(path):
+            self._load()
+        if not self.resumed:
+            self._file = open(path, "w", encoding="utf-8")
+            self._write({"type": "start", "mode": mode})
+        else:
+            self._file = open(path, "a", encoding="utf-8")
+
+    def _load(self):
+        """Relit un journal existant (une dernière ligne tronquée par un arrêt brutal est ignorée)."""
+        entries = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    break
+        if not entries or entries[0] != {"type": "start", "mode": self.mode}:
+            return                          # Journal vide ou d'un autre mode : on repart de zéro
+        for entry in entries[1:]:
+            kind = entry["type"]
+            if kind == "categories":
+                self.categories = [tuple(item) for item in entry["items"]]
+            elif kind == "listing":
+                entry["books"] = [Book.from_row(book) if isinstance(book, dict) else book for book in entry["books"]]
+                self.listings[entry["url"]] = entry
+            elif kind == "book":
+                self.books[entry["url"]] = Book.from_row(entry["record"])
+            elif kind == "image":
+                self.images.add(entry["path"])
+            elif kind == "category":
+                self.done.add(entry["name"])
+        self.resumed = True
+
+    def _write(self, entry):
+        """Ajoute une ligne au journal et la pousse tout de suite sur le disque."""
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    # ------------------ Enregistrement ------------------
+    def record_categories(self, categories):
+        self.categories = [tuple(item) for item in categories]
+        self._write({"type": "categories", "items": self.categories})
+
+    def record_listing(self, url, next_url, books, pages=None):
+        """
+        books : livres de la page (enregistrements de listing de Scrapper_parsers.parse_listing_page, ou simples URLs).
+        pages : nombre de pages de la catégorie lu dans le pager (première page seulement).
+        """
+        entry = {"type": "listing", "url": url, "next": next_url, "books": [as_dict(book) for book in books]}
+        if pages:
+            entry["pages"] = pages
+        self._write(entry)
+
+    def record_book(self, url, record):
+        self._write({"type": "book", "url": url, "record": as_dict(record)})
+
+    def record_image(self, path):
+        self._write({"type": "image", "path": path})
+
+    def record_category(self, name):
+        self.done.add(name)
+        self._write({"type": "category", "name": name})
+
+    # ------------------ Consultation ------------------
+    def listing(self, url):
+        return self.listings.get(url)
+
+    def book(self, url):
+        return self.books.get(url)
+
+    def has_image(self, path):
+        """Image déjà écrite lors d'un run précédent (et toujours présente sur le disque)."""
+        return path in self.images and os.path.exists(path)
+
+    def category_done(self, name):
+        return name in self.done
+
+    # ------------------ Fin ------------------
+    def close(self):
+        self._file.close()
+
+    def finish(self):
+        """Run terminé sans erreur : le journal n'est plus utile."""
+        self.close()
+        os.remove(self.path)
+
+
+class NullJournal:
+    """Journal désactivé : n'enregistre rien et ne connaît rien (même interface que CrawlJournal)."""
+    categories = None
+    resumed = False
+
+    def record_categories(self, categories): pass
+    def record_listing(self, url, next_url, books, pages=None): pass
+    def record_book(self, url, record): pass
+    def record_image(self, path): pass
+    def record_category(self, name): pass
+    def listing(self, url): return None
+    def book(self, url): return None
+    def has_image(self, path): return False
+    def category_done(self, name): return False
+    def close(self): pass
+    def finish(self): pass
@@ -0,0 +1,187 @@
+import bisect                       # Recherche du bucket d'un histogramme
+import contextvars                  # Catégorie en cours (suit les tâches asyncio et les threads qui la copient)
+import json                         # Export JSON
+import os                           # Activation par variable d'environnement
+import threading                    # Les mesures arrivent de plusieurs threads
+import time                         # Chronométrage
+
+# -------------------------------
+# CONFIGURATION DE BASE
+# -------------------------------
+ENABLED = os.environ.get("SCRAPPER_METRICS", "") not in ("", "0")   # Désactivé par défaut
+# Bornes des buckets des histogrammes de latence (secondes), comme les histogrammes Prometheus
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STAGES = {
+    "ttfb": "attente de la réponse : connexion + requête + en-têtes (response.elapsed)",
+    "download": "requête HTTP complète, corps compris",
+    "parse": "construction de l'arbre BeautifulSoup (get_soup)",
+    "extract": "analyse et extraction des champs d'une fiche produit (Scrapper_parsers.parse_book)",
+    "book": "extract_book_data complet (téléchargement + analyse + extraction)",
+    "csv": "écriture d'une ligne CSV",
+    "image": "téléchargement et écriture d'une image",
+}
+
+_category = contextvars.ContextVar("category", default="")
+
+
+# -------------------------------
+# Histogramme de latence
+# -------------------------------
+class Histogram:
+    """Nombre de mesures par bucket de latence, somme des durées et octets cumulés."""
+
+    __slots__ = ("buckets", "count", "sum", "bytes")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)     # Le dernier bucket est +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.bytes = 0
+
+    def observe(self, seconds, size=0):
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.bytes += size
+
+    def cumulative(self):
+        """[(borne, nombre de mesures <= borne), ...] avec la borne "+Inf" à la fin."""
+        total = 0
+        result = []
+        for bound, count in zip(list(BUCKETS) + ["+Inf"], self.buckets):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "seconds": round(self.sum, 6),
+            "mean_ms": round(self.sum * 1000 / self.count, 3) if self.count else None,
+            "bytes": self.bytes,
+            "buckets": {str(bound): count for bound, count in self.cumulative()},
+        }
+
+
+# -------------------------------
+# Registre des mesures (étape, catégorie) -> histogramme
+# -------------------------------
+_histograms = {}
+_lock = threading.Lock()
+
+def observe(stage, seconds, size=0, category=None):
+    """Enregistre une mesure (ne fait rien si l'instrumentation est désactivée)."""
+    if not ENABLED:
+        return
+    key = (stage, _category.get() if category is None else category)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(seconds, size)
+
+class _Timer:
+    """Chronomètre d'une étape; on peut renseigner .size (octets) dans le bloc with."""
+
+    __slots__ = ("stage", "size", "_start")
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.size = 0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.stage, time.perf_counter() - self._start, self.size)
+
+class _NullTimer:
+    """Chronomètre vide renvoyé quand l'instrumentation est désactivée : rien n'est mesuré."""
+
+    __slots__ = ("size",)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+_NULL_TIMER = _NullTimer()
+
+def timer(stage):
+    """
+    with Scrapper_metrics.timer("csv"):
+        sink.write(book)
+    Désactivé, ne coûte qu'un test de booléen (le même objet vide est renvoyé à chaque appel).
+    """
+    return _Timer(stage) if ENABLED else _NULL_TIMER
+
+def set_category(name):
+    """Catégorie attribuée aux mesures suivantes (dans la tâche asyncio / le thread courant)."""
+    if ENABLED:
+        _category.set(name)
+
+
+# -------------------------------
+# Activation et export
+# -------------------------------
+def enable(enabled=True):
+    global ENABLED
+    ENABLED = enabled
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+def snapshot():
+    """{étape: {catégorie: histogramme}} ; la catégorie "" regroupe les mesures faites hors catégorie (page d'accueil...)."""
+    with _lock:
+        items = sorted(_histograms.items())
+        result = {}
+        for (stage, category), histogram in items:
+            result.setdefault(stage, {})[category] = histogram.as_dict()
+        return result
+
+def to_prometheus():
+    """Mesures au format texte Prometheus (histogrammes scrapper_stage_seconds et compteurs d'octets)."""
+    lines = ["# HELP scrapper_stage_seconds Durée de chaque étape du crawl.",
+             "# TYPE scrapper_stage_seconds histogram"]
+    bytes_lines = ["# HELP scrapper_stage_bytes_total Octets traités par étape.",
+                   "# TYPE scrapper_stage_bytes_total counter"]
+    with _lock:
+        items = sorted(_histograms.items())
+        for (stage, category), histogram in items:
+            labels = f'stage="{stage}",category="{_escape(category)}"'
+            for bound, count in histogram.cumulative():
+                lines.append(f'scrapper_stage_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"scrapper_stage_seconds_sum{{{labels}}} {histogram.sum:.6f}")
+            lines.append(f"scrapper_stage_seconds_count{{{labels}}} {histogram.count}")
+            if histogram.bytes:
+                bytes_lines.append(f"scrapper_stage_bytes_total{{{labels}}} {histogram.bytes}")
+    return "\n".join(lines + bytes_lines) + "\n"
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def dump(name, folder="metrics"):
+    """Écrit metrics/<name>.json et metrics/<name>.prom; retourne les deux chemins."""
+    os.makedirs(folder, exist_ok=True)
+    json_path = os.path.join(folder, f"{name}.json")
+    prom_path = os.path.join(folder, f"{name}.prom")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"buckets": list(BUCKETS), "descriptions": STAGES, "stages": snapshot()}, f, indent=2, ensure_ascii=False)
+    with open(prom_path, "w", encoding="utf-8") as f:
+        f.write(to_prometheus())
+    return json_path, prom_path
+
+def format_summary():
+    """Une ligne par étape (toutes catégories confondues) pour l'affichage en fin de script."""
+    lines = []
+    for stage, categories in snapshot().items():
+        count = sum(h["count"] for h in categories.values())
+        seconds = sum(h["seconds"] for h in categories.values())
+        size = sum(h["bytes"] for h in categories.values())
+        line = f"{stage:9} {count:6} x {seconds * 1000 / count:8.2f} ms = {seconds:7.2f} s"
+        lines.append(line + (f", {size / 1024:.0f} Ko" if size else ""))
+    return "\n".join(lines)
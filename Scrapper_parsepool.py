@@ -0,0 +1,63 @@
+import asyncio                      # File bornée : places attendues sans bloquer la boucle
+import contextlib                   # Place dans la file prise / rendue autour du téléchargement
+import multiprocessing              # Processus lancés en "spawn" (le crawler a déjà des threads)
+import os                           # Nombre de processeurs
+from concurrent.futures import ProcessPoolExecutor  # Pool de processus d'analyse
+
+import Scrapper_parsers             # Extraction des champs d'une fiche produit
+
+# -------------------------------
+# CONFIGURATION DE BASE
+# -------------------------------
+WORKERS = os.cpu_count() or 1       # Processus d'analyse par défaut quand l'étape est activée
+QUEUE_PER_WORKER = 4                # Pages brutes en attente par processus (taille de la file bornée)
+
+
+def _init_worker(backend):
+    Scrapper_parsers.set_backend(backend)
+
+def _parse(body, encoding, book_url):
+    """Décode (comme response.text) puis analyse une fiche produit, dans un processus d'analyse."""
+    return Scrapper_parsers.parse_book(str(body, encoding, errors="replace"), book_url)
+
+
+# -------------------------------
+# Étape "analyse" : pool de processus séparé des téléchargements
+# -------------------------------
+class ParsePool:
+    """
+    Les fiches produit téléchargées (octets bruts) sont analysées par un pool de processus :
+    l'analyse HTML ne tient plus le GIL du crawler et se répartit sur tous les cœurs.
+    Une file bornée (queue_size pages) relie les téléchargements à l'analyse : quand elle est pleine,
+    les téléchargements suivants attendent une place (backpressure), la mémoire reste donc bornée.
+
+        async with pool.slot():                 # place dans la file, prise avant le téléchargement
+            response = await fetch(url)
+            book = await pool.parse(response, url)
+    """
+
+    def __init__(self, workers=WORKERS, queue_size=None, backend=None):
+        self.workers = workers
+        self.queue_size = queue_size or workers * QUEUE_PER_WORKER
+        self._slots = asyncio.Semaphore(self.queue_size)
+        self._executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                                             initializer=_init_worker,
+                                             initargs=(backend or Scrapper_parsers.BACKEND,))
+        self.parsed = 0
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        """Place dans la file bornée, gardée du téléchargement jusqu'à la fin de l'analyse."""
+        async with self._slots:
+            yield
+
+    async def parse(self, response, book_url):
+        """Champs de la fiche produit (même résultat que Scrapper_parsers.parse_book(response.text, ...))."""
+        encoding = response.encoding or response.apparent_encoding
+        loop = asyncio.get_running_loop()
+        book_data = await loop.run_in_executor(self._executor, _parse, response.content, encoding, book_url)
+        self.parsed += 1
+        return book_data
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
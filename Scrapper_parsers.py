@@ -0,0 +1,278 @@
+import os                           # Lecture de la variable d'environnement SCRAPPER_PARSER
+import re                           # Expression régulière pour le stock disponible
+import sys                          # Arguments de la ligne de commande (vérification de parité)
+import time                         # Chronométrage des backends
+
+from bs4 import BeautifulSoup, SoupStrainer     # Analyse HTML (SoupStrainer = n'analyser qu'une partie de la page)
+
+import Scrapper_metrics             # Temps d'extraction des fiches (si l'instrumentation est activée)
+import Scrapper_urls                # Liens relatifs (image, fiche) résolus à partir de l'URL de la page
+from Scrapper_record import Book    # Livre typé (prix en pence, stock en entier) lu comme l'ancien dictionnaire
+
+# -------------------------------
+# CONFIGURATION DE BASE
+# -------------------------------
+RATING_MAP = {"One": 1, "Two": 2, "Three": 3, "Four": 4, "Five": 5}
+AVAILABLE_RE = re.compile(r"\((\d+) available\)")
+
+# Backend choisi par défaut : variable d'environnement SCRAPPER_PARSER, sinon "auto"
+BACKEND = os.environ.get("SCRAPPER_PARSER", "auto")
+
+
+# -------------------------------
+# Fonctions communes à tous les backends
+# -------------------------------
+def number_available(availability):
+    """ "In stock (22 available)" => "22" (ou "0" si absent) """
+    if not availability:
+        return "0"
+    match = AVAILABLE_RE.search(availability)
+    return match.group(1) if match else "0"
+
+def build_record(book_url, title, specs, description, category, rating, image_src):
+    """
+    Construit le livre final (Scrapper_record.Book), dont les colonnes sont identiques à celles des scripts de phase.
+    L'image ("../../media/...") est résolue à partir de l'URL de la fiche.
+    """
+    return Book.from_row({
+        "product_page_url": book_url,
+        "universal_product_code (upc)": specs.get("UPC"),
+        "title": title,
+        "price_including_tax": specs.get("Price (incl. tax)"),
+        "price_excluding_tax": specs.get("Price (excl. tax)"),
+        "number_available": number_available(specs.get("Availability")),
+        "product_description": description,
+        "category": category,
+        "review_rating": RATING_MAP.get(rating, 0),
+        "image_url": Scrapper_urls.resolve(book_url, image_src),
+    })
+
+
+# -------------------------------
+# Backend BeautifulSoup (référence)
+# -------------------------------
+def parse_soup(soup, book_url):
+    """Extraction de référence à partir d'un objet BeautifulSoup (même code que la phase 4)."""
+    product_main = soup.find("div", class_="product_main")
+    title = product_main.find("h1").text.strip()
+
+    table = soup.find("table", class_="table table-striped")
+    specs = {row.th.text.strip(): row.td.text.strip() for row in table.find_all("tr")}
+
+    description_tag = soup.find("div", id="product_description")
+    description = description_tag.find_next("p").text.strip() if description_tag else ""
+
+    category = soup.find("ul", class_="breadcrumb").find_all("li")[2].text.strip()
+
+    rating_tag = product_main.find("p", class_="star-rating")
+    rating = rating_tag["class"][1] if rating_tag else "Zero"
+
+    image_src = soup.find("div", class_="item active").img["src"]
+    return build_record(book_url, title, specs, description, category, rating, image_src)
+
+def parse_html_parser(html, book_url):
+    """Arbre complet avec html.parser (comportement historique)."""
+    return parse_soup(BeautifulSoup(html, "html.parser"), book_url)
+
+# Seuls le fil d'Ariane (<ul class="breadcrumb">) et le bloc produit (<article class="product_page">)
+# sont transformés en arbre : le menu, la barre latérale et le pied de page sont ignorés.
+STRAINER = SoupStrainer(["ul", "article"], attrs={"class": ["breadcrumb", "product_page"]})
+
+def parse_strainer(html, book_url):
+    """html.parser, mais seuls le fil d'Ariane et le bloc produit sont construits en arbre."""
+    return parse_soup(BeautifulSoup(html, "html.parser", parse_only=STRAINER), book_url)
+
+
+# -------------------------------
+# Backend lxml (optionnel : pip install lxml)
+# -------------------------------
+def _has_class(cls):
+    """Condition XPath équivalente à class_="..." de BeautifulSoup (un des mots de l'attribut class)."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')"
+
+def parse_lxml(html, book_url):
+    """Analyse en C avec lxml.html et requêtes XPath."""
+    from lxml import html as lxml_html
+    tree = lxml_html.fromstring(html)
+
+    product_main = tree.xpath(f"//div[{_has_class('product_main')}]")[0]
+    title = product_main.xpath(".//h1")[0].text_content().strip()
+
+    table = tree.xpath("//table[@class='table table-striped']")[0]
+    specs = {}
+    for row in table.xpath(".//tr"):
+        th, td = row.xpath("./th"), row.xpath("./td")
+        if th and td:
+            specs[th[0].text_content().strip()] = td[0].text_content().strip()
+
+    description_p = tree.xpath("//div[@id='product_description']/following::p[1]")
+    description = description_p[0].text_content().strip() if description_p else ""
+
+    category = tree.xpath(f"//ul[{_has_class('breadcrumb')}]//li")[2].text_content().strip()
+
+    rating_tag = product_main.xpath(f".//p[{_has_class('star-rating')}]")
+    rating = rating_tag[0].get("class").split()[1] if rating_tag else "Zero"
+
+    image_src = tree.xpath(f"//div[{_has_class('item')} and {_has_class('active')}]//img/@src")[0]
+    return build_record(book_url, title, specs, description, category, rating, image_src)
+
+
+# -------------------------------
+# Backend selectolax (optionnel : pip install selectolax)
+# -------------------------------
+def parse_selectolax(html, book_url):
+    """Analyse en C avec selectolax (moteur Lexbor) et sélecteurs CSS."""
+    from selectolax.lexbor import LexborHTMLParser
+    tree = LexborHTMLParser(html)
+
+    product_main = tree.css_first("div.product_main")
+    title = product_main.css_first("h1").text().strip()
+
+    specs = {}
+    for row in tree.css_first("table.table.table-striped").css("tr"):
+        th, td = row.css_first("th"), row.css_first("td")
+        if th and td:
+            specs[th.text().strip()] = td.text().strip()
+
+    # Le <p> de la description est le frère qui suit <div id="product_description">
+    description = ""
+    description_tag = tree.css_first("div#product_description")
+    if description_tag is not None:
+        p = tree.css_first("div#product_description ~ p")
+        description = p.text().strip() if p is not None else ""
+
+    category = tree.css("ul.breadcrumb li")[2].text().strip()
+
+    rating_tag = product_main.css_first("p.star-rating")
+    rating = rating_tag.attributes["class"].split()[1] if rating_tag is not None else "Zero"
+
+    image_src = tree.css_first("div.item.active img").attributes["src"]
+    return build_record(book_url, title, specs, description, category, rating, image_src)
+
+
+# -------------------------------
+# Pages de listing (catégorie) : un enregistrement par <article class="product_pod">
+# -------------------------------
+# Champs présents uniquement sur la fiche produit : ils restent vides en mode listing
+PRODUCT_ONLY_FIELDS = ("universal_product_code (upc)", "price_excluding_tax", "number_available", "product_description")
+
+def parse_listing_page(soup, category_name, page_url):
+    """
+    Construit les enregistrements des 20 livres d'une page de catégorie, sans ouvrir leurs fiches.
+    Les liens (fiche, miniature) sont résolus à partir de page_url, l'URL de la page de listing.
+    - title : attribut title du lien (le texte affiché est tronqué) ;
+    - price_including_tax : prix affiché ;
+    - number_available : "0" si le livre n'est pas en stock, vide sinon (le nombre exact n'est que sur la fiche) ;
+    - image_url : miniature de la page de listing (ce n'est pas la même image que celle de la fiche produit) ;
+    - UPC, prix HT, description : vides (voir PRODUCT_ONLY_FIELDS).
+    """
+    records = []
+    for pod in soup.select("article.product_pod"):
+        link = pod.select_one("h3 a")
+        rating_tag = pod.find("p", class_="star-rating")
+        rating = rating_tag["class"][1] if rating_tag else "Zero"
+        availability = pod.find("p", class_="availability")
+        in_stock = availability is not None and "In stock" in availability.text
+        records.append(Book.from_row({
+            "product_page_url": Scrapper_urls.resolve(page_url, link["href"]),
+            "universal_product_code (upc)": "",
+            "title": link.get("title", link.text).strip(),
+            "price_including_tax": pod.find("p", class_="price_color").text.strip(),
+            "price_excluding_tax": "",
+            "number_available": "" if in_stock else "0",
+            "product_description": "",
+            "category": category_name,
+            "review_rating": RATING_MAP.get(rating, 0),
+            "image_url": Scrapper_urls.resolve(page_url, pod.find("img")["src"]),
+        }))
+    return records
+
+
+# -------------------------------
+# Sélection du backend
+# -------------------------------
+BACKENDS = {
+    "html.parser": parse_html_parser,
+    "strainer": parse_strainer,
+    "lxml": parse_lxml,
+    "selectolax": parse_selectolax,
+}
+OPTIONAL_MODULES = {"lxml": "lxml", "selectolax": "selectolax"}
+
+def is_available(name):
+    """Vrai si le backend peut être utilisé (dépendance optionnelle installée)."""
+    module = OPTIONAL_MODULES.get(name)
+    if module is None:
+        return name in BACKENDS
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+def resolve_backend(name=None):
+    """ "auto" => lxml s'il est installé, sinon strainer. Lève ValueError si le nom est inconnu/indisponible."""
+    name = name or BACKEND
+    if name == "auto":
+        return "lxml" if is_available("lxml") else "strainer"
+    if name not in BACKENDS:
+        raise ValueError(f"Backend inconnu : {name} (choix : auto, {', '.join(BACKENDS)})")
+    if not is_available(name):
+        raise ValueError(f"Backend {name} indisponible : pip install {OPTIONAL_MODULES[name]}")
+    return name
+
+def set_backend(name):
+    """Change le backend utilisé par parse_book."""
+    global BACKEND
+    BACKEND = resolve_backend(name)
+    return BACKEND
+
+def parse_book(html, book_url, backend=None):
+    """Extrait le livre (Scrapper_record.Book) à partir du HTML de sa fiche produit."""
+    with Scrapper_metrics.timer("extract"):
+        return BACKENDS[resolve_backend(backend)](html, book_url)
+
+
+# -------------------------------
+# Vérification de parité sur des pages sauvegardées
+# -------------------------------
+def check_parity(paths, backends=None):
+    """
+    Compare chaque backend disponible au backend de référence (html.parser)
+    sur des fiches produit sauvegardées. Retourne (différences, temps moyen en ms par backend).
+    """
+    backends = [b for b in (backends or BACKENDS) if is_available(b)]
+    differences = []
+    timings = {b: 0.0 for b in backends}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        expected = parse_html_parser(html, path)
+        for name in backends:
+            start = time.perf_counter()
+            record = BACKENDS[name](html, path)
+            timings[name] += time.perf_counter() - start
+            for field, value in expected.items():
+                if record.get(field) != value:
+                    differences.append((path, name, field, value, record.get(field)))
+    n = max(len(paths), 1)
+    return differences, {name: total * 1000 / n for name, total in timings.items()}
+
+def main():
+    """python Scrapper_parsers.py tests/pages/*.html : vérifie que tous les backends donnent le même résultat."""
+    paths = sys.argv[1:]
+    if not paths:
+        print("Usage : python Scrapper_parsers.py <fiche1.html> [<fiche2.html> ...]")
+        sys.exit(2)
+    differences, timings = check_parity(paths)
+    for name, ms in timings.items():
+        print(f"[INFO] {name:12s} {ms:7.2f} ms/page")
+    for path, name, field, expected, got in differences[:20]:
+        print(f"[❌] {path} [{name}] {field} : {expected!r} != {got!r}")
+    if differences:
+        sys.exit(1)
+    print(f"[✅] {len(paths)} pages : tous les backends donnent les mêmes champs")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
-import requests                     # Bibliothèque qui permet d'envoyer des requêtes HTTP (télécharger des pages web)
+import Scrapper_http                # Transport HTTP partagé (connexions réutilisées) pour télécharger les pages web
 from bs4 import BeautifulSoup       # Outil pour analyser (parser) du HTML facilement 
-import csv                          # Pour écrire ou lire des fichiers CSV (tableurs)
+import Scrapper_storage             # Écriture CSV en continu (une ligne par livre, dès qu'il est extrait)
+import Scrapper_sqlite              # Base SQLite à la place du CSV (variable d'environnement SCRAPPER_DB)
+import Scrapper_urls                # Liens relatifs résolus comme dans un navigateur (../../ => URL complète)
 import re                           # Expressions régulières (recherche ou extraire des motifs dans du texte)
 
 
@@ -11,9 +13,6 @@ import re                           # Expressions régulières (recherche ou ext
 # Lien de la page de la catégorie "Fiction"
 BASE_URL = "https://books.toscrape.com/catalogue/category/books/fiction_10/index.html"          # URL de départ : page catégorie
 
-# Domaine de base du site (pour reconstruire les liens complets vers les livres et les images)
-DOMAIN = "https://books.toscrape.com/catalogue/"                                                # Préfixe commun aux URLs relatives des livres/images
-
 # -------------------------------
 # FONCTION : Télécharger et parser une page HTML
 # -------------------------------
@@ -23,7 +22,7 @@ def get_soup(url):
     et le convertit en objet "soup" (structure facile à analyser avec BeautifulSoup).
     """
     print(f"[INFO] Récupération de la page : {url}")        # Affiche dans la console l'URL en cours de chargement
-    response = requests.get(url)          # On envoie une requête HTTP GET pour obtenir la page
+    response = Scrapper_http.get(url)     # On envoie une requête HTTP GET pour obtenir la page
     response.raise_for_status()           # Si la page ne répond pas correctement, on arrête le script; Autrement lève une erreur si le statut HTTP n'est pas 200 (OK) 
     return BeautifulSoup(response.text, "html.parser")  # On transforme le HTML brut en objet exploitable
 
@@ -84,8 +83,8 @@ def extract_book_data(book_url):
     review_rating = rating_map.get(rating, 0)                                                           # Donne 0 si pas de note détextée 
 
     # ------------------ IMAGE ------------------
-    # L’URL de l’image est relative → on la transforme en URL complète
-    image_url = soup.find("div", class_="item active").img["src"].replace("../../", DOMAIN)             # Remplace le préfixe relatif par domain
+    # L’URL de l’image est relative ("../../media/...") → on la résout à partir de l'URL de la fiche
+    image_url = Scrapper_urls.resolve(book_url, soup.find("div", class_="item active").img["src"])      # URL complète de l'image
 
     # ------------------ DICTIONNAIRE FINAL ------------------
     # On renvoie toutes les informations dans une structure facile à écrire dans un CSV
@@ -122,39 +121,23 @@ def main():
     book_links = soup.select("h3 a")                                            # Séléctionne tous les <a> à l'intérieur des <h3>
     print(f"[INFO] {len(book_links)} livres trouvés sur la page Fiction")       # Affiche le nombre de livres détectés
 
-    # Liste pour stocker tous les résultats
-    all_books = []                                                              # Sera remplie de dictionnaire (1 par livre)
-
-    # Parcourir chaque lien de livre
-    for a in book_links:                                    # Pour chaque balise <a> (un livre)
-        relative_url = a["href"].replace("../../../", "")   # Nettoyage du lien relatif fournie par le site 
-        book_url = DOMAIN + relative_url                    # Construire l'URL absolue vers la fiche produit
-        book_data = extract_book_data(book_url)             # Scraper les infos détaillés du livre
-        all_books.append(book_data)                         # Ajouter le résultat à la liste globale aux résultats
-
     # ------------------ ÉCRITURE CSV ------------------
     csv_file = "fiction_books.csv"
     print(f"[INFO] Écriture des données dans le fichier : {csv_file}")
 
-    # On ouvre le fichier CSV et on écrit toutes les données
-    with open(csv_file, "w", newline="", encoding="utf-8") as f:                # Ouvre le fichier en écriture, encodage UTF-8
-        writer = csv.DictWriter(f, fieldnames=[                                 # Prépare un fichier CSV avec des colonnes nomées
-            "product_page_url",
-            "universal_product_code (upc)",
-            "title",
-            "price_including_tax",
-            "price_excluding_tax",
-            "number_available",
-            "product_description",
-            "category",
-            "review_rating",
-            "image_url"
-        ])
-        writer.writeheader()      # On écrit la première ligne (les noms de colonnes)       # écrit la ligne d'en-tête (noms des colonnes)
-        writer.writerows(all_books)  # On écrit toutes les lignes de données                # écrit une ligne par dictionnaire de all_books
+    # On ouvre le fichier CSV (en-tête écrit tout de suite) puis chaque livre y est écrit dès qu'il est scrapé
+    store = Scrapper_sqlite.from_env("phase1")                  # Base SQLite si SCRAPPER_DB est défini
+    with Scrapper_storage.open_sink(csv_file, store=store) as sink:
+        # Parcourir chaque lien de livre
+        for a in book_links:                                    # Pour chaque balise <a> (un livre)
+            book_url = Scrapper_urls.resolve(BASE_URL, a["href"])   # URL absolue de la fiche produit (lien relatif à la page)
+            book_data = extract_book_data(book_url)             # Scraper les infos détaillés du livre
+            sink.write(book_data)                               # Écrire la ligne du livre dans le CSV
+    if store is not None:
+        store.close()                                           # Dernier lot écrit dans la base
 
     print("[✅] Scraping terminé avec succès !")                                            # Message de succès
-    print(f"[✅] Les données ont été sauvegardées dans le fichier : {csv_file}")            # Confirmation du fichier crée
+    print(f"[✅] Les données ont été sauvegardées dans le fichier : {sink.path}")           # Confirmation du fichier crée
 
 # -------------------------------
 # POINT D’ENTRÉE DU SCRIPT
@@ -1,13 +1,14 @@
-import requests                     # Librairie qui permet de télécharger des pages web (faire des requêtes HTTP)
+import Scrapper_http                # Transport HTTP partagé qui permet de télécharger des pages web (connexions réutilisées)
 from bs4 import BeautifulSoup       # Librairie qui permet d'analyser (parser) du code HTML facilement
-import csv                          # Librairie pour écrire et lire des fichiers CSV
+import Scrapper_storage             # Écriture CSV en continu (une ligne par livre, dès qu'il est extrait)
+import Scrapper_sqlite              # Base SQLite à la place du CSV (variable d'environnement SCRAPPER_DB)
+import Scrapper_urls                # Liens relatifs résolus comme dans un navigateur, pages et livres déjà vus
 import re                           # Librairie pour travailler avec les expressions régulières (chercher un motif dans du texte)
 
 # -------------------------------
 # CONFIGURATION
 # -------------------------------
 BASE_URL = "https://books.toscrape.com/catalogue/category/books/fiction_10/"        # l'adresse de la catégorie Fiction du site 
-DOMAIN = "https://books.toscrape.com/catalogue/"                                    # utilisé pour reconstruire les liens complets des livres
 
 
 # -------------------------------
@@ -16,7 +17,7 @@ DOMAIN = "https://books.toscrape.com/catalogue/"
 def get_soup(url):
     """Télécharge et parse une page HTML"""
     print(f"[INFO] Récupération de la page : {url}")                # Message d'info pour l'utilisateur 
-    response = requests.get(url)                                    # Télécharge la page web 
+    response = Scrapper_http.get(url)                               # Télécharge la page web 
     response.raise_for_status()                                     # Vérifie qu'il n'y a pas d'erreur (404, 500, ...)
     return BeautifulSoup(response.text, "html.parser")              # Transforme le HTML en objet BeautifulSoup
 
@@ -64,7 +65,7 @@ def extract_book_data(book_url):
     review_rating = rating_map.get(rating, 0)
 
     # Image
-    image_url = soup.find("div", class_="item active").img["src"].replace("../../", DOMAIN)
+    image_url = Scrapper_urls.resolve(book_url, soup.find("div", class_="item active").img["src"])   # "../../media/..." => URL complète
 
     # Retourne toutes les infos dans un dictionnaire 
     return {
@@ -82,13 +83,13 @@ def extract_book_data(book_url):
 
     # Fonction pour scraper toute une catégorie
 def scrape_category(base_url):
-    """Scrape toutes les pages d'une catégorie"""
-    all_books = []
+    """Scrape toutes les pages d'une catégorie (générateur : les livres sont produits un par un)"""
     page_url = base_url + "index.html"
+    frontier = Scrapper_urls.Frontier()     # Pages et livres déjà vus : jamais téléchargés deux fois
     
     # Boucle sur toutes les pages
 
-    while page_url:
+    while page_url and frontier.add(page_url):
         soup = get_soup(page_url)
 
         # Récupérer les liens des livres sur cette page
@@ -97,53 +98,39 @@ def scrape_category(base_url):
         
     # Extraire chaque livre 
         for a in book_links:
-            relative_url = a["href"].replace("../../../", "")       # Nettoyer l'URL 
-            book_url = DOMAIN + relative_url                        # Construire l'URL complète
+            book_url = Scrapper_urls.resolve(page_url, a["href"])   # URL complète (lien relatif à la page)
+            if not frontier.add(book_url):
+                continue                                            # Livre déjà scrapé sur une page précédente
             book_data = extract_book_data(book_url)                 # Scraper le livre 
-            all_books.append(book_data)                             # Ajouter à la liste 
+            yield book_data                                         # Transmettre le livre tout de suite (rien n'est gardé en mémoire)
 
         # Vérifier s’il y a une page suivante
         next_button = soup.find("li", class_="next")
         if next_button:
-            next_page = next_button.a["href"]
-            page_url = base_url + next_page
+            page_url = Scrapper_urls.resolve(page_url, next_button.a["href"])
         else:
             page_url = None  # Pas de page suivante, on sort de la boucle
-            
-        # Retourner la liste des livres 
-    return all_books
 # -------------------------------
 # Fonction principale
 # -------------------------------
 def main():
     print("[INFO] Début du scraping de la catégorie Fiction")
-    all_books = scrape_category(BASE_URL)                       # Récupération de tous les livres
 
-    # Écriture des résultats dans un fichier CSV
+    # Écriture des résultats dans un fichier CSV, au fur et à mesure du scraping
     csv_file = "All_fiction_books.csv"
     print(f"[INFO] Écriture des données dans le fichier : {csv_file}")
 
-    with open(csv_file, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=[
-            "product_page_url",
-            "universal_product_code (upc)",
-            "title",
-            "price_including_tax",
-            "price_excluding_tax",
-            "number_available",
-            "product_description",
-            "category",
-            "review_rating",
-            "image_url"
-        ])
-        writer.writeheader()                # écrire la première ligne (titres des colonnes)
-        writer.writerows(all_books)         # écrire toutes les lignes (livres)
+    store = Scrapper_sqlite.from_env("phase2")     # Base SQLite si SCRAPPER_DB est défini
+    with Scrapper_storage.open_sink(csv_file, store=store) as sink:
+        sink.write_all(scrape_category(BASE_URL))   # chaque livre est écrit dès qu'il est scrapé
+    if store is not None:
+        store.close()                               # Dernier lot écrit dans la base
 
 # -------------------------------
 # Message final
 # -------------------------------
     print("[✅] Scraping terminé avec succès !")
-    print(f"[✅] {len(all_books)} livres ont été sauvegardés dans {csv_file}")
+    print(f"[✅] {sink.count} livres ont été sauvegardés dans {sink.path}")
 
 # -------------------------------
 # Lancer le programme
@@ -1,28 +1,42 @@
-import requests                 # permet de télécharger des pages web (HTTP)
+import requests                 # types d'erreurs réseau (une page en échec n'arrête pas le scraping)
+import Scrapper_http            # transport HTTP partagé pour télécharger des pages web (connexions réutilisées)
 from bs4 import BeautifulSoup   # permet d'analyser (parser) du HTML facilement
-import csv                      # pour écrire les données dans un fichier CSV
+import Scrapper_storage         # pour écrire les données dans un fichier CSV, au fur et à mesure
 import re                       # pour utiliser des expressions régulières (extractions de texte)
 from tqdm import tqdm           # ✅ affiche une barre de progression dans la console
+import Scrapper_journal         # journal de crawl : reprise après une interruption
+import Scrapper_metrics         # temps par étape (variable d'environnement SCRAPPER_METRICS=1)
+import Scrapper_dataset         # export Parquet / Arrow en plus des CSV (variable d'environnement SCRAPPER_DATASET)
+import Scrapper_sqlite          # base SQLite à la place des CSV (variable d'environnement SCRAPPER_DB)
+import Scrapper_urls            # liens relatifs résolus comme dans un navigateur, pages et livres déjà vus
+import Scrapper_retry           # pages en échec après les réessais (dead letters)
 
 # Domaine principal du site (utilisé pour construire des URLs complètes)
 BASE_SITE = "https://books.toscrape.com/"
 
-# Partie du site où se trouvent les fiches détaillées des livres
-CATALOGUE = "https://books.toscrape.com/catalogue/"
+# Journal de reprise (supprimé à la fin d'un run complet)
+JOURNAL_FILE = "crawl_journal_V2.jsonl"
+
+# Pages en échec après tous les réessais (le run suivant reprend avec le journal et ne retente qu'elles)
+DEAD_LETTERS_FILE = "dead_letters_V2.jsonl"
 
 # Fonctions utilitaires
 def get_soup(url):
     """Télécharge et parse une page HTML."""
-    response = requests.get(url) # envoie une requête HTTP GET vers l'URL
+    response = Scrapper_http.get(url) # envoie une requête HTTP GET vers l'URL
     response.raise_for_status()  # lève une erreur si le statut HTTP n'est pas 200 (OK)
     
     # Transforme le texte HTML en un objet BeautifulSoup pour faciliter la recherche d'éléments
-    return BeautifulSoup(response.text, "html.parser")
+    with Scrapper_metrics.timer("parse"):
+        return BeautifulSoup(response.text, "html.parser")
 
 #   Extraction d'un livre 
 
-def extract_book_data(book_url):
+def extract_book_data(book_url, journal=None):
     """Scrape toutes les infos d'un livre donné (à partir de son URL)."""
+    # Livre déjà scrapé avant une interruption : on le reprend tel quel dans le journal
+    if journal is not None and journal.book(book_url) is not None:
+        return journal.book(book_url)
     soup = get_soup(book_url)
 
 #   La selection "product_main" contient titre, prix, rating, etc.
@@ -67,11 +81,11 @@ def extract_book_data(book_url):
     review_rating = rating_map.get(rating, 0)                               # Convertit en entier (O si absent)
 
     # URL de l'Image
-    # L'attribut src est relatif (commence par ../../); on le convertit en URL absolue
-    image_url = soup.find("div", class_="item active").img["src"].replace("../../", CATALOGUE)
+    # L'attribut src est relatif à la fiche ("../../media/..."); on le résout en URL absolue (à la racine du site)
+    image_url = Scrapper_urls.resolve(book_url, soup.find("div", class_="item active").img["src"])
 
     # On renvoie toutes les informations sous forme de dictionnaire (clé=> valeur)
-    return {
+    book_data = {
         "product_page_url": book_url,
         "universal_product_code (upc)": upc,
         "title": title,
@@ -83,82 +97,150 @@ def extract_book_data(book_url):
         "review_rating": review_rating,
         "image_url": image_url
     }
+    if journal is not None:
+        journal.record_book(book_url, book_data)    # Noté dans le journal : pas re-téléchargé en cas de reprise
+    return book_data
 
 
     # Scraping d'une catégorie complète 
-def scrape_category(category_name, category_url):
-    """Scrape toutes les pages et livres d'une catégorie donnée avec barre de progression."""
+def scrape_category(category_name, category_url, journal=None, dataset=None, store=None, frontier=None, books=None,
+                    dead_letters=None):
+    """
+    Scrape toutes les pages et livres d'une catégorie donnée avec barre de progression.
+    dataset : export Parquet / Arrow (Scrapper_dataset.DatasetWriter) qui reçoit aussi chaque livre.
+    store : base SQLite (Scrapper_sqlite.BookStore) où vont les livres à la place du CSV.
+    frontier : pages et livres déjà vus pendant le run (Scrapper_urls.Frontier), jamais téléchargés deux fois.
+    books : livres déjà extraits pendant le run (url -> livre) : un livre listé dans plusieurs catégories
+    est écrit dans chaque CSV, sans nouvelle requête.
+    dead_letters : une page ou un livre en échec après les réessais y est noté et le scraping continue sans lui;
+    la catégorie n'est alors pas marquée terminée dans le journal.
+    """
+    journal = journal or Scrapper_journal.NullJournal()     # Sans journal : rien n'est noté ni repris
+    if dead_letters is None:
+        dead_letters = Scrapper_retry.DeadLetters(None)     # Échecs gardés en mémoire seulement
+    frontier = frontier if frontier is not None else Scrapper_urls.Frontier()
+    books = books if books is not None else {}
+    listed = set()                          # Livres déjà écrits dans ce CSV
     print(f"\n[INFO] Début du scraping de la catégorie : {category_name}")
-    all_books = []                          # Liste qui contiendra les dictionnaires de tous les livres 
+    Scrapper_metrics.set_category(category_name)    # les mesures suivantes sont rangées dans cette catégorie
+    if journal.category_done(category_name):
+        print("[INFO] Catégorie déjà terminée lors du run précédent")
+        return
     page_url = category_url                 # URL courante de page (on commence par la première)
 
-    # On boucle tant qu'il existe une page à traiter 
-    while page_url:
-        soup = get_soup(page_url)       # Télécharge/parse la page de la catégorie
+    # Sauvegarde des résultats dans un CSV spécifique à la catégorie, écrit au fil du scraping
+    filename = f"V2_{category_name.replace(' ', '_')}.csv"                  # Nom de fichier basé sur la catégorie
+    print(f"[INFO] Écriture des données dans le fichier : {filename}")
+    sink = Scrapper_storage.open_sink(filename, dataset, store)     # écrit tout de suite la ligne d'en-têtes de colonnes
 
-        # Liens des livres sur la page
-        # Chaque livre est dans un <h3><a href="..."></a></h3>
-        book_links = soup.select("h3 a")
+    # On boucle tant qu'il existe une page à traiter 
+    while page_url and frontier.add(page_url):     # Page déjà lue pendant ce run : la pagination boucle, on arrête
+        entry = journal.listing(page_url)   # Page déjà lue avant une interruption ?
+        if entry:
+            book_urls, next_url = entry["books"], entry["next"]
+        else:
+            try:
+                soup = get_soup(page_url)   # Télécharge/parse la page de la catégorie
+            except requests.RequestException as e:
+                dead_letters.add("listing", page_url, e, category=category_name)
+                break                       # Sans cette page, on ne connaît pas la suivante
+
+            # Liens des livres sur la page
+            # Chaque livre est dans un <h3><a href="..."></a></h3>
+            # Les URLs de détail sont relatives ("../../../livre_1/index.html"); on les résout à partir de la page
+            book_urls = [Scrapper_urls.resolve(page_url, a["href"]) for a in soup.select("h3 a")]
+
+            # Pagination : Vérifier s’il y a une page suivante
+            next_button = soup.find("li", class_="next")        # <li class="next"><a href="page-2.html">
+            if next_button:
+                next_url = Scrapper_urls.resolve(page_url, next_button.a["href"])   # "page-2.html" => URL complète
+            else:
+                next_url = None                                 # Plus de page suivante => on arrête la boucle 
+            journal.record_listing(page_url, next_url, book_urls)
 
         # ✅ Barre de progression sur les livres de cette page
-        for a in tqdm(book_links, desc=f"Scraping {category_name}", unit="livre"):
-        #   Les URLs de détail sont relatives; on enlève "../../../" pour construire une URL complète
-            relative_url = a["href"].replace("../../../", "")
-            book_url = CATALOGUE + relative_url                 # Construit l'URL absolue du livre 
-            book_data = extract_book_data(book_url)             # Récupère les infos du livre 
-            all_books.append(book_data)                         # Ajoute le dictionnaire à la liste 
-
-        # Pagination : Vérifier s’il y a une page suivante
-        next_button = soup.find("li", class_="next")        # <li class="next"><a href="page-2.html">
-        if next_button:
-            next_page = next_button.a["href"]               # "page-2.html" (exemple)
-            base = page_url.rsplit("/", 1)[0] + "/"         # On garde le dossier de base de la page courante
-            page_url = base + next_page                     # Construit l'URL de la page suivante
-        else:
-            page_url = None                                 # Plus de page suivante => on arrête la boucle 
+        unique = []
+        for book_url in book_urls:          # Livre listé deux fois dans la catégorie : écrit une seule fois
+            if book_url not in listed:
+                listed.add(book_url)
+                unique.append(book_url)
+        for book_url in tqdm(unique, desc=f"Scraping {category_name}", unit="livre"):
+            # Livre déjà lu dans une autre catégorie pendant ce run : pas re-téléchargé
+            book_data = None if frontier.add(book_url) else books.get(book_url)
+            if book_data is None:
+                try:
+                    with Scrapper_metrics.timer("book"):
+                        book_data = extract_book_data(book_url, journal)    # Récupère les infos du livre
+                except requests.RequestException as e:
+                    dead_letters.add("book", book_url, e, category=category_name)
+                    continue                                    # Les autres livres de la page continuent
+            books[book_url] = book_data
+            sink.write(book_data)                               # Écrit la ligne du livre dans le CSV
+
+        page_url = next_url
+
+    sink.close()
+    if category_name in dead_letters.categories():
+        print(f"[⚠️] {sink.count} livres sauvegardés dans {sink.path}, des pages sont en échec (voir {DEAD_LETTERS_FILE})")
+        return
 
-    # Sauvegarde des résultats dans un CSV spécifique à la catégorie
-    filename = f"V2_{category_name.replace(' ', '_')}.csv"                  # Nom de fichier basé sur la catégorie
-    print(f"[INFO] Écriture des données dans le fichier : {filename}")
-    # Ouverture du fichier en écriture, encodage UTF-8, sans lignes vides superflues (newline="")
-    with open(filename, "w", newline="", encoding="utf-8") as f:
-    # On définit l'ordre et les noms des colonnes
-        writer = csv.DictWriter(f, fieldnames=[
-            "product_page_url",
-            "universal_product_code (upc)",
-            "title",
-            "price_including_tax",
-            "price_excluding_tax",
-            "number_available",
-            "product_description",
-            "category",
-            "review_rating",
-            "image_url"
-        ])
-        writer.writeheader()                    # écrit la première ligne d'en-têtes de colonnes
-        writer.writerows(all_books)             # écrit chaque dictionnaire de all_books comme une ligne csv
-        
 # Petit récapitulatif en console
-    print(f"[✅] {len(all_books)} livres sauvegardés dans {filename}")
+    journal.record_category(category_name)
+    print(f"[✅] {sink.count} livres sauvegardés dans {sink.path}")
 
 # Point d'entrée principal
 
-def main():
-    """Scrape tout le site et génère un CSV par catégorie."""
+def main(resume=True):
+    """
+    Scrape tout le site et génère un CSV par catégorie.
+    Si un run précédent s'est arrêté en cours de route, il reprend là où il s'était arrêté
+    (journal crawl_journal_V2.jsonl; resume=False pour repartir de zéro).
+    Les pages en échec après les réessais sont notées dans dead_letters_V2.jsonl : le journal est alors gardé
+    et relancer le script ne retente que ces pages.
+    """
     print("[INFO] Scraping du site complet en cours...")
+    journal = Scrapper_journal.CrawlJournal(JOURNAL_FILE, "full", resume)
+    if journal.resumed:
+        print(f"[INFO] Reprise du run interrompu : {len(journal.done)} catégories et {len(journal.books)} livres déjà faits")
 
-    soup = get_soup(BASE_SITE)          # Récupère la page d'accueil 
+    if journal.categories is None:
+        soup = get_soup(BASE_SITE)          # Récupère la page d'accueil 
 
-    # Récupéreration de la liste des catégories depuis la barre latérale)
-    categories = soup.select("div.side_categories ul li ul li a")
+        # Récupéreration de la liste des catégories depuis la barre latérale)
+        categories = soup.select("div.side_categories ul li ul li a")
+        # Nom affiché de la catégorie et URL absolue de la catégorie
+        journal.record_categories([(cat.text.strip(), Scrapper_urls.resolve(BASE_SITE, cat["href"])) for cat in categories])
 
 # On parcourt chaque lien de catégorie
-    for cat in categories:
-        category_name = cat.text.strip()                # Nom affiché de la catégorie
-        category_url = BASE_SITE + cat["href"]          # URL absolue de la catégorie
-        scrape_category(category_name, category_url)    # Scrape et exporte le CSV
-
-    print("\n[✅] Scraping du site terminé avec succès !")
+    dataset = Scrapper_dataset.from_env()   # Export en colonnes si SCRAPPER_DATASET est défini
+    store = Scrapper_sqlite.from_env("phase3") # Base SQLite à la place des CSV si SCRAPPER_DB est défini
+    frontier = Scrapper_urls.Frontier()         # Pages et livres déjà vus : jamais téléchargés deux fois
+    books = {}                                  # Livres déjà lus, réécrits dans chaque catégorie qui les liste
+    dead_letters = Scrapper_retry.DeadLetters(DEAD_LETTERS_FILE)   # Pages en échec : notées, le scraping continue
+    try:
+        for category_name, category_url in journal.categories:
+            scrape_category(category_name, category_url, journal, dataset, store, frontier, books,
+                            dead_letters)   # Scrape et exporte le CSV
+    finally:
+        if dataset is not None:
+            dataset.close()             # Dernier lot écrit même après une erreur
+        if store is not None:
+            store.close()
+    dead_letters.close()
+    if dead_letters:
+        journal.close()                 # Gardé : le prochain run ne retente que les échecs
+        print(f"\n[⚠️] {len(dead_letters)} pages en échec (voir {DEAD_LETTERS_FILE}) : relancez le script pour les retenter")
+    else:
+        journal.finish()                # Tout est fait : le journal est supprimé
+    if dataset is not None:
+        print(f"[INFO] Export en colonnes : {dataset.count} livres dans {dataset.path}")
+
+    print("\n[✅] Scraping du site terminé !" if dead_letters else "\n[✅] Scraping du site terminé avec succès !")
+    print(f"[INFO] Réseau : {Scrapper_http.format_stats()}")
+    print(f"[INFO] Frontière : {frontier.report()}")
+    if Scrapper_metrics.ENABLED:
+        print(f"[INFO] Temps par étape :\n{Scrapper_metrics.format_summary()}")
+        print("[INFO] Mesures détaillées : {} et {}".format(*Scrapper_metrics.dump("V2")))
 
 # Lancement du script uniquement si exécuté directement 
 # Ce bloc empêche l'éxécution de main() quand le fichier est importé comme module. 
@@ -1,173 +1,300 @@
-import requests                     # Bibliothèque qui permet d'envoyer des requêtes HTTP (télécharger des pages web)
+import Scrapper_http                # Transport HTTP partagé (connexions réutilisées) pour télécharger pages et images
+import requests                     # Types d'erreurs réseau (une URL en échec n'arrête pas le crawl)
 from bs4 import BeautifulSoup       # Librairie qui permet d'analyser (parser) du HTML facilement 
-import csv                          # Permet d'écrire ou lire des fichiers CSV (tableurs)
+import Scrapper_storage             # Écriture des fichiers CSV (tableurs) au fur et à mesure
 import os                           # Permet de gérer les fichiers et dossiers (création et enregistrement)
 from tqdm import tqdm               # Permet d'afficher une barre de progression sympa pendant les boucles 
+import Scrapper_parsers             # Extraction des champs d'une fiche produit (backend HTML au choix)
+import Scrapper_journal             # Journal de crawl : reprise après une interruption
+import Scrapper_images              # Téléchargement des images (streaming, en parallèle, sans doublon)
+import re                           # Lecture du pager "Page 1 of N"
+import Scrapper_metrics             # Temps par étape (variable d'environnement SCRAPPER_METRICS=1)
+import Scrapper_retry               # URLs en échec après réessais (dead letters)
+import Scrapper_dataset             # Export Parquet / Arrow en plus des CSV (variable d'environnement SCRAPPER_DATASET)
+import Scrapper_sqlite              # Base SQLite à la place des CSV (variable d'environnement SCRAPPER_DB)
+import Scrapper_urls                # Liens résolus comme dans un navigateur, URLs déjà vues (frontière)
 
 # -------------------------------
 # CONFIGURATION DE BASE
 # -------------------------------
 
 BASE_URL = "https://books.toscrape.com/"                # L'URL de la page d'accueil
-DOMAIN = "https://books.toscrape.com/catalogue/"        # Domaine utilisé pour reconstruire les liens des livres 
+JOURNAL_FILE = "crawl_journal_V4.jsonl"                 # Journal de reprise (supprimé à la fin d'un run complet)
+DEAD_LETTERS_FILE = "dead_letters_V4.jsonl"             # URLs en échec après tous les réessais
+PAGER_RE = re.compile(r"Page\s+(\d+)\s+of\s+(\d+)")     # Pager des pages de catégorie
 
 # -------------------------------
 # Télécharger et analyser une page HTML
 # -------------------------------
 def get_soup(url):
     """Télécharge le contenu HTML d'une page et retourne un objet BeautifulSoup."""
-    response = requests.get(url)                            # Télécharger la page depuis internet 
+    response = Scrapper_http.get(url)                       # Télécharger la page depuis internet 
     response.raise_for_status()                             # Vérifie qu'il n' y a pas d'erreur (402, 500...)
-    return BeautifulSoup(response.text, "html.parser")      # Transforme le texte HTML en objet manipulable 
+    with Scrapper_metrics.timer("parse"):
+        return BeautifulSoup(response.text, "html.parser")  # Transforme le texte HTML en objet manipulable 
+
+def get_html(url):
+    """Télécharge une page et retourne son HTML brut (texte), sans le parser."""
+    response = Scrapper_http.get(url)
+    response.raise_for_status()
+    return response.text
 
 # -------------------------------
 # Extraction des informations d'un livre
 # -------------------------------
 
-def extract_book_data(book_url, category_name, images_dir):
-    """Extrait toutes les informations d'un livre donné et télécharge son image."""
-    soup = get_soup(book_url)                                                           # On télécharge la page du livre 
-    product_main = soup.find("div", class_="product_main")                              # On récupère le bloc principal (titre,prix, etc.)
+def parse_book_page(html, book_url):
+    """
+    Extrait les informations d'un livre à partir du HTML de sa fiche produit (sans réseau).
+    Le moteur d'analyse (html.parser, strainer, lxml, selectolax) se choisit avec
+    la variable d'environnement SCRAPPER_PARSER (voir Scrapper_parsers.py).
+    """
+    return Scrapper_parsers.parse_book(html, book_url)
 
-    # Titre du livre
-    title = product_main.find("h1").text.strip()
+# -------------------------------
+# Téléchargement de l'image d'un livre
+# -------------------------------
+def image_path(images_dir, category_name, upc):
+    """Chemin local de l'image d'un livre : <images_dir>/<catégorie>/<upc>.jpg"""
+    return os.path.join(images_dir, category_name, f"{upc}.jpg")
 
-    # Tableau d'infos produit (UPC, prix, disponibilité, etc.)
-    table = soup.find("table", class_="table table-striped")    # Le tableau des infos (UPC, prix, etc.)
-    # On transforme le HTML en dictionnaire Python
-    data = {row.th.text.strip(): row.td.text.strip() for row in table.find_all("tr")}
-    
-    # On récupère les infos principales
-    upc = data.get("UPC")
-    price_excl_tax = data.get("Price (excl. tax)")
-    price_incl_tax = data.get("Price (incl. tax)")
-    availability = data.get("Availability")
-
-    # Nombre d'exemplaires disponibles (extraction via regex)
-    number_available = "0"
-    if availability:
-        import re
-        match = re.search(r"\((\d+) available\)", availability)         # Cherche un nombre dans le texte
-        number_available = match.group(1) if match else "0"
-
-    # Description du livre 
-    description_tag = soup.find("div", id="product_description")
-    product_description = description_tag.find_next("p").text.strip() if description_tag else ""
+def download_image(image_url, image_filename, title):
+    """Télécharge une image et l'enregistre sur le disque (les erreurs sont affichées, pas levées). Retourne True si l'image est écrite."""
+    try:
+        # Écrit par morceaux dans un fichier temporaire puis renommé (le dossier de la catégorie est créé si besoin)
+        Scrapper_images.download_image(image_url, image_filename)
+        return True
+    except Exception as e:
+        print(f"⚠️ Erreur lors du téléchargement de l'image pour {title}: {e}")
+        return False
 
-    # -------------------------------
-    # Catégorie du livre
-    # -------------------------------
-    # Catégorie (breadcrumb → le 3e élément est la catégorie)
-    category = soup.find("ul", class_="breadcrumb").find_all("li")[2].text.strip()
+def extract_book_data(book_url, category_name, images_dir, journal=None, images=None, book_data=None):
+    """
+    Extrait toutes les informations d'un livre donné et télécharge son image (sauf si elle est déjà sur le disque).
+    images : ImagePipeline qui télécharge l'image en arrière-plan (sinon elle est téléchargée tout de suite).
+    category_name None : l'image est rangée dans la catégorie lue sur la fiche (fil d'Ariane).
+    book_data : livre déjà extrait pendant le run (listé dans une autre catégorie) : seule son image est rangée.
+    """
+    journal = journal or Scrapper_journal.NullJournal()
+    if book_data is None:
+        book_data = journal.book(book_url)                      # Livre déjà scrapé avant une interruption ?
+    if book_data is None:
+        html = get_html(book_url)                               # On télécharge la page du livre 
+        book_data = parse_book_page(html, book_url)             # On extrait les champs
+        journal.record_book(book_url, book_data)
 
-    # Note (nombre d'étoiles)
-    # Note (ex: "star-rating Three")
-    rating_tag = product_main.find("p", class_="star-rating")
-    rating = rating_tag["class"][1] if rating_tag else "Zero"
-    rating_map = {"One": 1, "Two": 2, "Three": 3, "Four": 4, "Five": 5}         # Exemple: "One", "Two", "Three"...
-    review_rating = rating_map.get(rating, 0)                                   # On converti en chiffre
+    # --- Téléchargement de l'image ---
+    # Le nom de l'image = code UPC du livre
+    image_filename = image_path(images_dir, category_name or book_data["category"],
+                                book_data["universal_product_code (upc)"])
+    if images is not None:
+        images.submit(book_data["image_url"], image_filename, book_data["title"], journal.record_image)
+    elif not Scrapper_images.is_present(image_filename):
+        if download_image(book_data["image_url"], image_filename, book_data["title"]):
+            journal.record_image(image_filename)
+    return book_data
 
-    # URL de l'image (corriger le chemin relatif → URL absolue)
-    image_url = soup.find("div", class_="item active").img["src"].replace("../../", BASE_URL)
+# -------------------------------
+# Lecture d'une page de catégorie
+# -------------------------------
+def listing_page(soup, page_url, category_name):
+    """Retourne (livres de la page, URL de la page suivante ou None)."""
+    records = Scrapper_parsers.parse_listing_page(soup, category_name, page_url)
+    next_button = soup.find("li", class_="next")
+    if next_button:
+        return records, Scrapper_urls.resolve(page_url, next_button.a["href"])     # "page-2.html" => URL complète
+    return records, None
 
-    # --- Téléchargement de l'image ---
-    os.makedirs(os.path.join(images_dir, category_name), exist_ok=True)     # Créer un dossier pour la catégorie (si déjà existant => pas d'erreur)
-    image_filename = os.path.join(images_dir, category_name, f"{upc}.jpg")  # Le nom de l'image = code UPC du livre
-    try:
-        img_data = requests.get(image_url).content              # Télécharger l'image 
-        with open(image_filename, "wb") as handler:             # Ouvre le fichier en mode "binaire"
-            handler.write(img_data)                             # Enregistre l'image sur le disque
-    except Exception as e:
-        print(f"⚠️ Erreur lors du téléchargement de l'image pour {title}: {e}")
+def page_count(soup):
+    """
+    Nombre de pages de la catégorie, lu dans le pager de la première page ("Page 1 of N").
+    None si le pager est absent (catégorie d'une seule page) ou illisible.
+    """
+    current = soup.find("li", class_="current")
+    match = PAGER_RE.search(current.text) if current else None
+    if not match or match.group(1) != "1":
+        return None
+    return int(match.group(2))
 
-    # Retourner toutes les informations sous forme de dictionnaire
-    return {
-        "product_page_url": book_url,
-        "universal_product_code (upc)": upc,
-        "title": title,
-        "price_including_tax": price_incl_tax,
-        "price_excluding_tax": price_excl_tax,
-        "number_available": number_available,
-        "product_description": product_description,
-        "category": category,
-        "review_rating": review_rating,
-        "image_url": image_url
-    }
+def page_urls(page_url, count):
+    """URLs des pages 2 à count d'une catégorie (page-2.html ... page-N.html, à côté de index.html)."""
+    return [Scrapper_urls.resolve(page_url, f"page-{number}.html") for number in range(2, count + 1)]
+
+# -------------------------------
+# Sauvegarde CSV d'une catégorie
+# -------------------------------
+def csv_path(category_name, listing_only=False):
+    """csv/V4_<catégorie>.csv (ou csv/V4_<catégorie>_listing.csv en mode listing)."""
+    suffix = "_listing" if listing_only else ""
+    return os.path.join("csv", f"V4_{category_name}{suffix}.csv")
+
+def open_csv(category_name, listing_only=False, dataset=None, store=None):
+    """
+    Ouvre le CSV de la catégorie (dossier "csv" créé si besoin) : les livres y sont écrits un par un.
+    dataset : export Parquet / Arrow (Scrapper_dataset.DatasetWriter) qui reçoit aussi chaque livre.
+    store : base SQLite (Scrapper_sqlite.BookStore) où vont les livres à la place du CSV.
+    """
+    return Scrapper_storage.open_sink(csv_path(category_name, listing_only), dataset, store)
 
     # Scraper une catégorie entière 
-def scrape_category(category_name, category_url):
-    """Scrape tous les livres d'une catégorie donnée et sauvegarde un CSV + images."""
+def scrape_category(category_name, category_url, listing_only=False, journal=None, images=None, dead_letters=None,
+                    dataset=None, store=None, frontier=None, books=None):
+    """
+    Scrape tous les livres d'une catégorie donnée et sauvegarde un CSV + images.
+    listing_only=True : les livres sont lus directement sur les pages de la catégorie
+    (20 livres par requête, sans fiche produit ni image; voir Scrapper_parsers.parse_listing_page).
+    journal : ce qui est déjà dans le journal (pages, livres, images) n'est pas re-téléchargé.
+    images : ImagePipeline partagé (sinon la catégorie crée le sien et attend la fin de ses images).
+    dead_letters : une page ou une fiche en échec après les réessais y est notée et le crawl continue sans elle;
+    la catégorie n'est alors pas marquée terminée (le run suivant ne retente que ces URLs).
+    dataset, store : export Parquet / Arrow et base SQLite (voir open_csv).
+    frontier : URLs déjà vues pendant le run (Scrapper_urls.Frontier); une page ou une fiche déjà vue n'est pas
+    re-téléchargée. books : livres déjà extraits pendant le run (url de fiche -> livre) : un livre listé dans
+    plusieurs catégories est écrit dans chacune (comme sur le site), avec la fiche lue une seule fois.
+    """
+    journal = journal or Scrapper_journal.NullJournal()
+    if dead_letters is None:
+        dead_letters = Scrapper_retry.DeadLetters(None)
+    frontier = frontier if frontier is not None else Scrapper_urls.Frontier()
+    books = books if books is not None else {}
+    listed = set()                  # Fiches déjà écrites dans cette catégorie (un doublon du listing n'est écrit qu'une fois)
     print(f"\n📚 Scraping catégorie: {category_name}")
+    Scrapper_metrics.set_category(category_name)   # Les mesures suivantes sont rangées dans cette catégorie
+    if journal.category_done(category_name):
+        print("⏭️  Catégorie déjà terminée lors du run précédent")
+        return
 
     page_url = category_url         # Lien de départ
-    all_books = []                  # Liste où l'on stocke les infos de tous les livres
+    sink = open_csv(category_name, listing_only, dataset, store)    # CSV écrit au fur et à mesure (rien n'est gardé en mémoire)
     images_dir = "V4_images"        # Dossier de sauvegarde des images
+    own_images = images is None and not listing_only
+    if own_images:
+        images = Scrapper_images.ImagePipeline(dead_letters=dead_letters)  # Images téléchargées en parallèle de l'extraction
 
     # Boucle sur toutes les pages de la catéforie
-    while True:
-        soup = get_soup(page_url)           # On télécharge la page 
-        book_links = soup.select("h3 a")    # Tous les liens des livres 
+    while page_url:
+        if not frontier.add(page_url):
+            break                                               # Page déjà lue pendant ce run : la pagination boucle
+        entry = journal.listing(page_url)                       # Page déjà lue avant une interruption ?
+        if entry:
+            records, next_url = entry["books"], entry["next"]
+        else:
+            try:
+                soup = get_soup(page_url)                       # On télécharge la page 
+            except requests.RequestException as e:
+                dead_letters.add("listing", page_url, e, category=category_name)
+                break                                           # Sans cette page, on ne connaît pas la suivante
+            records, next_url = listing_page(soup, page_url, category_name)
+            journal.record_listing(page_url, next_url, records)
+        unique = []
+        for record in records:                                  # Sans les doublons de la catégorie
+            if record["product_page_url"] not in listed:
+                listed.add(record["product_page_url"])
+                unique.append(record)
+        records = unique
+
+        # Mode listing : les infos visibles sur la page suffisent, pas de fiche produit
+        if listing_only:
+            sink.write_all(records)
+            records = []
 
     # Extraction des infos de chaque livre 
-        for a in tqdm(book_links, desc=f"Catégorie {category_name}", unit="livre"):
-            relative_url = a["href"].replace("../../../", "")
-            book_url = DOMAIN + relative_url                                    # Nettoie l'URL relative 
-            book_data = extract_book_data(book_url, category_name, images_dir)  # Construit l'URL complète 
-            all_books.append(book_data)
-
-        # Vérifier s’il existe une page suivante
-        next_button = soup.find("li", class_="next")
-        if next_button:
-            next_page = next_button.a["href"]
-            page_url = "/".join(page_url.split("/")[:-1]) + "/" + next_page
-        else:
-            break               # pas de page suivante => on arrête la boucle 
-
-    # Sauvegarde en CSV
-    os.makedirs("csv", exist_ok=True)                               # Créer dossier "csv"
-    csv_file = os.path.join("csv", f"V4_{category_name}.csv")       # Nom du fichier CSV
-    with open(csv_file, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=[
-            "product_page_url",
-            "universal_product_code (upc)",
-            "title",
-            "price_including_tax",
-            "price_excluding_tax",
-            "number_available",
-            "product_description",
-            "category",
-            "review_rating",
-            "image_url"
-        ])
-        writer.writeheader()                    # écrit les titres des colonnes
-        writer.writerows(all_books)             # écrit toutes les données 
+        for record in tqdm(records, desc=f"Catégorie {category_name}", unit="livre"):
+            book_url = record["product_page_url"]
+            known = None if frontier.add(book_url) else books.get(book_url)    # Déjà lu dans une autre catégorie ?
+            try:
+                with Scrapper_metrics.timer("book"):
+                    book_data = extract_book_data(book_url, category_name, images_dir, journal, images, known)
+            except requests.RequestException as e:
+                dead_letters.add("book", book_url, e, category=category_name)
+                continue                                        # Les autres livres de la page continuent
+            books[book_url] = book_data
+            sink.write(book_data)
+
+        page_url = next_url         # None s'il n'y a pas de page suivante => on arrête la boucle 
+
+    # Fin du CSV (et des images si la catégorie a son propre pool)
+    sink.close()
+    if own_images:
+        images.close()
+    if category_name in dead_letters.categories():
+        print(f"⚠️ {sink.count} livres sauvegardés dans {sink.path}, des pages sont en échec (voir {DEAD_LETTERS_FILE})")
+        return
+    journal.record_category(category_name)
         
     # Confirmation 
-    print(f"✅ {len(all_books)} livres sauvegardés dans {csv_file}")
-    print(f"✅ Images enregistrées dans dossier: {os.path.join(images_dir, category_name)}")
+    print(f"✅ {sink.count} livres sauvegardés dans {sink.path}")
+    if not listing_only:
+        print(f"✅ Images enregistrées dans dossier: {os.path.join(images_dir, category_name)}")
 
     # -------------------------------
     # Programme principal
     # -------------------------------
-def main():
-    """Scrape toutes les catégories du site books.toscrape.com"""
+def list_categories(homepage, base_url=None):
+    """[(nom, url), ...] des catégories de la barre latérale de la page d'accueil (base_url : son adresse)."""
+    return [(cat.text.strip(), Scrapper_urls.resolve(base_url or BASE_URL, cat["href"]))
+            for cat in homepage.select("div.side_categories ul li ul li a")]
+
+def main(listing_only=False, resume=True):
+    """
+    Scrape toutes les catégories du site books.toscrape.com
+    Si un run précédent s'est arrêté en cours de route, il reprend là où il s'était arrêté
+    (journal crawl_journal_V4.jsonl; resume=False pour repartir de zéro).
+    Les URLs en échec après les réessais sont notées dans dead_letters_V4.jsonl : le journal est alors gardé
+    et relancer le script ne retente que ces URLs.
+    """
     print("🚀 Lancement du scraping complet du site...")
+    journal = Scrapper_journal.CrawlJournal(JOURNAL_FILE, "listing" if listing_only else "full", resume)
+    if journal.resumed:
+        print(f"♻️  Reprise du run interrompu : {len(journal.done)} catégories et {len(journal.books)} livres déjà faits")
 
-    homepage = get_soup(BASE_URL)                           # Télécharge la page d'accueil
-    categories = homepage.select("div.side_categories ul li ul li a")   # Récupération de la liste des catégories
+    if journal.categories is None:
+        homepage = get_soup(BASE_URL)                           # Télécharge la page d'accueil
+        journal.record_categories(list_categories(homepage))    # Récupération de la liste des catégories
     
     # -------------------------------
     # Boucle sur toutes les catégories
     # -------------------------------
-    for cat in categories:
-        category_name = cat.text.strip()                # Nom de la catégorie
-        category_url = BASE_URL + cat["href"]           # URL complète 
-        scrape_category(category_name, category_url)    # Scraper la catégorie
+    dead_letters = Scrapper_retry.DeadLetters(DEAD_LETTERS_FILE)
+    images = Scrapper_images.ImagePipeline(dead_letters=dead_letters)   # Un seul pool d'images pour tout le site
+    for entry in dead_letters.previous_of("image"):     # Images en échec au run précédent
+        images.submit(entry["url"], entry["path"], entry.get("title", ""), journal.record_image)
+    frontier = Scrapper_urls.Frontier()                 # Pages et fiches déjà vues : jamais téléchargées deux fois
+    books = {}                                          # Fiches déjà lues, réécrites dans chaque catégorie qui les liste
+    dataset = Scrapper_dataset.from_env()               # Export en colonnes si SCRAPPER_DATASET est défini
+    store = Scrapper_sqlite.from_env("phase4")          # Base SQLite à la place des CSV si SCRAPPER_DB est défini
+    try:
+        for category_name, category_url in journal.categories:
+            scrape_category(category_name, category_url, listing_only, journal, images, dead_letters, dataset, store,
+                            frontier, books)
+    finally:
+        if dataset is not None:
+            dataset.close()                             # Dernier lot écrit même après une erreur
+        if store is not None:
+            store.close()
+    images.close()                                      # Attendre les dernières images
+    dead_letters.close()
+    if dead_letters:
+        journal.close()                                 # Gardé : le prochain run ne retente que les échecs
+        print(f"\n⚠️ {len(dead_letters)} URLs en échec (voir {DEAD_LETTERS_FILE}) : relancez le script pour les retenter")
+    else:
+        journal.finish()                                # Tout est fait : le journal est supprimé
 
     # -------------------------------
     # Fin du scraping
     # -------------------------------
     print("\n🎉 Scraping terminé pour toutes les catégories !")
+    if not listing_only:
+        print(f"🖼️  Images : {images.report()}")
+    if dataset is not None:
+        print(f"📊 Export en colonnes : {dataset.count} livres dans {dataset.path}")
+    if store is not None:
+        print(f"🗄️  Base SQLite : {store.count} livres dans {store.path} (crawl {store.crawl_id})")
+    print(f"🌐 Réseau : {Scrapper_http.format_stats()}")
+    print(f"🔗 Frontière : {frontier.report()}")
+    if Scrapper_metrics.ENABLED:
+        print(f"⏱️  Temps par étape :\n{Scrapper_metrics.format_summary()}")
+        print("⏱️  Mesures détaillées : {} et {}".format(*Scrapper_metrics.dump("V4")))
     
     # -------------------------------
     # Lancer le programme 
@@ -0,0 +1,175 @@
+import asyncio                      # Attente d'une place libre / d'un jeton sans bloquer la boucle
+import collections                  # File des requêtes en attente
+import time                         # Horloge du seau à jetons et mesure de latence
+from datetime import datetime, timezone         # Retry-After au format date HTTP
+from email.utils import parsedate_to_datetime   # Lecture des dates HTTP
+
+# -------------------------------
+# CONFIGURATION DE BASE
+# -------------------------------
+INITIAL = 2                         # Requêtes simultanées au démarrage (puis démarrage lent : +1 par réponse)
+MIN_LIMIT = 1                       # On ne descend jamais en dessous d'une requête à la fois
+DECREASE = 0.5                      # Diminution multiplicative après une surcharge (429, 5xx, latence)
+LATENCY_FACTOR = 2.0                # Latence "en hausse" : moyenne > 2 x la meilleure moyenne observée...
+LATENCY_SLACK = 0.05                # ... + 50 ms (les petites variations ne comptent pas)
+EWMA_ALPHA = 0.2                    # Poids de la dernière réponse dans la latence moyenne
+WARMUP = 10                         # Réponses avant de juger la latence
+MAX_PAUSE = 300                     # Retry-After plafonné à 5 minutes
+
+
+def is_overload(status):
+    """429 (trop de requêtes) ou erreur serveur 5xx : le site est surchargé."""
+    return status == 429 or status >= 500
+
+def retry_after_seconds(value, now=None):
+    """Durée en secondes d'un en-tête Retry-After ("120" ou date HTTP); None si absent ou illisible."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return min(int(value), MAX_PAUSE)
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = now or datetime.now(timezone.utc)
+    return min(max((date - now).total_seconds(), 0.0), MAX_PAUSE)
+
+
+# -------------------------------
+# Limiteur d'un hôte : seau à jetons + concurrence AIMD
+# -------------------------------
+class HostLimiter:
+    """
+    Contrôle le débit envoyé à un hôte (à utiliser dans la boucle asyncio) :
+    - concurrence AIMD : démarrage lent (+1 par réponse) puis +1 par "fenêtre" de réponses tant que
+      la latence reste stable; divisée par 2 sur un 429 / 5xx ou une latence en hausse;
+    - seau à jetons : au plus `rate` requêtes par seconde (rafales de `burst`), None = pas de plafond;
+    - Retry-After : plus aucune requête vers l'hôte avant la date demandée.
+
+        await limiter.acquire()
+        try:
+            response = ...
+        finally:
+            limiter.release(status, latence, retry_after)
+    """
+
+    def __init__(self, max_limit, rate=None, burst=None, initial=INITIAL, name=""):
+        self.name = name
+        self.max_limit = max_limit
+        self.limit = float(min(initial, max_limit))     # Fenêtre de concurrence (partie entière = places)
+        self.rate = rate
+        self.burst = burst or max(1, int(rate or 1))
+        self.in_flight = 0
+        self.slow_start = True              # Jusqu'à la première surcharge, la fenêtre double à chaque aller-retour
+        self.ewma = None                    # Latence moyenne récente (s)
+        self.baseline = None                # Meilleure latence moyenne observée (s)
+        self.paused_until = 0.0             # Retry-After : pas de requête avant cette heure (time.monotonic)
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._last_decrease = 0.0
+        self._waiters = collections.deque()
+        # Statistiques
+        self.responses = 0
+        self.decreases = 0
+        self.pauses = 0
+        self.peak = self.limit
+        self._limit_sum = 0.0
+
+    # ------------------ Prise / libération d'une place ------------------
+    async def acquire(self):
+        """Attend une place libre dans la fenêtre, la fin d'une éventuelle pause et un jeton."""
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                self._wake()                # La place qu'on nous avait donnée revient à un autre
+                raise
+        self.in_flight += 1
+        try:
+            await self._take_token()
+        except BaseException:
+            self.in_flight -= 1
+            self._wake()
+            raise
+
+    async def _take_token(self):
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            if self.rate is None:
+                return
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def release(self, status=None, latency=None, retry_after=None):
+        """
+        Libère la place et ajuste la fenêtre. status=None : pas de réponse (erreur de connexion).
+        retry_after : valeur de l'en-tête Retry-After de la réponse.
+        """
+        self.in_flight -= 1
+        self.responses += 1
+        now = time.monotonic()
+        if status is None or is_overload(status):
+            self._decrease(now)
+            pause = retry_after_seconds(retry_after)
+            if pause:
+                self.pauses += 1
+                self.paused_until = max(self.paused_until, now + pause)
+        else:
+            self._observe_latency(latency)
+            if self._latency_rising():
+                self._decrease(now)
+            else:
+                self._increase()
+        self._limit_sum += self.limit
+        self._wake()
+
+    # ------------------ AIMD ------------------
+    def _observe_latency(self, latency):
+        if latency is None:
+            return
+        self.ewma = latency if self.ewma is None else EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.ewma
+        if self.responses >= WARMUP and (self.baseline is None or self.ewma < self.baseline):
+            self.baseline = self.ewma
+
+    def _latency_rising(self):
+        return self.baseline is not None and self.ewma > self.baseline * LATENCY_FACTOR + LATENCY_SLACK
+
+    def _increase(self):
+        step = 1.0 if self.slow_start else 1.0 / self.limit     # +1 par réponse, ou +1 par fenêtre
+        self.limit = min(self.max_limit, self.limit + step)
+        self.peak = max(self.peak, self.limit)
+
+    def _decrease(self, now):
+        # Une seule diminution par aller-retour : les réponses d'une même rafale ne comptent qu'une fois
+        if now - self._last_decrease < max(self.ewma or 0.0, 0.1):
+            return
+        self._last_decrease = now
+        self.slow_start = False
+        self.decreases += 1
+        self.limit = max(MIN_LIMIT, self.limit * DECREASE)
+
+    def _wake(self):
+        """Réveille autant de requêtes en attente que de places libres."""
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    # ------------------ Compte rendu ------------------
+    def report(self):
+        """Niveau de concurrence sur lequel le limiteur s'est stabilisé."""
+        mean = self._limit_sum / self.responses if self.responses else self.limit
+        return (f"{self.name} : concurrence stabilisée à {int(self.limit)} (moyenne {mean:.1f}, max {int(self.peak)}), "
+                f"{self.decreases} ralentissements, {self.pauses} pauses Retry-After")
@@ -0,0 +1,116 @@
+import re                           # Lecture des prix ("£51.77")
+import sys                          # Noms de catégories et symboles monétaires partagés (sys.intern)
+from collections.abc import Mapping     # Un livre se lit comme l'ancien dictionnaire (colonnes du CSV)
+from decimal import Decimal         # Prix en livres sans erreur d'arrondi
+
+from Scrapper_storage import FIELDNAMES     # Colonnes du CSV, dans l'ordre
+
+# -------------------------------
+# CONFIGURATION DE BASE
+# -------------------------------
+PRICE_RE = re.compile(r"(\D*)(\d+)\.(\d\d)")    # Symbole (éventuellement mal décodé : "Â£"), livres, pence
+
+
+def parse_price(text):
+    """ "£51.77" => ("£", 5177). Lève ValueError si le texte n'est pas un prix."""
+    match = PRICE_RE.fullmatch(text.strip())
+    if not match:
+        raise ValueError(f"Prix illisible : {text!r}")
+    return sys.intern(match.group(1)), int(match.group(2)) * 100 + int(match.group(3))
+
+def parse_int(text):
+    """ "22" => 22, "" / None => None (nombre inconnu)."""
+    return int(text) if text not in ("", None) else None
+
+
+# -------------------------------
+# Livre typé et compact
+# -------------------------------
+class Book(Mapping):
+    """
+    Un livre, avec des champs typés dans des __slots__ (pas de dictionnaire par instance) :
+    prix en pence (int), stock et note en petits entiers, catégorie et symbole monétaire partagés (sys.intern).
+    Il se lit encore comme l'ancien dictionnaire : book["price_including_tax"] == "£51.77",
+    avec les mêmes noms de colonnes (Scrapper_storage.FIELDNAMES); csv.DictWriter l'écrit donc à l'identique.
+    Un prix illisible est gardé tel quel (texte) pour ne rien perdre.
+    """
+
+    __slots__ = ("url", "upc", "title", "price_incl", "price_excl", "currency", "available",
+                 "description", "category", "rating", "image_url")
+
+    def __init__(self, url, upc, title, price_incl, price_excl, currency, available, description, category, rating,
+                 image_url):
+        self.url = url
+        self.upc = upc                      # Code hexadécimal ("a897fe39b1053632") : reste du texte
+        self.title = title
+        self.price_incl = price_incl        # Pence TTC (None si inconnu)
+        self.price_excl = price_excl        # Pence HT (None si inconnu, mode listing)
+        self.currency = currency            # Symbole devant les prix
+        self.available = available          # Exemplaires en stock (None : en stock, nombre inconnu)
+        self.description = description
+        self.category = sys.intern(category) if category else category
+        self.rating = rating                # 0 à 5
+        self.image_url = image_url
+
+    @classmethod
+    def from_row(cls, row):
+        """Livre construit depuis un dictionnaire aux colonnes du CSV (parseurs, ligne de CSV, journal)."""
+        currency = ""
+        prices = []
+        for column in ("price_including_tax", "price_excluding_tax"):
+            text = row.get(column)
+            if not text:
+                prices.append(None)
+                continue
+            try:
+                currency, pence = parse_price(text)
+            except ValueError:
+                pence = text                # Gardé tel quel
+            prices.append(pence)
+        return cls(row["product_page_url"], row.get("universal_product_code (upc)"), row["title"], prices[0], prices[1],
+                   currency, parse_int(row.get("number_available")), row.get("product_description"),
+                   row.get("category"), int(row.get("review_rating") or 0), row.get("image_url"))
+
+    # ------------------ Valeurs typées ------------------
+    @staticmethod
+    def pounds(pence):
+        """Pence => Decimal en livres (5177 => Decimal("51.77"))."""
+        return None if pence is None else Decimal(pence) / 100
+
+    def format_price(self, pence):
+        """Prix tel qu'il apparaît sur le site et dans le CSV."""
+        if pence is None:
+            return ""
+        if not isinstance(pence, int):
+            return pence                    # Prix illisible gardé en texte
+        return f"{self.currency}{pence // 100}.{pence % 100:02d}"
+
+    # ------------------ Lecture par colonne du CSV ------------------
+    def __getitem__(self, column):
+        return _COLUMNS[column](self)
+
+    def __iter__(self):
+        return iter(FIELDNAMES)
+
+    def __len__(self):
+        return len(FIELDNAMES)
+
+    def __repr__(self):
+        return f"Book({self.url!r}, {self.title!r})"
+
+_COLUMNS = {
+    "product_page_url": lambda book: book.url,
+    "universal_product_code (upc)": lambda book: book.upc,
+    "title": lambda book: book.title,
+    "price_including_tax": lambda book: book.format_price(book.price_incl),
+    "price_excluding_tax": lambda book: book.format_price(book.price_excl),
+    "number_available": lambda book: "" if book.available is None else str(book.available),
+    "product_description": lambda book: book.description,
+    "category": lambda book: book.category,
+    "review_rating": lambda book: book.rating,
+    "image_url": lambda book: book.image_url,
+}
+
+def as_dict(record):
+    """Dictionnaire sérialisable en JSON (journal) d'un livre, ou la valeur telle quelle (URL...)."""
+    return dict(record) if isinstance(record, Book) else record
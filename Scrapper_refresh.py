@@ -0,0 +1,153 @@
+import argparse                     # Lecture des options passées en ligne de commande
+import time                         # Durée du rafraîchissement
+from concurrent.futures import ThreadPoolExecutor  # Fiches produit téléchargées en parallèle
+
+import Scrapper_phase4 as phase4    # Extraction des fiches, chemins des CSV et des images de la phase 4
+import Scrapper_http                # Statistiques réseau en fin de script
+import Scrapper_images              # Images téléchargées en arrière-plan (seulement celles qui manquent)
+import Scrapper_retry               # Livres en échec (dead letters)
+import Scrapper_snapshot            # Derniers livres connus (CSV) et fichier des changements
+import Scrapper_sqlite              # Base SQLite à la place des CSV (variable d'environnement SCRAPPER_DB)
+import Scrapper_storage             # Mise à jour des CSV en place
+import Scrapper_urls                # URLs de la liste mises sous forme canonique, livres déjà demandés
+
+# -------------------------------
+# CONFIGURATION DE BASE
+# -------------------------------
+THREADS = 16                        # Fiches produit téléchargées en même temps
+BATCH_SIZE = 100                    # Livres par lot : les CSV sont mis à jour après chaque lot
+IMAGES_DIR = "V4_images"            # Même dossier d'images que la phase 4
+DEAD_LETTERS_FILE = "dead_letters_refresh.jsonl"    # Livres en échec (à relancer avec le même fichier de liste)
+
+
+# -------------------------------
+# Liste de livres => URLs des fiches produit
+# -------------------------------
+def read_targets(path):
+    """Lignes du fichier : URL de fiche produit ou UPC (lignes vides et commentaires # ignorés)."""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+def resolve(targets, snapshot):
+    """
+    Retourne ([(url, livre connu ou None), ...], UPC inconnus). Un UPC est cherché dans l'instantané
+    (derniers CSV ou base SQLite); une URL peut être celle d'un livre pas encore connu.
+    Chaque livre n'est demandé qu'une fois, même s'il apparaît plusieurs fois (URL et UPC).
+    """
+    books, unknown, frontier = [], [], Scrapper_urls.Frontier()
+    for target in targets:
+        if target.lower().startswith(("http://", "https://")):
+            url = Scrapper_urls.normalize(target)
+            previous = snapshot.get(url=url)
+        else:
+            previous = snapshot.get(upc=target)
+            if previous is None:
+                unknown.append(target)
+                continue
+            url = previous["product_page_url"]
+        if frontier.add(url):
+            books.append((url, previous))
+    return books, unknown
+
+
+# -------------------------------
+# Rafraîchissement par lots
+# -------------------------------
+def refresh_book(url, previous, images):
+    """Fiche produit à jour; l'image va dans la catégorie connue, sinon celle de la fiche."""
+    return phase4.extract_book_data(url, previous["category"] if previous else None, IMAGES_DIR, images=images)
+
+def merge_batch(results, store=None):
+    """
+    Écrit un lot de livres rafraîchis [(livre connu ou None, livre à jour), ...] dans les sorties existantes :
+    la ligne du livre est remplacée à sa place dans csv/V4_<catégorie>.csv, un nouveau livre est ajouté à la fin,
+    et un livre qui a changé de catégorie passe d'un CSV à l'autre. Avec store, les livres sont mis à jour
+    dans la base (par UPC) au lieu des CSV.
+    """
+    if store is not None:
+        for previous, book in results:
+            store.add(book)
+        return
+    updates, removed = {}, {}
+    for previous, book in results:
+        key = previous["product_page_url"] if previous else book["product_page_url"]
+        if previous and previous["category"] != book["category"]:
+            removed.setdefault(previous["category"], set()).add(key)
+            key = book["product_page_url"]
+        updates.setdefault(book["category"], {})[key] = book
+    for category_name in sorted(set(updates) | set(removed)):
+        count = Scrapper_storage.update_csv(phase4.csv_path(category_name), updates.get(category_name, {}),
+                                            removed.get(category_name, ()))
+        print(f"✅ {phase4.csv_path(category_name)} mis à jour ({count} livres)")
+
+def refresh(books, threads=THREADS, batch_size=BATCH_SIZE, store=None, images=None, dead_letters=None):
+    """
+    Télécharge les fiches des livres [(url, livre connu ou None), ...] en parallèle, lot par lot, et fusionne
+    chaque lot dans les sorties existantes. Une requête par livre (plus son image si elle manque).
+    Un livre en échec (réseau, ou URL qui n'est pas une fiche produit) est noté dans dead_letters, sans arrêter le lot.
+    Retourne (nombre de livres rafraîchis, lignes de changements de prix / stock).
+    """
+    done, changes = 0, []
+
+    def fetch(entry):
+        url, previous = entry
+        try:
+            return previous, refresh_book(url, previous, images)
+        except Exception as e:              # Échec réseau après les réessais, ou page illisible : le lot continue
+            if dead_letters is not None:
+                dead_letters.add("book", url, e, category=previous["category"] if previous else None)
+            return previous, None
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for start in range(0, len(books), batch_size):
+            results = [(previous, book) for previous, book in executor.map(fetch, books[start:start + batch_size])
+                       if book is not None]
+            merge_batch(results, store)
+            for previous, book in results:
+                change = Scrapper_snapshot.compare(previous, book)
+                if change:
+                    changes.append(change)
+            done += len(results)
+            print(f"[INFO] Lot {start // batch_size + 1} : {done}/{len(books)} livres rafraîchis")
+    return done, changes
+
+
+# -------------------------------
+# Programme principal
+# -------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Re-scrape ciblé d'une liste de livres (URLs ou UPC)")
+    parser.add_argument("liste", help="fichier texte : une URL de fiche produit ou un UPC par ligne")
+    parser.add_argument("--threads", type=int, default=THREADS, help="fiches téléchargées en même temps")
+    parser.add_argument("--lot", type=int, default=BATCH_SIZE, help="livres par lot (CSV mis à jour après chaque lot)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = Scrapper_sqlite.from_env("refresh")     # Base SQLite à la place des CSV si SCRAPPER_DB est défini
+    snapshot = store.load_snapshot() if store is not None else Scrapper_snapshot.load_snapshot()
+    books, unknown = resolve(read_targets(args.liste), snapshot)
+    for upc in unknown:
+        print(f"⚠️ UPC inconnu (absent du dernier crawl) : {upc}")
+    print(f"[INFO] {len(books)} livres à rafraîchir ({len(snapshot)} livres connus)")
+
+    dead_letters = Scrapper_retry.DeadLetters(DEAD_LETTERS_FILE)
+    images = Scrapper_images.ImagePipeline(dead_letters=dead_letters)
+    try:
+        done, changes = refresh(books, args.threads, args.lot, store, images, dead_letters)
+    finally:
+        images.close()
+        dead_letters.close()
+        if store is not None:
+            store.close()
+
+    if changes:
+        print(f"[INFO] {len(changes)} changements de prix / stock : {Scrapper_snapshot.write_changes(changes)}")
+    if dead_letters:
+        print(f"⚠️ {len(dead_letters)} URLs en échec (voir {DEAD_LETTERS_FILE})")
+    print(f"\n🎉 {done} livres rafraîchis en {time.perf_counter() - start:.1f} s")
+    print(f"[INFO] Images : {images.report()}")
+    print(f"[INFO] Réseau : {Scrapper_http.format_stats()}")
+
+
+if __name__ == "__main__":
+    main()
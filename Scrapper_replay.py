@@ -0,0 +1,140 @@
+import argparse                     # Lecture des options passées en ligne de commande
+import datetime                     # Durée nulle des réponses relues
+import os                           # Nombre de processeurs
+import threading                    # Le fichier de l'archive est lu par plusieurs threads (images)
+import time                         # Mesure du temps total
+from concurrent.futures import ProcessPoolExecutor, as_completed    # Une catégorie par processus
+
+import requests                     # Réponses reconstruites depuis l'archive
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+import Scrapper_http                # Transport partagé, remplacé par l'archive
+import Scrapper_parsers             # Choix du backend d'analyse des fiches produit
+import Scrapper_retry               # Pages absentes de l'archive (notées comme des échecs)
+import Scrapper_dataset             # Export Parquet par catégorie (--dataset)
+import Scrapper_warc                # Lecture de l'archive WARC
+import Scrapper_phase4 as phase4    # Extraction, CSV et images de la phase 4
+
+# -------------------------------
+# CONFIGURATION DE BASE
+# -------------------------------
+WORKERS = os.cpu_count() or 1       # Processus d'extraction (une catégorie à la fois chacun)
+
+
+# -------------------------------
+# Transport qui lit l'archive au lieu du réseau
+# -------------------------------
+class ReplayTransport(Scrapper_http.Transport):
+    """
+    Transport servi par une archive WARC (Scrapper_warc) : aucune requête réseau.
+    Une URL absente de l'archive reçoit une réponse 404 (raise_for_status lève une erreur, comme en ligne).
+    """
+
+    def __init__(self, path, index=None):
+        super().__init__(pool_size=1, cache=False, archive=False)
+        self.path = path
+        self.index = Scrapper_warc.build_index(path) if index is None else index
+        self._file = open(path, "rb")
+        self._file_lock = threading.Lock()
+
+    def _fetch(self, url, **kwargs):
+        response = requests.Response()
+        response.url = url
+        response.elapsed = datetime.timedelta(0)
+        location = self.index.get(url)
+        if location is None:
+            response.status_code, response.reason, response._content = 404, "Not In Archive", b""
+        else:
+            with self._file_lock:
+                status, reason, headers, body = Scrapper_warc.read_response(self._file, location)
+            response.status_code, response.reason, response._content = status, reason, body
+            response.headers = CaseInsensitiveDict(headers)
+            response.encoding = get_encoding_from_headers(response.headers)    # Même .text qu'en ligne
+        response._content_consumed = True
+        if not kwargs.get("stream"):
+            self._count(response)           # Les images (stream=True) sont comptées par count_stream
+        return response
+
+    def close(self):
+        super().close()
+        self._file.close()
+
+
+# -------------------------------
+# Extraction d'une catégorie (dans un processus de travail)
+# -------------------------------
+def _init_worker(path, index, backend):
+    Scrapper_parsers.set_backend(backend)
+    Scrapper_http.set_transport(ReplayTransport(path, index))
+
+def _replay_category(category_name, category_url, listing_only, dataset_path=None):
+    """Rejoue une catégorie de la phase 4; retourne (nom, échecs, réponses lues dans l'archive)."""
+    dead_letters = Scrapper_retry.DeadLetters(None)
+    before = Scrapper_http.stats()["requests"]         # Le processus a peut-être déjà rejoué d'autres catégories
+    # Parquet : chaque catégorie a son propre dossier, chaque processus écrit donc les siennes sans se gêner
+    dataset = Scrapper_dataset.DatasetWriter(dataset_path) if dataset_path else None
+    try:
+        phase4.scrape_category(category_name, category_url, listing_only, dead_letters=dead_letters, dataset=dataset)
+    finally:
+        if dataset is not None:
+            dataset.close()
+    return category_name, dead_letters.entries, Scrapper_http.stats()["requests"] - before
+
+
+# -------------------------------
+# Relecture complète
+# -------------------------------
+def replay(path, workers=WORKERS, base_url=None, listing_only=False, backend=None, dataset_path=None):
+    """
+    Refait l'extraction de la phase 4 (csv/V4_*.csv et V4_images) à partir d'une archive WARC, sans réseau,
+    avec `workers` processus. Retourne la liste des URLs absentes de l'archive (échecs).
+    dataset_path : dossier Parquet partitionné par catégorie écrit en plus des CSV (pas de fichier .arrow unique :
+    les catégories sont écrites par des processus différents).
+    """
+    if dataset_path and Scrapper_dataset.is_arrow_file(dataset_path):
+        raise ValueError("La relecture exporte en Parquet (dossier) : un fichier .arrow unique n'est pas possible")
+    base_url = base_url or phase4.BASE_URL
+    backend = backend or Scrapper_parsers.BACKEND
+    index = Scrapper_warc.build_index(path)
+    print(f"📦 {len(index)} réponses dans {path}")
+
+    _init_worker(path, index, backend)
+    categories = phase4.list_categories(phase4.get_soup(base_url), base_url)
+    failures = []
+    pages = 0
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(path, index, backend)) as executor:
+        futures = [executor.submit(_replay_category, name, url, listing_only, dataset_path) for name, url in categories]
+        for future in as_completed(futures):
+            category_name, entries, responses = future.result()
+            failures.extend(entries)
+            pages += responses
+    print(f"\n🎉 {len(categories)} catégories relues ({pages} réponses) avec {workers} processus")
+    return failures
+
+
+# -------------------------------
+# Programme principal
+# -------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Relecture hors ligne d'une archive WARC (sorties de la phase 4)")
+    parser.add_argument("archive", help="archive .warc.gz enregistrée avec --warc ou SCRAPPER_WARC")
+    parser.add_argument("--processus", type=int, default=WORKERS, help="processus d'extraction en parallèle")
+    parser.add_argument("--base-url", default=phase4.BASE_URL, help="page d'accueil du site archivé")
+    parser.add_argument("--parser", default=Scrapper_parsers.BACKEND,
+                        choices=["auto"] + list(Scrapper_parsers.BACKENDS), help="backend d'analyse des fiches produit")
+    parser.add_argument("--dataset", metavar="DOSSIER", help="export Parquet par catégorie en plus des CSV (pyarrow)")
+    parser.add_argument("--listing-only", action="store_true",
+                        help="lire les livres sur les pages de catégorie uniquement (pas de fiche produit ni d'image)")
+    args = parser.parse_args()
+
+    print("🚀 Relecture de l'archive sans réseau...")
+    start = time.perf_counter()
+    failures = replay(args.archive, args.processus, args.base_url, args.listing_only, args.parser, args.dataset)
+    print(f"⏱️  {time.perf_counter() - start:.1f} s")
+    if failures:
+        print(f"⚠️ {len(failures)} URLs absentes de l'archive, par exemple : {failures[0]['url']}")
+
+
+if __name__ == "__main__":
+    main()
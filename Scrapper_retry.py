@@ -0,0 +1,157 @@
+import json                         # Une ligne JSON par URL en échec
+import os                           # Suppression du fichier d'échecs quand tout a réussi
+import random                       # Gigue des délais d'attente
+import threading                    # Les échecs peuvent arriver de plusieurs threads (images)
+import time                         # Attente entre deux essais
+from datetime import datetime       # Date de l'échec
+
+import requests                     # Types d'erreurs réseau
+
+import Scrapper_ratelimit           # Lecture de l'en-tête Retry-After
+
+# -------------------------------
+# CONFIGURATION DE BASE
+# -------------------------------
+# Nombre d'essais au total (premier essai compris) selon le type d'échec
+ATTEMPTS = {
+    "connect": 4,                   # Connexion impossible : la requête n'a pas atteint le site, on peut réessayer
+    "read": 3,                      # Réponse coupée ou trop lente : le site est peut-être lent, on insiste moins
+    "status": 4,                    # 408 / 429 / 5xx : erreur passagère du site
+}
+RETRY_STATUSES = (408, 429, 500, 502, 503, 504)     # Les autres codes (404, 403...) ne sont pas réessayés
+BASE_DELAY = 0.5                    # Délai avant le 2e essai (s), doublé à chaque essai
+MAX_DELAY = 30.0                    # Délai maximum entre deux essais (s)
+DEAD_LETTERS_FILE = "dead_letters.jsonl"    # Nom par défaut (chaque script passe le sien)
+
+
+def classify(error=None, status=None):
+    """
+    Type d'échec réessayable : "connect", "read" ou "status"; None si l'échec est définitif
+    (ou s'il n'y a pas d'échec).
+    """
+    if error is not None:
+        if isinstance(error, (requests.exceptions.ReadTimeout, requests.exceptions.ChunkedEncodingError,
+                              requests.exceptions.ContentDecodingError)):
+            return "read"
+        if isinstance(error, requests.exceptions.ConnectionError):     # ConnectTimeout compris
+            return "connect"
+        return None
+    if status in RETRY_STATUSES:
+        return "status"
+    return None
+
+
+# -------------------------------
+# Politique de réessai
+# -------------------------------
+class RetryPolicy:
+    """
+    Nombre d'essais par type d'échec et délai entre deux essais :
+    backoff exponentiel avec gigue complète (tirage entre 0 et BASE_DELAY x 2^(essai-1), plafonné à MAX_DELAY),
+    ou la durée de l'en-tête Retry-After si le site en donne une.
+    """
+
+    def __init__(self, attempts=None, base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+        self.attempts = dict(ATTEMPTS, **(attempts or {}))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, kind, attempt):
+        """attempt : nombre d'essais déjà faits."""
+        return kind is not None and attempt < self.attempts[kind]
+
+    def delay(self, attempt, retry_after=None):
+        """Attente (s) avant l'essai suivant."""
+        pause = Scrapper_ratelimit.retry_after_seconds(retry_after)
+        if pause is not None:
+            return pause
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def call(self, func, *args):
+        """
+        Appelle func(*args) et la réessaie sur une erreur réseau réessayable (connexion / lecture).
+        Les codes HTTP sont gérés par Scrapper_http.Transport.get.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return func(*args)
+            except requests.RequestException as e:
+                if not self.should_retry(classify(error=e), attempt):
+                    raise
+                time.sleep(self.delay(attempt))
+
+DEFAULT_POLICY = RetryPolicy()
+
+
+# -------------------------------
+# Fichier des URLs en échec (dead letters)
+# -------------------------------
+class DeadLetters:
+    """
+    URLs toujours en échec après tous les essais (fiche produit, page de listing, image), une ligne JSON chacune.
+    Le crawl continue sans elles. Au run suivant, le script relit ce fichier (previous) et ne retente que ces URLs :
+    tout le reste est déjà dans le journal de crawl.
+    Le fichier est supprimé à la fin d'un run sans échec. path=None : échecs gardés en mémoire seulement.
+    """
+
+    def __init__(self, path=DEAD_LETTERS_FILE):
+        self.path = path
+        self.previous = load(path) if path else []      # Échecs du run précédent
+        self.entries = []
+        self._file = None
+        self._lock = threading.Lock()
+
+    def add(self, kind, url, error, **context):
+        """
+        Note une URL en échec (kind : "book", "listing" ou "image"; context : catégorie, chemin de l'image...).
+        error : l'exception, ou son message déjà formaté (échec relu dans une file de tâches).
+        """
+        message = error if isinstance(error, str) else f"{type(error).__name__}: {error}"
+        entry = {"type": kind, "url": url, "error": message,
+                 "date": datetime.now().isoformat(timespec="seconds"), **context}
+        with self._lock:
+            self.entries.append(entry)
+            if self.path:
+                if self._file is None:
+                    self._file = open(self.path, "w", encoding="utf-8")
+                self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                self._file.flush()
+        print(f"⚠️ Échec définitif ({kind}) : {url} — {entry['error']}")
+
+    def previous_of(self, kind):
+        return [entry for entry in self.previous if entry["type"] == kind]
+
+    def categories(self):
+        """Catégories touchées par un échec de fiche ou de listing pendant ce run (elles ne sont pas terminées)."""
+        with self._lock:
+            return {entry.get("category") for entry in self.entries if entry["type"] != "image"}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def close(self, completed=True):
+        """
+        Ferme le fichier. Si aucun échec n'a eu lieu pendant un run complet (completed), le fichier est supprimé;
+        après un arrêt en cours de route, les échecs du run précédent sont gardés.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            elif completed and self.path and os.path.exists(self.path):
+                os.remove(self.path)
+
+def load(path):
+    """Entrées d'un fichier d'échecs ([] s'il n'existe pas)."""
+    if not os.path.exists(path):
+        return []
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                break
+    return entries
@@ -0,0 +1,118 @@
+import csv                          # Lecture des CSV du run précédent / écriture du fichier de changements
+import glob                         # Recherche des fichiers csv/V4_*.csv
+import os                           # Chemins de fichiers
+import time                         # Horodatage du fichier de changements
+
+from Scrapper_record import Book    # Livres gardés en mémoire sous forme compacte
+
+# -------------------------------
+# CONFIGURATION DE BASE
+# -------------------------------
+CSV_DIR = "csv"                     # Dossier des CSV de la phase 4 (ils servent d'instantané au run suivant)
+CHANGE_FIELDS = [
+    "change",                       # nouveau / modifié / supprimé
+    "product_page_url",
+    "universal_product_code (upc)",
+    "title",
+    "category",
+    "old_price_including_tax",
+    "new_price_including_tax",
+    "old_number_available",
+    "new_number_available",
+]
+
+
+# -------------------------------
+# Instantané du run précédent
+# -------------------------------
+class Snapshot:
+    """
+    Livres du run précédent, indexés par URL de fiche produit et par UPC.
+    L'instantané est tout simplement l'ensemble des CSV csv/V4_<catégorie>.csv déjà écrits.
+    """
+
+    def __init__(self, records=()):
+        self.by_url = {}
+        self.by_upc = {}
+        for record in records:
+            self.add(record)
+
+    def add(self, record):
+        self.by_url[record["product_page_url"]] = record
+        upc = record.get("universal_product_code (upc)")
+        if upc:
+            self.by_upc[upc] = record
+
+    def __len__(self):
+        return len(self.by_url)
+
+    def get(self, url=None, upc=None):
+        """Cherche un livre par URL, puis par UPC (utile si l'URL de la fiche a changé)."""
+        if url in self.by_url:
+            return self.by_url[url]
+        return self.by_upc.get(upc) if upc else None
+
+def load_snapshot(csv_dir=CSV_DIR):
+    """Charge tous les csv/V4_<catégorie>.csv (hors fichiers *_listing.csv)."""
+    records = []
+    for path in sorted(glob.glob(os.path.join(csv_dir, "V4_*.csv"))):
+        if path.endswith("_listing.csv"):
+            continue
+        with open(path, newline="", encoding="utf-8") as f:
+            records.extend(Book.from_row(row) for row in csv.DictReader(f))
+    return Snapshot(records)
+
+
+# -------------------------------
+# Détection des changements
+# -------------------------------
+def in_stock(record):
+    """Un livre est en stock si son stock n'est pas "0" (vide = en stock mais nombre inconnu, mode listing)."""
+    return str(record.get("number_available", "")) != "0"
+
+def listing_changed(previous, listing_record):
+    """
+    Compare un livre du run précédent avec ce que montre la page de catégorie :
+    prix TTC et disponibilité (en stock / épuisé). Seuls ces deux champs sont visibles sur le listing.
+    """
+    return (previous["price_including_tax"] != listing_record["price_including_tax"]
+            or in_stock(previous) != in_stock(listing_record))
+
+def change_row(change, new=None, old=None):
+    """Ligne du fichier de changements (prix et stock avant / après)."""
+    ref = new or old
+    return {
+        "change": change,
+        "product_page_url": ref["product_page_url"],
+        "universal_product_code (upc)": ref.get("universal_product_code (upc)", ""),
+        "title": ref["title"],
+        "category": ref["category"],
+        "old_price_including_tax": old["price_including_tax"] if old else "",
+        "new_price_including_tax": new["price_including_tax"] if new else "",
+        "old_number_available": old["number_available"] if old else "",
+        "new_number_available": new["number_available"] if new else "",
+    }
+
+def compare(old, new):
+    """Retourne la ligne de changement entre deux versions d'un livre, ou None si prix et stock sont identiques."""
+    if old is None:
+        return change_row("nouveau", new=new)
+    if (old["price_including_tax"] != new["price_including_tax"]
+            or str(old["number_available"]) != str(new["number_available"])):
+        return change_row("modifié", new=new, old=old)
+    return None
+
+def removed(snapshot, seen_urls, categories=None):
+    """Livres de l'instantané qui n'apparaissent plus sur le site (limité aux catégories parcourues)."""
+    return [change_row("supprimé", old=record) for url, record in snapshot.by_url.items()
+            if url not in seen_urls and (categories is None or record["category"] in categories)]
+
+def write_changes(changes, csv_dir=CSV_DIR):
+    """Écrit csv/changes_<date>.csv et retourne son chemin."""
+    os.makedirs(csv_dir, exist_ok=True)
+    path = os.path.join(csv_dir, f"changes_{time.strftime('%Y%m%d-%H%M%S')}.csv")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CHANGE_FIELDS)
+        writer.writeheader()
+        writer.writerows(changes)
+    return path
@@ -0,0 +1,363 @@
+import argparse                     # Lecture des options passées en ligne de commande
+import os                           # Chemin de la base
+import sqlite3                      # Base SQLite (bibliothèque standard)
+import threading                    # Les catégories du crawl asynchrone écrivent en même temps
+import time                         # Début / fin de chaque crawl
+
+import Scrapper_snapshot            # Instantané du run précédent et lignes du fichier de changements
+from Scrapper_record import Book    # Livres typés (prix en pence, stock en entier)
+
+# -------------------------------
+# CONFIGURATION DE BASE
+# -------------------------------
+DB_PATH = os.environ.get("SCRAPPER_DB", "")     # Base SQLite à la place des CSV ("" = CSV)
+BATCH_SIZE = 500                    # Livres écrits par transaction
+PARTIAL_SCRIPTS = ("phase1", "refresh")    # Crawls qui ne relisent qu'une partie des livres (aucun "disparu")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawls (
+    id INTEGER PRIMARY KEY,
+    script TEXT,
+    started TEXT,
+    finished TEXT                   -- NULL : crawl interrompu
+);
+CREATE TABLE IF NOT EXISTS books (
+    id INTEGER PRIMARY KEY,
+    upc TEXT UNIQUE,                -- NULL tant que le livre n'a été vu que sur les pages de catégorie
+    url TEXT NOT NULL UNIQUE,
+    title TEXT,
+    price_incl INTEGER,             -- pence
+    price_excl INTEGER,
+    currency TEXT,
+    available INTEGER,              -- NULL : en stock, nombre inconnu
+    description TEXT,
+    category TEXT,
+    rating INTEGER,
+    image_url TEXT,
+    first_crawl INTEGER REFERENCES crawls(id),
+    last_crawl INTEGER REFERENCES crawls(id)
+);
+CREATE INDEX IF NOT EXISTS books_category ON books(category);
+CREATE INDEX IF NOT EXISTS books_price ON books(price_incl);
+CREATE TABLE IF NOT EXISTS history (
+    book_id INTEGER REFERENCES books(id),
+    crawl_id INTEGER REFERENCES crawls(id),
+    price_incl INTEGER,
+    available INTEGER,
+    PRIMARY KEY (book_id, crawl_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS history_crawl ON history(crawl_id);
+"""
+
+# Fiche produit : le livre est cherché par UPC puis par URL (BookStore._product_id), puis tout est remplacé
+INSERT_PRODUCT = """
+INSERT INTO books (upc, url, title, price_incl, price_excl, currency, available, description, category, rating,
+                   image_url, first_crawl, last_crawl)
+VALUES (:upc, :url, :title, :price_incl, :price_excl, :currency, :available, :description, :category, :rating,
+        :image_url, :crawl, :crawl)
+RETURNING id, available
+"""
+UPDATE_PRODUCT = """
+UPDATE books SET url = :url, upc = :upc, title = :title, price_incl = :price_incl, price_excl = :price_excl,
+    currency = :currency, available = :available, description = :description, category = :category,
+    rating = :rating, image_url = :image_url, last_crawl = :crawl
+WHERE id = :id
+RETURNING id, available
+"""
+# Page de catégorie (mode listing) : pas d'UPC, de prix HT ni de description, une miniature au lieu de l'image.
+# Ce qui vient de la fiche produit est gardé; "en stock" sans nombre garde le dernier stock connu (s'il n'est pas 0).
+UPSERT_LISTING = """
+INSERT INTO books (url, title, price_incl, currency, available, category, rating, image_url, first_crawl, last_crawl)
+VALUES (:url, :title, :price_incl, :currency, :available, :category, :rating, :image_url, :crawl, :crawl)
+ON CONFLICT (url) DO UPDATE SET title = excluded.title, price_incl = excluded.price_incl,
+    currency = excluded.currency, category = excluded.category, rating = excluded.rating,
+    available = CASE WHEN excluded.available IS NOT NULL OR books.available = 0 THEN excluded.available
+                     ELSE books.available END,
+    last_crawl = excluded.last_crawl
+RETURNING id, available
+"""
+INSERT_HISTORY = "INSERT OR REPLACE INTO history (book_id, crawl_id, price_incl, available) VALUES (?, ?, ?, ?)"
+BOOK_COLUMNS = "url, upc, title, price_incl, price_excl, currency, available, description, category, rating, image_url"
+_B_COLUMNS = ", ".join("b." + column for column in BOOK_COLUMNS.split(", "))    # Requêtes avec jointure
+
+
+def from_env(script=""):
+    """Base configurée par la variable d'environnement SCRAPPER_DB (None : les livres vont dans les CSV)."""
+    return BookStore(DB_PATH, script) if DB_PATH else None
+
+def _book(row):
+    """Book depuis une ligne "SELECT {BOOK_COLUMNS} FROM books"."""
+    return Book(*row)
+
+
+# -------------------------------
+# Base SQLite : un crawl = une transaction par lot
+# -------------------------------
+class BookStore:
+    """
+    Livres de tous les crawls dans une base SQLite, à la place des CSV :
+    - books : un livre par UPC (mis à jour à chaque crawl), index sur la catégorie et le prix TTC ;
+    - history : prix et stock de chaque livre à chaque crawl (une ligne par livre et par crawl) ;
+    - crawls : un run de script = un crawl.
+    Les livres arrivent un par un (add, ou sink() qui s'utilise comme un CsvSink) et sont écrits
+    par lots de batch_size dans une seule transaction. close() écrit le dernier lot et termine le crawl.
+    read_only=True : base ouverte pour des requêtes seulement (aucun crawl n'est créé).
+    """
+
+    def __init__(self, path, script="", batch_size=BATCH_SIZE, read_only=False):
+        self.path = path
+        self.batch_size = batch_size
+        self.count = 0
+        self._rows = []
+        self._lock = threading.Lock()
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)   # Utilisée sous self._lock seulement
+        self.conn.execute("PRAGMA journal_mode = WAL")      # Lecteurs non bloqués pendant le crawl
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.crawl_id = None
+        if read_only:
+            return
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            self.crawl_id = self.conn.execute("INSERT INTO crawls (script, started) VALUES (?, ?)",
+                                              (script, _now())).lastrowid
+
+    def add(self, record):
+        """Ajoute un livre (Book ou dictionnaire aux colonnes du CSV); écrit un lot quand il est plein."""
+        book = record if isinstance(record, Book) else Book.from_row(record)
+        with self._lock:
+            self._rows.append(book)
+            if len(self._rows) >= self.batch_size:
+                self._flush()
+
+    def _flush(self):
+        """
+        Écrit les livres en attente dans une transaction (verrou pris). Si la transaction échoue,
+        elle est annulée et le lot reste en attente (réessayé au prochain lot ou à close()).
+        """
+        if not self._rows:
+            return
+        rows, self._rows = self._rows, []
+        try:
+            with self.conn:
+                for book in rows:
+                    params = {"upc": book.upc or None, "url": book.url, "title": book.title,
+                              "price_incl": book.price_incl, "price_excl": book.price_excl, "currency": book.currency,
+                              "available": book.available, "description": book.description,
+                              "category": book.category, "rating": book.rating, "image_url": book.image_url,
+                              "crawl": self.crawl_id}
+                    if params["upc"]:
+                        params["id"] = self._product_id(params["upc"], params["url"])
+                        query = INSERT_PRODUCT if params["id"] is None else UPDATE_PRODUCT
+                    else:
+                        query = UPSERT_LISTING
+                    book_id, available = self.conn.execute(query, params).fetchone()
+                    self.conn.execute(INSERT_HISTORY, (book_id, self.crawl_id, book.price_incl, available))
+        except BaseException:
+            self._rows = rows + self._rows
+            raise
+        self.count += len(rows)
+
+    def _product_id(self, upc, url):
+        """
+        Ligne d'une fiche produit : celle de son UPC, sinon celle de son URL (livre vu seulement en mode listing),
+        None pour un nouveau livre. Si l'UPC et l'URL désignent deux lignes différentes (nouvelle URL notée
+        par un crawl listing, UPC connu d'un crawl complet plus ancien), la ligne de l'URL est fusionnée
+        dans celle de l'UPC : son historique y est déplacé et elle est supprimée (l'URL est unique).
+        """
+        by_upc = self.conn.execute("SELECT id FROM books WHERE upc = ?", (upc,)).fetchone()
+        by_url = self.conn.execute("SELECT id, first_crawl FROM books WHERE url = ?", (url,)).fetchone()
+        if by_upc is None:
+            return by_url[0] if by_url else None
+        if by_url is not None and by_url[0] != by_upc[0]:
+            stale, first_crawl = by_url
+            # Crawl présent des deux côtés : la ligne de l'UPC est gardée
+            self.conn.execute("UPDATE OR IGNORE history SET book_id = ? WHERE book_id = ?", (by_upc[0], stale))
+            self.conn.execute("DELETE FROM history WHERE book_id = ?", (stale,))
+            self.conn.execute("DELETE FROM books WHERE id = ?", (stale,))
+            self.conn.execute("UPDATE books SET first_crawl = MIN(first_crawl, ?) WHERE id = ?",
+                              (first_crawl, by_upc[0]))
+        return by_upc[0]
+
+    def sink(self, name, dataset=None):
+        """Remplaçant d'un CsvSink (mêmes méthodes) : les livres d'un fichier / d'une catégorie vont dans la base."""
+        return SqliteSink(self, name, dataset)
+
+    def close(self):
+        """Écrit le dernier lot, note la fin du crawl et ferme la base."""
+        with self._lock:
+            self._flush()
+            if self.crawl_id is not None:
+                with self.conn:
+                    self.conn.execute("UPDATE crawls SET finished = ? WHERE id = ?", (_now(), self.crawl_id))
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------ Lectures ------------------
+    def get(self, upc=None, url=None):
+        """Livre par UPC ou par URL de fiche produit (index), None s'il n'est pas dans la base."""
+        column, value = ("upc", upc) if upc else ("url", url)
+        with self._lock:
+            row = self.conn.execute(f"SELECT {BOOK_COLUMNS} FROM books WHERE {column} = ?", (value,)).fetchone()
+        return _book(row) if row else None
+
+    def history(self, upc):
+        """[(crawl, début du crawl, prix TTC en pence, stock), ...] d'un livre, du plus ancien au plus récent."""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT h.crawl_id, c.started, h.price_incl, h.available FROM books b "
+                "JOIN history h ON h.book_id = b.id JOIN crawls c ON c.id = h.crawl_id "
+                "WHERE b.upc = ? ORDER BY h.crawl_id", (upc,)).fetchall()
+
+    def load_snapshot(self):
+        """
+        Instantané du mode incrémental, comme les CSV (un fichier par catégorie, réécrit à chaque run) :
+        pour chaque catégorie, les livres vus par le dernier crawl terminé qui l'a parcourue (ou depuis,
+        par un crawl terminé), avec leurs derniers prix et stocks connus. Un livre disparu du site
+        n'y est donc plus au run suivant (il n'est signalé "supprimé" qu'une fois); un crawl interrompu,
+        qui n'a pas écrit ses changements, ne compte pas.
+        """
+        partial = ", ".join("?" * len(PARTIAL_SCRIPTS))
+        with self._lock:
+            rows = self.conn.execute(f"""
+                WITH last AS (
+                    SELECT b.category, MAX(h.crawl_id) AS crawl_id FROM history h
+                    JOIN books b ON b.id = h.book_id JOIN crawls c ON c.id = h.crawl_id
+                    WHERE c.finished IS NOT NULL AND c.script NOT IN ({partial})
+                    GROUP BY b.category)
+                SELECT {_B_COLUMNS} FROM books b JOIN last ON last.category IS b.category
+                WHERE EXISTS (SELECT 1 FROM history h JOIN crawls c ON c.id = h.crawl_id
+                              WHERE h.book_id = b.id AND h.crawl_id >= last.crawl_id AND c.finished IS NOT NULL)""",
+                PARTIAL_SCRIPTS).fetchall()
+        return Scrapper_snapshot.Snapshot(_book(row) for row in rows)
+
+    def changes(self, crawl_id=None):
+        """
+        Changements de prix / stock entre un crawl (par défaut le dernier) et le précédent, au format
+        du fichier de changements (Scrapper_snapshot.CHANGE_FIELDS). La version précédente de chaque livre
+        est lue dans history par sa clé (livre, crawl) : aucun parcours de tout l'historique.
+        """
+        with self._lock:
+            if crawl_id is None:
+                crawl_id = self.conn.execute("SELECT MAX(crawl_id) FROM history").fetchone()[0]
+            previous_id = self.conn.execute("SELECT MAX(crawl_id) FROM history WHERE crawl_id < ?",
+                                            (crawl_id,)).fetchone()[0]
+            changed = self.conn.execute(f"""
+                SELECT {_B_COLUMNS}, cur.price_incl, cur.available, old.crawl_id, old.price_incl, old.available
+                FROM history cur JOIN books b ON b.id = cur.book_id
+                LEFT JOIN history old ON old.book_id = cur.book_id AND old.crawl_id = (
+                    SELECT MAX(crawl_id) FROM history WHERE book_id = cur.book_id AND crawl_id < cur.crawl_id)
+                WHERE cur.crawl_id = :crawl
+                  AND (old.crawl_id IS NULL OR old.price_incl IS NOT cur.price_incl
+                       OR old.available IS NOT cur.available)""", {"crawl": crawl_id}).fetchall()
+            # Disparus : vus au crawl précédent, pas à celui-ci, dans une catégorie parcourue par celui-ci
+            # (sauf re-scrape ciblé : les livres non demandés n'ont pas disparu)
+            script = self.conn.execute("SELECT script FROM crawls WHERE id = ?", (crawl_id,)).fetchone()
+            gone = [] if script and script[0] in PARTIAL_SCRIPTS else self.conn.execute(f"""
+                SELECT {_B_COLUMNS}, old.price_incl, old.available FROM history old
+                JOIN books b ON b.id = old.book_id
+                WHERE old.crawl_id = :previous
+                  AND NOT EXISTS (SELECT 1 FROM history WHERE book_id = old.book_id AND crawl_id = :crawl)
+                  AND b.category IN (SELECT DISTINCT category FROM books WHERE last_crawl = :crawl)""",
+                {"crawl": crawl_id, "previous": previous_id}).fetchall()
+        rows = []
+        for row in changed:
+            new = _version(row[:11], *row[11:13])
+            if row[13] is None:
+                rows.append(Scrapper_snapshot.change_row("nouveau", new=new))
+            else:
+                rows.append(Scrapper_snapshot.change_row("modifié", new=new, old=_version(row[:11], *row[14:16])))
+        rows.extend(Scrapper_snapshot.change_row("supprimé", old=_version(row[:11], *row[11:13])) for row in gone)
+        rows.sort(key=lambda row: (row["category"], row["product_page_url"]))
+        return rows
+
+def _version(columns, price_incl, available):
+    """Le livre avec le prix et le stock d'un crawl donné (ligne de history)."""
+    book = _book(columns)
+    book.price_incl, book.available = price_incl, available
+    return book
+
+def _now():
+    return time.strftime("%Y-%m-%d %H:%M:%S")
+
+
+class SqliteSink:
+    """
+    Même interface que Scrapper_storage.CsvSink (write, write_all, count, path, close, with ...),
+    mais les livres vont dans la base du BookStore. path désigne la base et la catégorie, pour les messages.
+    dataset : Scrapper_dataset.DatasetWriter qui reçoit aussi chaque livre (export Parquet / Arrow).
+    """
+
+    def __init__(self, store, name, dataset=None):
+        self.store = store
+        self.path = f"{store.path} [{os.path.splitext(os.path.basename(name))[0]}]"
+        self.dataset = dataset
+        self.count = 0
+
+    def write(self, record):
+        self.store.add(record)
+        if self.dataset is not None:
+            self.dataset.add(record)
+        self.count += 1
+
+    def write_all(self, records):
+        for record in records:
+            self.write(record)
+        return self.count
+
+    def close(self):
+        pass                                # Le lot en cours est écrit par le BookStore (lot plein ou close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# -------------------------------
+# Requêtes en ligne de commande
+# -------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Requêtes sur la base SQLite des livres (SCRAPPER_DB)")
+    parser.add_argument("base", help="fichier SQLite écrit par les scripts")
+    parser.add_argument("--upc", help="un livre et l'historique de son prix et de son stock")
+    parser.add_argument("--changements", nargs="?", type=int, const=0, metavar="CRAWL",
+                        help="changements depuis le crawl précédent (par défaut ceux du dernier crawl)")
+    args = parser.parse_args()
+    if not os.path.exists(args.base):
+        parser.error(f"{args.base} n'existe pas")
+
+    with BookStore(args.base, read_only=True) as store:
+        if args.upc:
+            book = store.get(upc=args.upc)
+            if book is None:
+                print(f"Aucun livre avec l'UPC {args.upc}")
+                return
+            print(f"📖 {book.title} ({book.category}) : {book['price_including_tax']}, stock {book['number_available']}")
+            for crawl_id, started, price, available in store.history(args.upc):
+                print(f"   crawl {crawl_id} ({started}) : {book.format_price(price)}, "
+                      f"stock {'?' if available is None else available}")
+            return
+        if args.changements is not None:
+            changes = store.changes(args.changements or None)
+            path = Scrapper_snapshot.write_changes(changes, os.path.dirname(args.base) or ".")
+            print(f"🔁 {len(changes)} changements (prix / stock) enregistrés dans {path}")
+            return
+        crawls, = store.conn.execute("SELECT COUNT(*) FROM crawls").fetchone()
+        books, = store.conn.execute("SELECT COUNT(*) FROM books").fetchone()
+        print(f"🗄️  {books} livres, {crawls} crawls")
+        for category, count, mean in store.conn.execute(
+                "SELECT category, COUNT(*), AVG(price_incl) / 100.0 FROM books GROUP BY category ORDER BY category"):
+            print(f"   {category:30} {count:5} livres, prix moyen {mean or 0:7.2f}")
+
+
+if __name__ == "__main__":
+    main()
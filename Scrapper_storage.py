@@ -0,0 +1,105 @@
+import csv                          # Écriture des fichiers CSV
+import os                           # Création du dossier de sortie
+
+import Scrapper_metrics             # Temps d'écriture CSV (si l'instrumentation est activée)
+
+# -------------------------------
+# CONFIGURATION DE BASE
+# -------------------------------
+# Colonnes communes à toutes les phases (dans l'ordre du CSV)
+FIELDNAMES = [
+    "product_page_url",
+    "universal_product_code (upc)",
+    "title",
+    "price_including_tax",
+    "price_excluding_tax",
+    "number_available",
+    "product_description",
+    "category",
+    "review_rating",
+    "image_url"
+]
+
+
+# -------------------------------
+# Écriture CSV en continu
+# -------------------------------
+class CsvSink:
+    """
+    Écrit les livres dans un CSV au fur et à mesure de leur extraction :
+    chaque ligne est écrite et vidée sur le disque tout de suite, rien n'est gardé en mémoire.
+    Le fichier partiel est donc lisible pendant le crawl.
+    dataset : Scrapper_dataset.DatasetWriter qui reçoit aussi chaque livre (export Parquet / Arrow).
+
+        with CsvSink("livres.csv") as sink:
+            for book in books:
+                sink.write(book)
+    """
+
+    def __init__(self, path, fieldnames=FIELDNAMES, dataset=None):
+        self.path = path
+        self.fieldnames = fieldnames
+        self.dataset = dataset
+        self.count = 0                      # Nombre de lignes écrites (hors en-tête)
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=fieldnames)
+        self._writer.writeheader()          # écrit la première ligne (titres des colonnes)
+        self._file.flush()
+
+    def write(self, record):
+        """Ajoute une ligne et la pousse sur le disque."""
+        with Scrapper_metrics.timer("csv"):
+            self._writer.writerow(record)
+            self._file.flush()
+        if self.dataset is not None:
+            self.dataset.add(record)
+        self.count += 1
+
+    def write_all(self, records):
+        """Écrit tous les livres d'un itérable (liste ou générateur) et retourne le nombre de lignes."""
+        for record in records:
+            self.write(record)
+        return self.count
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def update_csv(path, updates, removed=()):
+    """
+    Met à jour un CSV en place : les lignes dont l'URL (product_page_url) est une clé de updates sont remplacées,
+    celles de removed supprimées, et les livres de updates absents du fichier ajoutés à la fin.
+    Le fichier est réécrit à côté puis renommé : il n'est jamais lu à moitié écrit. Retourne le nombre de lignes.
+    """
+    pending = dict(updates)
+    rows = []
+    if os.path.exists(path):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                url = row["product_page_url"]
+                if url in removed:
+                    continue
+                rows.append(pending.pop(url, row))
+    rows.extend(pending.values())           # Livres qui n'étaient pas encore dans ce CSV
+    with CsvSink(path + ".part") as sink:
+        sink.write_all(rows)
+    os.replace(path + ".part", path)
+    return sink.count
+
+def open_sink(path, dataset=None, store=None):
+    """
+    CsvSink du fichier path, ou, avec store (Scrapper_sqlite.BookStore), un sink aux mêmes méthodes
+    qui écrit les livres dans la base SQLite au lieu du CSV.
+    """
+    if store is not None:
+        return store.sink(path, dataset)
+    return CsvSink(path, dataset=dataset)
@@ -0,0 +1,76 @@
+import hashlib                      # Empreinte courte des URLs déjà vues
+import threading                    # La frontière est partagée par les threads (images, fiches en parallèle)
+from urllib.parse import urljoin, urlsplit, urlunsplit  # Résolution des liens relatifs (../../, page-2.html...)
+
+# -------------------------------
+# CONFIGURATION DE BASE
+# -------------------------------
+DEFAULT_PORTS = {"http": 80, "https": 443}      # Port retiré de l'URL quand c'est celui du protocole
+FINGERPRINT_SIZE = 8                # Octets d'empreinte gardés par URL vue (au lieu de l'URL entière)
+
+
+# -------------------------------
+# URLs canoniques
+# -------------------------------
+def normalize(url):
+    """
+    Forme canonique d'une URL absolue : protocole et hôte en minuscules, port par défaut retiré,
+    chemin vide => "/", fragment (#...) retiré. Deux écritures de la même page donnent la même URL.
+    """
+    parts = urlsplit(url)
+    scheme, host = parts.scheme.lower(), (parts.hostname or "")
+    if ":" in host:
+        host = f"[{host}]"                  # Adresse IPv6
+    netloc = host if parts.port in (None, DEFAULT_PORTS.get(scheme)) else f"{host}:{parts.port}"
+    if parts.username:
+        netloc = f"{parts.username}{':' + parts.password if parts.password else ''}@{netloc}"
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+def resolve(page_url, href):
+    """
+    URL absolue d'un lien (href, src) lu sur la page page_url, comme le ferait un navigateur :
+    "../../../livre_1/index.html" depuis une page de catégorie, "../../media/..." depuis une fiche produit,
+    "page-2.html" depuis une page de listing. Remplace les .replace("../../", ...) propres à chaque phase.
+    """
+    return normalize(urljoin(page_url, href.strip()))
+
+
+# -------------------------------
+# Frontière : URLs déjà vues pendant un run
+# -------------------------------
+class Frontier:
+    """
+    Ensemble des URLs (pages de listing, fiches produit, images) déjà prises en charge pendant un run :
+    add() retourne False pour une URL déjà vue, qui n'est alors pas re-téléchargée.
+    Chaque URL est gardée sous forme d'une empreinte de FINGERPRINT_SIZE octets (un entier), pas en entier.
+    """
+
+    def __init__(self):
+        self._seen = set()
+        self._lock = threading.Lock()
+        self.duplicates = 0                 # URLs proposées une deuxième fois (requêtes évitées)
+
+    def add(self, url):
+        """Note l'URL; True si elle est nouvelle, False si elle a déjà été vue pendant ce run."""
+        key = _fingerprint(url)
+        with self._lock:
+            if key in self._seen:
+                self.duplicates += 1
+                return False
+            self._seen.add(key)
+            return True
+
+    def __contains__(self, url):
+        with self._lock:
+            return _fingerprint(url) in self._seen
+
+    def __len__(self):
+        return len(self._seen)
+
+    def report(self):
+        """Résumé lisible pour la fin du script."""
+        return f"{len(self)} URLs vues, {self.duplicates} doublons non re-téléchargés"
+
+def _fingerprint(url):
+    digest = hashlib.blake2b(normalize(url).encode("utf-8"), digest_size=FINGERPRINT_SIZE).digest()
+    return int.from_bytes(digest, "big")
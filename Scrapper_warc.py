@@ -0,0 +1,146 @@
+import base64                       # Empreinte SHA-1 du corps (format WARC : base32)
+import gzip                         # Chaque enregistrement est un membre gzip (fichier .warc.gz standard)
+import hashlib                      # Empreinte du corps
+import os                           # Archive choisie par variable d'environnement
+import threading                    # Les réponses arrivent de plusieurs threads
+import uuid                         # Identifiant unique de chaque enregistrement
+import zlib                         # Lecture membre par membre (position de chaque enregistrement)
+from datetime import datetime, timezone     # Date des enregistrements
+
+# -------------------------------
+# CONFIGURATION DE BASE
+# -------------------------------
+WARC_FILE = os.environ.get("SCRAPPER_WARC", "")     # Archive des réponses ("" = pas d'archive)
+CHUNK_SIZE = 256 * 1024             # Lecture de l'archive par morceaux de 256 Ko
+# En-têtes non recopiés : le corps est enregistré décompressé et d'un seul bloc
+DROPPED_HEADERS = ("content-encoding", "transfer-encoding", "content-length", "connection", "keep-alive")
+
+
+def from_env():
+    """Archive configurée par la variable d'environnement SCRAPPER_WARC."""
+    return WarcWriter(WARC_FILE) if WARC_FILE else None
+
+
+# -------------------------------
+# Écriture
+# -------------------------------
+class WarcWriter:
+    """
+    Archive WARC 1.0 (.warc.gz) de toutes les réponses reçues : un enregistrement "response" par réponse
+    (ligne de statut, en-têtes et corps HTTP), chacun compressé dans son propre membre gzip.
+    Le corps est gardé décompressé (Content-Encoding retiré) : l'archive se relit sans réseau avec Scrapper_replay.
+    Le fichier est ouvert en ajout : plusieurs runs peuvent alimenter la même archive.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.records = 0
+        self._lock = threading.Lock()
+        self._file = open(path, "ab")
+        self._write(self._record("warcinfo", None, "application/warc-fields",
+                                 b"software: Scrapper-books\r\nformat: WARC File Format 1.0\r\n"))
+
+    def write_response(self, url, response):
+        """Enregistre une réponse requests (corps déjà lu)."""
+        body = response.content
+        lines = [f"HTTP/1.1 {response.status_code} {response.reason or ''}".rstrip()]
+        lines += [f"{name}: {value}" for name, value in response.headers.items() if name.lower() not in DROPPED_HEADERS]
+        lines.append(f"Content-Length: {len(body)}")
+        block = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+        digest = "sha1:" + base64.b32encode(hashlib.sha1(body).digest()).decode("ascii")
+        self._write(self._record("response", url, "application/http;msgtype=response", block,
+                                 {"WARC-Payload-Digest": digest}))
+
+    @staticmethod
+    def _record(kind, url, content_type, block, extra=None):
+        headers = {
+            "WARC-Type": kind,
+            "WARC-Record-ID": f"<urn:uuid:{uuid.uuid4()}>",
+            "WARC-Date": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+        if url:
+            headers["WARC-Target-URI"] = url
+        headers.update(extra or {})
+        headers["Content-Type"] = content_type
+        headers["Content-Length"] = str(len(block))
+        head = "WARC/1.0\r\n" + "".join(f"{name}: {value}\r\n" for name, value in headers.items()) + "\r\n"
+        return head.encode("utf-8") + block + b"\r\n\r\n"
+
+    def _write(self, record):
+        data = gzip.compress(record, 6)
+        with self._lock:
+            self._file.write(data)
+            self._file.flush()              # Une archive coupée par un arrêt reste lisible jusqu'au dernier enregistrement
+            self.records += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+# -------------------------------
+# Lecture
+# -------------------------------
+def iter_members(path):
+    """(position, longueur, contenu décompressé) de chaque membre gzip; un dernier membre tronqué est ignoré."""
+    with open(path, "rb") as f:
+        offset = 0
+        buffer = f.read(CHUNK_SIZE)
+        while buffer:
+            start = offset
+            decompressor = zlib.decompressobj(31)      # 31 = format gzip
+            parts = []
+            while not decompressor.eof:
+                if not buffer:
+                    buffer = f.read(CHUNK_SIZE)
+                    if not buffer:
+                        return                          # Membre tronqué (arrêt pendant l'écriture)
+                parts.append(decompressor.decompress(buffer))
+                offset += len(buffer) - len(decompressor.unused_data)
+                buffer = decompressor.unused_data
+            yield start, offset - start, b"".join(parts)
+            if not buffer:
+                buffer = f.read(CHUNK_SIZE)
+
+def parse_record(data):
+    """(en-têtes WARC, bloc) d'un enregistrement décompressé."""
+    head, _, rest = data.partition(b"\r\n\r\n")
+    headers = {}
+    for line in head.decode("utf-8").split("\r\n")[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip()] = value.strip()
+    return headers, rest[:int(headers.get("Content-Length", len(rest)))]
+
+def parse_http(block):
+    """(code, raison, [(en-tête, valeur)], corps) d'un bloc "response"."""
+    head, _, body = block.partition(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = lines[0].split(" ", 2)
+    headers = [tuple(part.strip() for part in line.split(":", 1)) for line in lines[1:] if ":" in line]
+    return int(status[1]), status[2] if len(status) > 2 else "", headers, body
+
+def build_index(path):
+    """
+    {URL: (position, longueur)} des réponses de l'archive. Pour une URL enregistrée plusieurs fois,
+    la dernière réponse 200 l'emporte (une erreur passagère suivie d'un réessai réussi, un run plus récent...).
+    """
+    index = {}
+    ok = set()
+    for offset, length, data in iter_members(path):
+        headers, block = parse_record(data)
+        if headers.get("WARC-Type") != "response":
+            continue
+        url = headers["WARC-Target-URI"]
+        status = parse_http(block)[0]
+        if status == 200:
+            ok.add(url)
+        elif url in ok:
+            continue
+        index[url] = (offset, length)
+    return index
+
+def read_response(f, location):
+    """(code, raison, en-têtes, corps) de l'enregistrement à la position donnée (fichier ouvert en binaire)."""
+    offset, length = location
+    f.seek(offset)
+    return parse_http(parse_record(gzip.decompress(f.read(length)))[1])
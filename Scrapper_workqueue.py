@@ -0,0 +1,217 @@
+import contextlib                   # Bail renouvelé pendant le traitement d'une tâche (with queue.keep_lease(...))
+import json                         # Contenu des tâches et résultats (JSON)
+import os                           # Dossier de la file
+import sqlite3                      # File partagée : une base SQLite (plusieurs processus d'une même machine)
+import threading                    # Renouvellement du bail dans un thread pendant que le worker travaille
+import time                         # Baux (heure d'expiration)
+
+# -------------------------------
+# CONFIGURATION DE BASE
+# -------------------------------
+LEASE_SECONDS = 60                  # Durée d'un bail sans renouvellement : passé ce délai (worker arrêté), la tâche est redonnée
+MAX_LEASES = 3                      # Baux expirés au-delà desquels la tâche est notée en échec (elle fait planter les workers)
+BUSY_TIMEOUT = 30                   # Attente max (s) quand un autre processus écrit dans la file
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL UNIQUE,       -- une tâche n'est ajoutée qu'une fois, même si deux workers la découvrent
+    payload TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'pending',      -- pending / leased / done / failed
+    worker TEXT,
+    lease_until REAL,
+    leases INTEGER NOT NULL DEFAULT 0,
+    result TEXT                     -- JSON (done) ou message d'erreur (failed)
+);
+CREATE INDEX IF NOT EXISTS items_ready ON items(state, priority, id);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+class WorkItem:
+    """Tâche confiée à un worker (bail) : kind ("listing", "book", "image"...) et payload (dictionnaire)."""
+
+    __slots__ = ("id", "kind", "payload", "worker")
+
+    def __init__(self, id, kind, payload, worker):
+        self.id = id
+        self.kind = kind
+        self.payload = payload
+        self.worker = worker
+
+    def __repr__(self):
+        return f"WorkItem({self.id}, {self.kind!r}, {self.payload.get('url')!r})"
+
+
+# -------------------------------
+# File de tâches avec baux
+# -------------------------------
+class WorkQueue:
+    """
+    File de tâches partagée par plusieurs workers (processus) dans une base SQLite, sur une seule machine :
+    en mode WAL, SQLite a besoin d'une mémoire partagée entre les processus et ne marche pas sur un disque
+    réseau (NFS, SMB), où les baux pourraient être perdus ou corrompus. path doit être sur un disque local.
+    Un worker prend une tâche avec lease() : elle lui est réservée pendant lease_seconds, et renouvelée
+    tant qu'il la traite (keep_lease : une tâche longue, avec réessais et backoff, reste à son worker).
+    complete() la termine (avec son résultat et les nouvelles tâches découvertes, dans la même transaction);
+    si le worker s'arrête, le bail expire et la tâche est redonnée au suivant (au plus max_leases fois).
+    Un worker dont le bail a été repris ne peut plus terminer la tâche : son résultat est ignoré.
+    """
+
+    def __init__(self, path, lease_seconds=LEASE_SECONDS, max_leases=MAX_LEASES):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_leases = max_leases
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.conn = self._connect()
+        self.conn.execute("PRAGMA journal_mode = WAL")      # Lecteurs non bloqués par un écrivain (disque local seulement)
+        self.conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # isolation_level=None : transactions explicites (BEGIN IMMEDIATE) pour que deux workers ne prennent
+        # jamais la même tâche
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    def _transaction(self, conn=None):
+        return _Transaction(conn or self.conn)
+
+    # ------------------ Coordinateur ------------------
+    def put(self, items):
+        """Ajoute des tâches [(kind, key, payload, priority), ...]; une clé déjà connue est ignorée."""
+        with self._transaction():
+            self._insert(items)
+
+    def _insert(self, items):
+        self.conn.executemany("INSERT OR IGNORE INTO items (kind, key, payload, priority) VALUES (?, ?, ?, ?)",
+                              [(kind, key, json.dumps(payload, ensure_ascii=False), priority)
+                               for kind, key, payload, priority in items])
+
+    def set_meta(self, key, value):
+        with self._transaction():
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def meta(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    # ------------------ Workers ------------------
+    def lease(self, worker):
+        """
+        Réserve la prochaine tâche pour worker (priorité la plus basse d'abord, puis ordre d'ajout) :
+        une tâche dont le bail a expiré passe avant les autres. None s'il n'y a rien à prendre pour l'instant.
+        """
+        now = time.time()
+        with self._transaction():
+            # Bail expiré trop de fois : la tâche fait planter les workers, elle est notée en échec
+            self.conn.execute("UPDATE items SET state = 'failed', result = ? "
+                              "WHERE state = 'leased' AND lease_until < ? AND leases >= ?",
+                              (f"Bail expiré {self.max_leases} fois (worker arrêté ?)", now, self.max_leases))
+            row = (self.conn.execute("SELECT id, kind, payload FROM items WHERE state = 'leased' AND lease_until < ? "
+                                     "LIMIT 1", (now,)).fetchone()
+                   or self.conn.execute("SELECT id, kind, payload FROM items WHERE state = 'pending' "
+                                        "ORDER BY priority, id LIMIT 1").fetchone())
+            if row is None:
+                return None
+            self.conn.execute("UPDATE items SET state = 'leased', worker = ?, lease_until = ?, leases = leases + 1 "
+                              "WHERE id = ?", (worker, now + self.lease_seconds, row[0]))
+        return WorkItem(row[0], row[1], json.loads(row[2]), worker)
+
+    def complete(self, item, result=None, children=()):
+        """
+        Termine une tâche et ajoute les tâches qu'elle a découvertes. Retourne False si le bail a été
+        repris par un autre worker entre-temps (rien n'est écrit).
+        """
+        with self._transaction():
+            updated = self.conn.execute("UPDATE items SET state = 'done', result = ?, lease_until = NULL "
+                                        "WHERE id = ? AND worker = ? AND state = 'leased'",
+                                        (json.dumps(result, ensure_ascii=False), item.id, item.worker)).rowcount
+            if updated:
+                self._insert(children)
+        return bool(updated)
+
+    def renew(self, item, conn=None):
+        """Prolonge le bail d'une tâche en cours; False s'il a été repris par un autre worker entre-temps."""
+        conn = conn or self.conn
+        with self._transaction(conn):
+            return bool(conn.execute("UPDATE items SET lease_until = ? WHERE id = ? AND worker = ? AND state = 'leased'",
+                                     (time.time() + self.lease_seconds, item.id, item.worker)).rowcount)
+
+    @contextlib.contextmanager
+    def keep_lease(self, item):
+        """
+        Renouvelle le bail de item toutes les lease_seconds / 3 pendant le bloc with (thread, avec sa propre
+        connexion SQLite) : seul un worker arrêté laisse expirer son bail.
+        """
+        stop = threading.Event()
+
+        def heartbeat():
+            conn = None
+            try:
+                while not stop.wait(self.lease_seconds / 3):
+                    conn = conn or self._connect()
+                    if not self.renew(item, conn):
+                        break
+            finally:
+                if conn is not None:
+                    conn.close()
+
+        thread = threading.Thread(target=heartbeat, daemon=True)
+        thread.start()
+        try:
+            yield item
+        finally:
+            stop.set()
+            thread.join()
+
+    def fail(self, item, error):
+        """Échec définitif (après les réessais du transport) : la tâche n'est pas redonnée."""
+        with self._transaction():
+            self.conn.execute("UPDATE items SET state = 'failed', result = ?, lease_until = NULL "
+                              "WHERE id = ? AND worker = ? AND state = 'leased'", (error, item.id, item.worker))
+
+    # ------------------ Suivi et résultats ------------------
+    def counts(self):
+        """{état: nombre de tâches}."""
+        return dict(self.conn.execute("SELECT state, COUNT(*) FROM items GROUP BY state"))
+
+    def finished(self):
+        """Plus aucune tâche en attente ni en cours."""
+        counts = self.counts()
+        return not counts.get("pending") and not counts.get("leased")
+
+    def results(self, kind):
+        """[(payload, résultat), ...] des tâches terminées d'un type, dans l'ordre d'ajout."""
+        return [(json.loads(payload), json.loads(result)) for payload, result in self.conn.execute(
+            "SELECT payload, result FROM items WHERE kind = ? AND state = 'done' ORDER BY id", (kind,))]
+
+    def failures(self):
+        """[(kind, payload, erreur), ...] des tâches en échec."""
+        return [(kind, json.loads(payload), error) for kind, payload, error in self.conn.execute(
+            "SELECT kind, payload, result FROM items WHERE state = 'failed' ORDER BY id")]
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT (ROLLBACK sur erreur) : le verrou d'écriture est pris dès le début."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, *exc):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
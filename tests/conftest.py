@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Les scripts sont à la racine du dépôt (pas de paquet) : on les rend importables depuis les tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,45 @@
+import csv
+
+import Scrapper_distributed
+from Scrapper_workqueue import WorkQueue
+
+BOOK = "http://books.local/catalogue/shared_1/index.html"
+OTHER = "http://books.local/catalogue/other_2/index.html"
+
+
+def record(url, title):
+    return {"product_page_url": url, "universal_product_code (upc)": title.lower(), "title": title,
+            "price_including_tax": "£10.00", "price_excluding_tax": "£10.00", "number_available": "3",
+            "product_description": "", "category": "Poetry", "review_rating": 3, "image_url": ""}
+
+def work(queue, handlers):
+    """Worker de test : chaque tâche est terminée avec handlers[kind](payload) => (résultat, tâches découvertes)."""
+    while True:
+        item = queue.lease("test")
+        if item is None:
+            return
+        queue.complete(item, *handlers[item.kind](item.payload))
+
+def test_book_listed_in_two_categories_is_written_to_both(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    listings = {"Poetry": [BOOK, OTHER, BOOK], "Travel": [BOOK]}
+
+    def listing(payload):
+        urls = listings[payload["category"]]
+        children = [Scrapper_distributed.task("book", url, category=payload["category"],
+                                              order=[payload["category_index"], 1, position])
+                    for position, url in enumerate(urls)]
+        return {"books": len(urls), "urls": urls}, children
+
+    with WorkQueue("queue.db") as queue:
+        queue.set_meta("categories", [["Poetry", "p"], ["Travel", "t"]])
+        queue.put([Scrapper_distributed.task("listing", f"http://books.local/{name}", category=name,
+                                             category_index=index, page=1)
+                   for index, name in enumerate(listings)])
+        work(queue, {"listing": listing,
+                     "book": lambda payload: (record(payload["url"], payload["url"].split("/")[-2]), [])})
+
+    assert Scrapper_distributed.merge("queue.db") == 3
+    for name, titles in (("Poetry", ["shared_1", "other_2"]), ("Travel", ["shared_1"])):
+        with open(tmp_path / "csv" / f"V4_{name}.csv", newline="", encoding="utf-8") as f:
+            assert [row["title"] for row in csv.DictReader(f)] == titles
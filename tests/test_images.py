@@ -0,0 +1,92 @@
+import contextlib
+import http.server
+import io
+import os
+import threading
+
+import pytest
+import requests
+
+import Scrapper_images
+import Scrapper_retry
+
+
+@pytest.fixture
+def site():
+    """Serveur local d'images : chaque requête est notée."""
+    hits = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            body = self.path.encode() * 100
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/", hits
+    server.shutdown()
+
+def test_shared_cover_is_downloaded_once_without_store(site, tmp_path):
+    url, hits = site
+    images = Scrapper_images.ImagePipeline(workers=4, store=False)
+    paths = [str(tmp_path / category / "book.jpg") for category in ("Poetry", "Travel", "Music")]
+    for path in paths:
+        images.submit(url + "shared.jpg", path)
+    images.submit(url + "other.jpg", str(tmp_path / "Poetry" / "other.jpg"))
+    images.close()
+    assert sorted(hits) == ["/other.jpg", "/shared.jpg"]
+    assert images.stats()["downloaded"] == 2 and images.stats()["linked"] == 2
+    assert len({open(path, "rb").read() for path in paths}) == 1
+
+def test_file_from_previous_run_is_the_link_source(site, tmp_path):
+    url, hits = site
+    first = tmp_path / "Poetry" / "book.jpg"
+    first.parent.mkdir()
+    first.write_bytes(b"previous run")
+    images = Scrapper_images.ImagePipeline(workers=2, store=False)
+    images.submit(url + "shared.jpg", str(first))
+    images.submit(url + "shared.jpg", str(tmp_path / "Travel" / "book.jpg"))
+    images.close()
+    assert hits == []
+    assert (tmp_path / "Travel" / "book.jpg").read_bytes() == b"previous run"
+    assert os.path.samefile(first, tmp_path / "Travel" / "book.jpg")
+
+class ShortTransport:
+    """Transport dont les premières réponses s'arrêtent avant le Content-Length annoncé, sans erreur de lecture."""
+
+    def __init__(self, body, short_answers):
+        self.body = body
+        self.short_answers = short_answers
+        self.calls = 0
+        self.retry = Scrapper_retry.RetryPolicy(base_delay=0)
+
+    @contextlib.contextmanager
+    def get(self, url, stream=False):
+        self.calls += 1
+        body = self.body[:len(self.body) // 2] if self.calls <= self.short_answers else self.body
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Content-Length"] = str(len(self.body))
+        response.raw = io.BytesIO(body)
+        yield response
+
+    def count_stream(self, response, body):
+        return body
+
+def test_truncated_body_is_retried_and_never_renamed(tmp_path):
+    path = str(tmp_path / "book.jpg")
+    transport = ShortTransport(b"x" * 1000, short_answers=1)
+    assert Scrapper_images.download_image("http://books.local/a.jpg", path, transport) == 1000
+    assert transport.calls == 2 and os.path.getsize(path) == 1000
+
+    path = str(tmp_path / "other.jpg")
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        Scrapper_images.download_image("http://books.local/b.jpg", path, ShortTransport(b"x" * 1000, short_answers=9))
+    assert not Scrapper_images.is_present(path) and not os.path.exists(path + ".part")
@@ -0,0 +1,44 @@
+import glob
+import os
+
+import pytest
+
+import Scrapper_parsers
+
+PAGES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "pages", "*.html")))
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+def book_url(path):
+    """Adresse de la fiche sur le site (les liens relatifs de la page sont résolus à partir d'elle)."""
+    return f"https://books.toscrape.com/catalogue/{os.path.splitext(os.path.basename(path))[0]}/index.html"
+
+
+@pytest.mark.parametrize("backend", sorted(Scrapper_parsers.BACKENDS))
+@pytest.mark.parametrize("path", PAGES, ids=os.path.basename)
+def test_backend_matches_html_parser(backend, path):
+    if not Scrapper_parsers.is_available(backend):
+        pytest.skip(f"{backend} n'est pas installé")
+    html = read(path)
+    expected = Scrapper_parsers.parse_html_parser(html, book_url(path))
+    assert dict(Scrapper_parsers.BACKENDS[backend](html, book_url(path))) == dict(expected)
+
+def test_pages_cover_edge_cases():
+    records = {os.path.basename(path): Scrapper_parsers.parse_html_parser(read(path), book_url(path))
+               for path in PAGES}
+    light = records["a-light-in-the-attic_1000.html"]
+    assert (light["universal_product_code (upc)"], light["price_including_tax"], light["number_available"],
+            light["review_rating"]) == ("a897fe39b1053632", "£51.77", "22", 3)
+    assert light["image_url"] == "https://books.toscrape.com/media/cache/fe/72/fe72f0532301ec28892ae79a629a293c.jpg"
+    assert records["alice-in-wonderland-alices-adventures-in-wonderland-1_5.html"]["product_description"] == ""
+    shelf = records["the-forgotten-shelf_1234.html"]
+    assert (shelf["review_rating"], shelf["number_available"]) == (0, "0")
+    assert records["les-miserables-ampersands-quotes_42.html"]["title"] == 'Les Misérables & "Other" Stories'
+
+def test_check_parity_on_saved_pages():
+    differences, timings = Scrapper_parsers.check_parity(PAGES)
+    assert differences == []
+    assert "html.parser" in timings
@@ -0,0 +1,22 @@
+import Scrapper_refresh
+import Scrapper_retry
+from Scrapper_record import Book
+
+
+def test_page_that_is_not_a_product_is_a_dead_letter(monkeypatch):
+    def refresh_book(url, previous, images):
+        if "category" in url:
+            raise IndexError("list index out of range")     # Ce que lève parse_lxml sans bloc produit
+        return Book(url, "upc", "Book", 1000, 1000, "£", 3, "", "Poetry", 3, "")
+    monkeypatch.setattr(Scrapper_refresh, "refresh_book", refresh_book)
+    merged = []
+    monkeypatch.setattr(Scrapper_refresh, "merge_batch", lambda results, store=None: merged.extend(results))
+    dead_letters = Scrapper_retry.DeadLetters(None)
+    books = [("http://books.local/catalogue/a/index.html", None),
+             ("http://books.local/catalogue/category/books/poetry_23/index.html", None),
+             ("http://books.local/catalogue/b/index.html", None)]
+
+    done, changes = Scrapper_refresh.refresh(books, threads=2, batch_size=3, dead_letters=dead_letters)
+
+    assert done == 2 and len(merged) == 2 and len(changes) == 2
+    assert [(entry["type"], entry["url"]) for entry in dead_letters.entries] == [("book", books[1][0])]
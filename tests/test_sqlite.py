@@ -0,0 +1,48 @@
+import Scrapper_snapshot
+import Scrapper_sqlite
+from Scrapper_record import Book
+
+
+def book(number, category="Poetry", price=1000, available=5):
+    return Book(f"http://books.local/catalogue/book_{number}/index.html", f"upc{number:04d}", f"Book {number}",
+                price, price, "£", available, "", category, 3, f"http://books.local/media/{number}.jpg")
+
+def incremental_run(path, books, categories=("Poetry",)):
+    """Un run incrémental comme Scrapper_async : instantané de la base, livres écrits, changements."""
+    with Scrapper_sqlite.BookStore(path, "async") as store:
+        snapshot = store.load_snapshot()
+        changes = [change for change in (Scrapper_snapshot.compare(snapshot.get(b.url, b.upc), b) for b in books)
+                   if change]
+        for b in books:
+            store.add(b)
+        seen = {b.url for b in books}
+    return changes + Scrapper_snapshot.removed(snapshot, seen, set(categories))
+
+
+def test_removed_book_is_reported_once(tmp_path):
+    path = str(tmp_path / "books.db")
+    incremental_run(path, [book(1), book(2)])
+    changes = incremental_run(path, [book(1)])
+    assert [(row["change"], row["title"]) for row in changes] == [("supprimé", "Book 2")]
+    assert incremental_run(path, [book(1)]) == []
+
+def test_snapshot_keeps_categories_not_crawled_again(tmp_path):
+    path = str(tmp_path / "books.db")
+    incremental_run(path, [book(1), book(2, "Travel")], ("Poetry", "Travel"))
+    incremental_run(path, [book(1)], ("Poetry",))
+    with Scrapper_sqlite.BookStore(path, read_only=True) as store:
+        assert sorted(b.title for b in store.load_snapshot().by_url.values()) == ["Book 1", "Book 2"]
+
+def test_partial_and_interrupted_crawls_do_not_shrink_snapshot(tmp_path):
+    path = str(tmp_path / "books.db")
+    incremental_run(path, [book(1), book(2)])
+    with Scrapper_sqlite.BookStore(path, "refresh") as store:
+        store.add(book(1, price=900))
+    store = Scrapper_sqlite.BookStore(path, "async")       # Interrompu : jamais terminé
+    store.add(book(3))
+    store._flush()
+    store.conn.close()
+    with Scrapper_sqlite.BookStore(path, read_only=True) as store:
+        snapshot = store.load_snapshot()
+    assert sorted(b.title for b in snapshot.by_url.values()) == ["Book 1", "Book 2"]
+    assert snapshot.get(book(1).url).price_incl == 900